@@ -11,6 +11,12 @@ module Api
       # and never accidentally open to the world or fall back to some hard-coded creds
       http_basic_authenticate_with name: ENV.fetch("LOCAL_OFFICE_SEARCH_EPISERVER_USER", SecureRandom.base64(32)),
                                    password: ENV.fetch("LOCAL_OFFICE_SEARCH_EPISERVER_PASSWORD", SecureRandom.base64(32))
+
+      include ReadFromReplica
+      include DataGenerationCaching
+
+      # responses are only cached privately, as they are behind authentication
+      cache_by_data_generation max_age: :v0_cache_max_age, public: false
     end
   end
 end
@@ -0,0 +1,82 @@
+# frozen_string_literal: true
+
+require "base64"
+
+module Api
+  module V0
+    # Streams list responses as the offices are loaded, a batch at a time, so that memory use
+    # doesn't grow with the length of the list and the response starts straight away.
+    #
+    # Lists are in order of name then ID, which is also how they are paged through. If a limit is
+    # given, only that many items are returned, along with a nextCursor to pass as the cursor
+    # parameter for the next page (which is null on the last page).
+    module ListStreaming
+      BATCH_SIZE = 100
+      MAX_LIMIT = 1000
+
+      private
+
+      # the parameters are checked before anything is streamed, so that errors can still be
+      # responded to with a status
+      def stream_list(type, offices, &serialise)
+        limit = positive_integer_param(:limit)&.clamp(1, MAX_LIMIT)
+        after = cursor_param
+        # the list is streamed after the action returns, so outside the role set by ReadFromReplica
+        role = ActiveRecord::Base.current_role
+
+        response.headers["Content-Type"] = "application/json; charset=utf-8"
+        self.response_body = Enumerator.new do |body|
+          ActiveRecord::Base.connected_to(role:) { write_list(body, type, offices, limit, after, &serialise) }
+        end
+      end
+
+      def write_list(body, type, offices, limit, after)
+        body << %({"type":#{type.to_json},"list":[)
+        written = 0
+        last_key = after
+        loop do
+          size = limit.nil? ? BATCH_SIZE : [BATCH_SIZE, limit - written].min
+          break if size.zero?
+
+          batch = page_after(offices, last_key).limit(size).to_a
+          batch.each do |office|
+            body << "," unless written.zero?
+            body << yield(office).to_json
+            written += 1
+          end
+          last_key = list_key(batch.last) unless batch.empty?
+          break if batch.size < size
+        end
+        body << "]"
+        body << %(,"nextCursor":#{next_cursor(offices, last_key, limit, written).to_json}) unless limit.nil?
+        body << "}"
+      end
+
+      def page_after(offices, key)
+        page = offices.reorder(:name, :id)
+        key.nil? ? page : page.where("(offices.name, offices.id) > (?, ?)", *key)
+      end
+
+      def next_cursor(offices, last_key, limit, written)
+        return nil unless written == limit && page_after(offices, last_key).exists?
+
+        Base64.urlsafe_encode64(last_key.to_json, padding: false)
+      end
+
+      def list_key(office)
+        [office.name, office.id]
+      end
+
+      def cursor_param
+        return nil if params[:cursor].blank?
+
+        key = JSON.parse(Base64.urlsafe_decode64(params[:cursor].to_s))
+        raise InvalidParamError, :cursor unless key.is_a?(Array) && key.size == 2 && key.all?(String)
+
+        key
+      rescue ArgumentError, JSON::ParserError
+        raise InvalidParamError, :cursor
+      end
+    end
+  end
+end
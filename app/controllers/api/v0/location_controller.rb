@@ -4,15 +4,38 @@ module Api
   module V0
     class LocationController < BaseController
       include Serialisers
+      include SearchParams
+      include ListStreaming
+
+      # the response is usually rendered already, when the data was loaded
       def get
-        office = Office.find_by!(legacy_id: params[:id], office_type: :office)
-        render json: location_as_v0_json(office)
+        document = OfficeDocument.where(legacy_id: params[:id], office_type: :office).pick(:v0_json)
+        if document.nil?
+          office = Office.preload(LOCATION_PRELOADS).find_by!(legacy_id: params[:id], office_type: :office)
+          render json: measure_serialisation { location_as_v0_json(office) }
+        else
+          render json: document
+        end
       rescue ActiveRecord::RecordNotFound
         head :not_found
       end
 
       def list
-        head :not_implemented
+        stream_list("location", Office.preload(MEMBER_PRELOADS).where(office_type: list_office_types)) do |office|
+          location_as_v0_list_json(office)
+        end
+      rescue InvalidParamError
+        head :bad_request
+      end
+
+      private
+
+      # bureaux are listed unless bureau=false, and outreaches only with outlet=true
+      def list_office_types
+        types = []
+        types << :office unless params[:bureau] == "false"
+        types << :outreach if params[:outlet] == "true"
+        types
       end
     end
   end
@@ -4,16 +4,26 @@ module Api
   module V0
     class MemberController < BaseController
       include Serialisers
+      include SearchParams
+      include ListStreaming
 
+      # the response is usually rendered already, when the data was loaded
       def get
-        office = Office.find_by!(membership_number: params[:id], office_type: :member)
-        render json: member_as_v0_json(office)
+        document = OfficeDocument.where(membership_number: params[:id], office_type: :member).pick(:v0_json)
+        if document.nil?
+          office = Office.preload(MEMBER_PRELOADS).find_by!(membership_number: params[:id], office_type: :member)
+          render json: measure_serialisation { member_as_v0_json(office) }
+        else
+          render json: document
+        end
       rescue ActiveRecord::RecordNotFound
         head :not_found
       end
 
       def list
-        render json: { type: "member", list: Office.where(office_type: :member).map { |office| member_as_v0_list_json(office) } }
+        stream_list("member", Office.preload(MEMBER_PRELOADS).where(office_type: :member)) { |office| member_as_v0_list_json(office) }
+      rescue InvalidParamError
+        head :bad_request
       end
     end
   end
@@ -4,13 +4,19 @@ module Api
   module V0
     # rubocop:disable Metrics/ModuleLength
     module Serialisers
+      METRES_PER_MILE = 1609.34
+
+      # The associations read by the serialisers below. Offices should be loaded with these preloaded,
+      # so that a response takes a fixed number of queries however many offices are in it.
+      MEMBER_PRELOADS = [{ served_areas: :local_authority }].freeze
+      LOCATION_PRELOADS = [:opening_times, { served_areas: :local_authority }].freeze
+
       private
 
       # rubocop:disable Metrics/AbcSize
-      def member_as_v0_json(member)
-        offices = Office.where(membership_number: params[:id], office_type: :office)
+      def member_as_v0_json(member, locations = member_locations(member))
+        offices, outreaches = locations.partition { |location| location.office_type == "office" }
         offices_with_vacancies = offices.reject { |office| office.volunteer_roles.empty? }
-        outreaches = Office.where(membership_number: params[:id], office_type: :outreach)
 
         {
           address: address_block(member, include_local_authority: true),
@@ -30,6 +36,10 @@ module Api
         }
       end
 
+      def member_locations(member)
+        Office.preload(LOCATION_PRELOADS).where(membership_number: member.membership_number, office_type: %i[office outreach])
+      end
+
       def member_as_v0_list_json(member)
         {
           address: address_block(member, include_local_authority: true),
@@ -39,6 +49,17 @@ module Api
         }
       end
 
+      def location_as_v0_list_json(office)
+        {
+          address: address_block(office, include_local_authority: true),
+          membershipNumber: office.membership_number,
+          name: office.name,
+          serialNumber: office.legacy_id.to_s,
+          isBureau: office.office_type == "office",
+          isOutlet: office.office_type == "outreach"
+        }
+      end
+
       def location_as_v0_json(office)
         {
           address: address_block(office, include_local_authority: true),
@@ -87,7 +108,7 @@ module Api
         if location1.nil? || location2.nil?
           0
         else
-          location1.distance(location2) / 1609.34
+          location1.distance(location2) / METRES_PER_MILE
         end
       end
 
@@ -101,7 +122,7 @@ module Api
           latLong: office.location.nil? ? [0.0, 0.0] : [office.location.y, office.location.x]
         }
         if include_local_authority
-          local_authority = office.served_areas.first&.local_authority
+          local_authority = office.served_areas.min_by(&:id)&.local_authority
           block.update({ onsDistrictCode: local_authority.id, localAuthority: local_authority.name }) if local_authority.present?
         end
         block
@@ -6,22 +6,50 @@ module Api
   module V0
     class VacancyController < BaseController
       include Serialisers
+      include SearchParams
 
+      # the response is usually rendered already, when the data was loaded
       def get
-        office = Office.find(params[:id])
-        head :not_found if office.volunteer_roles.empty?
-        render json: vacancy_as_v0_json(office) unless office.volunteer_roles.empty?
-      rescue ActiveRecord::RecordNotFound
-        head :not_found
+        document = OfficeDocument.select(:office_id, :v0_vacancy_json).find_by(office_id: params[:id])
+        if document.nil?
+          render_vacancy_from_database
+        elsif document.v0_vacancy_json.nil?
+          head :not_found
+        else
+          render json: document.v0_vacancy_json
+        end
       end
 
       def list
-        offices, normalised_location = OfficeSearch.by_location(params[:near], only_with_vacancies: true)
-        render json: { type: "vacancies", list: offices.map { |office| vacancy_as_v0_json_with_distance(office, normalised_location) } }
+        offices, normalised_location = OfficeSearch.by_location(params[:near], search_opts)
+        label_match_type(normalised_location.nil? ? "fuzzy" : "exact")
+        list = measure_serialisation { offices.map { |office| vacancy_as_v0_json_with_distance(office, normalised_location) } }
+        render json: { type: "vacancies", list: }
       rescue OfficeSearch::UnknownLocationError
+        label_match_type("unknown")
         render json: { type: "no results" }
       rescue OfficeSearch::OutOfAreaError => e
+        label_match_type("out_of_area_#{e.country}")
         render json: { type: "Out of bounds #{e.country_name}" }
+      rescue InvalidParamError
+        head :bad_request
+      end
+
+      private
+
+      def render_vacancy_from_database
+        office = Office.find(params[:id])
+        head :not_found if office.volunteer_roles.empty?
+        render json: measure_serialisation { vacancy_as_v0_json(office) } unless office.volunteer_roles.empty?
+      rescue ActiveRecord::RecordNotFound
+        head :not_found
+      end
+
+      def search_opts
+        # radius is given in miles, to match the distances returned in the response
+        radius_in_miles = positive_number_param(:radius)
+        radius = radius_in_miles.nil? ? nil : radius_in_miles * METRES_PER_MILE
+        { only_with_vacancies: true, radius:, limit: positive_integer_param(:limit) }
       end
     end
   end
@@ -0,0 +1,19 @@
+# frozen_string_literal: true
+
+module Api
+  module V2
+    # the problem details (RFC 7807) returned for requests with missing or invalid parameters
+    module Errors
+      private
+
+      def missing_search_param_json(param_name)
+        { type: "https://local-office-search.citizensadvice.org.uk/schemas/v2/errors#missing-param", status: 400,
+          title: "Required parameter (#{param_name}) missing" }
+      end
+
+      def invalid_search_param_json(param_name)
+        { type: "https://local-office-search.citizensadvice.org.uk/schemas/v2/errors#invalid-param", status: 400, title: "Parameter (#{param_name}) is not valid" }
+      end
+    end
+  end
+end
@@ -4,8 +4,19 @@ require "office_search"
 
 module Api
   module V2
-    class OfficeController < ::ApplicationController
+    class OfficeController < ::ApplicationController # rubocop:disable Metrics/ClassLength
       include Serialisers
+      include Errors
+      include SearchParams
+      include ReadFromReplica
+      include DataGenerationCaching
+
+      cache_by_data_generation max_age: :v2_cache_max_age, public: true
+
+      # the most queries (or IDs) which can be given in one request
+      MAX_BATCH_SIZE = 100
+
+      DAYS_OF_WEEK = %w[monday tuesday wednesday thursday friday saturday sunday].freeze
 
       def show
         if legacy_id?
@@ -16,11 +27,25 @@ module Api
       end
 
       def search
-        if search_q_is_valid?
-          render json: search_response(params[:q])
+        if params.key?(:ids)
+          render json: offices_by_id_response(ids_param)
+        elsif search_q_is_valid?
+          render json: search_response(params[:q], search_opts)
+        else
+          render status: :bad_request, json: missing_search_param_json(:q)
+        end
+      rescue InvalidParamError => e
+        render status: :bad_request, json: invalid_search_param_json(e.param_name)
+      end
+
+      def batch_search
+        if params[:queries].blank?
+          render status: :bad_request, json: missing_search_param_json(:queries)
         else
-          render status: :bad_request, json: missing_search_param_json
+          render json: batch_search_response(queries_param, search_opts)
         end
+      rescue InvalidParamError => e
+        render status: :bad_request, json: invalid_search_param_json(e.param_name)
       end
 
       private
@@ -33,22 +58,117 @@ module Api
         !(params[:q] || "").empty?
       end
 
-      def search_response(query)
-        offices, normalised_location = OfficeSearch.by_location query, only_in_same_local_authority: true
-      rescue OfficeSearch::UnknownLocationError
-        { match_type: "unknown", results: [] }
-      rescue OfficeSearch::OutOfAreaError => e
-        { match_type: "out_of_area_#{e.country}", results: [] }
+      def search_opts
+        # radius is in metres
+        { only_in_same_local_authority: true, radius: positive_number_param(:radius), limit: positive_integer_param(:limit),
+          open_at: open_at_param }
+      end
+
+      # open_at is a day of the week and a time, such as "monday,13:30", and open_now is the current
+      # time. Either can be for office (the default) or telephone advice hours, given as open_for.
+      def open_at_param
+        return OfficeSearch::OpenAt.now(open_for_param) if open_now?
+        return nil if params[:open_at].blank?
+
+        day_of_week, time = params[:open_at].to_s.downcase.split(",", 2)
+        raise InvalidParamError, :open_at unless DAYS_OF_WEEK.include?(day_of_week) && time&.match?(/\A\s*\d{2}:\d{2}\z/)
+
+        OfficeSearch::OpenAt.new(day_of_week:, time: Tod::TimeOfDay.parse(time.strip), opening_time_for: open_for_param)
+      rescue ArgumentError
+        raise InvalidParamError, :open_at
+      end
+
+      def open_for_param
+        return "office" if params[:open_for].blank?
+        raise InvalidParamError, :open_for unless %w[office telephone].include?(params[:open_for])
+
+        params[:open_for]
+      end
+
+      def open_now?
+        ActiveModel::Type::Boolean.new.cast(params[:open_now]) == true
+      end
+
+      # which offices are open now changes over time, not just when the data is synced
+      def cacheable_by_data_generation?
+        super && !open_now?
+      end
+
+      def queries_param
+        queries = params[:queries]
+        unless queries.is_a?(Array) && queries.size <= MAX_BATCH_SIZE && queries.all? { |query| query.is_a?(String) && !query.empty? }
+          raise InvalidParamError, :queries
+        end
+
+        queries
+      end
+
+      def ids_param
+        ids = params[:ids].is_a?(String) ? params[:ids].split(",").map(&:strip).reject(&:empty?).uniq : []
+        raise InvalidParamError, :ids if ids.empty? || ids.size > MAX_BATCH_SIZE
+
+        ids
+      end
+
+      def search_response(query, opts)
+        offices, normalised_location = OfficeSearch.by_location query, opts
+      rescue OfficeSearch::UnknownLocationError, OfficeSearch::OutOfAreaError => e
+        search_error_json(e).tap { |json| label_match_type(json[:match_type]) }
       else
+        label_match_type(normalised_location.nil? ? "fuzzy" : "exact")
+        measure_serialisation { search_results_json(offices, normalised_location) }
+      end
+
+      def batch_search_response(queries, opts)
+        results = OfficeSearch.by_locations(queries, opts)
+        label_match_type("batch")
+        measure_serialisation do
+          { searches: results.transform_values { |result| result.is_a?(StandardError) ? search_error_json(result) : search_results_json(*result) } }
+        end
+      end
+
+      def search_results_json(offices, normalised_location)
         { match_type: normalised_location.nil? ? "fuzzy" : "exact", results: offices.map { |office| office_as_search_result_json(office) } }
       end
 
+      def search_error_json(error)
+        case error
+        when OfficeSearch::OutOfAreaError
+          { match_type: "out_of_area_#{error.country}", results: [] }
+        else
+          { match_type: "unknown", results: [] }
+        end
+      end
+
+      # Offices are returned in the order they were asked for, leaving out any which don't exist.
+      # As with show, the documents are usually rendered already, so are joined together as they are.
+      def offices_by_id_response(ids)
+        documents = OfficeDocument.where(office_id: ids).pluck(:office_id, :v2_json).to_h
+        missing_ids = ids - documents.keys
+        unless missing_ids.empty?
+          Office.preload(:parent, :children, :opening_times).where(id: missing_ids).each do |office|
+            documents[office.id] = measure_serialisation { office_as_json(office).to_json }
+          end
+        end
+        %({"results":[#{documents.values_at(*ids).compact.join(',')}]})
+      end
+
+      # the response is usually rendered already, when the data was loaded
       def fetch_and_render_office
+        document = OfficeDocument.where(office_id: params[:id]).pick(:v2_json)
+        if document.nil?
+          render_office_from_database
+        else
+          render json: document
+        end
+      end
+
+      def render_office_from_database
         office = Office.find(params[:id])
       rescue ActiveRecord::RecordNotFound
         render status: :not_found, json: not_found_json
       else
-        render json: office_as_json(office)
+        render json: measure_serialisation { office_as_json(office) }
       end
 
       def redirect_from_legacy_id_to_new
@@ -63,10 +183,6 @@ module Api
       def not_found_json
         { type: "https://local-office-search.citizensadvice.org.uk/schemas/v2/errors#not-found", status: 404, title: "Office not found" }
       end
-
-      def missing_search_param_json
-        { type: "https://local-office-search.citizensadvice.org.uk/schemas/v2/errors#missing-param", status: 400, title: "Required parameter (q) missing" }
-      end
     end
   end
 end
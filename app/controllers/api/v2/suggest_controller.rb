@@ -0,0 +1,39 @@
+# frozen_string_literal: true
+
+require "suggestions"
+
+module Api
+  module V2
+    class SuggestController < ::ApplicationController
+      include Errors
+      include SearchParams
+      include ReadFromReplica
+      include DataGenerationCaching
+
+      cache_by_data_generation max_age: :v2_cache_max_age, public: true
+
+      # longer than any postcode or name which could be suggested
+      MAX_PREFIX_LENGTH = 100
+
+      def index
+        if params[:prefix].blank?
+          render status: :bad_request, json: missing_search_param_json(:prefix)
+        else
+          suggestions = Suggestions.suggest(prefix_param, positive_integer_param(:limit))
+          render json: measure_serialisation { { suggestions: suggestions.map { |suggestion| suggestion.to_h.compact } } }
+        end
+      rescue InvalidParamError => e
+        render status: :bad_request, json: invalid_search_param_json(e.param_name)
+      end
+
+      private
+
+      def prefix_param
+        prefix = params[:prefix]
+        raise InvalidParamError, :prefix unless prefix.is_a?(String) && prefix.length <= MAX_PREFIX_LENGTH
+
+        prefix
+      end
+    end
+  end
+end
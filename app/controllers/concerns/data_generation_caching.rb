@@ -0,0 +1,35 @@
+# frozen_string_literal: true
+
+# The data only changes when it is synced, so responses can be cached until the next sync. This
+# sets validators derived from the current data generation and the request, and responds to
+# conditional requests which are still fresh with a 304 before the action runs.
+module DataGenerationCaching
+  extend ActiveSupport::Concern
+
+  class_methods do
+    # max_age is the name of the config setting which holds the Cache-Control max-age in seconds
+    def cache_by_data_generation(max_age:, public:)
+      before_action { render_not_modified_if_fresh(Rails.configuration.public_send(max_age), public:) }
+    end
+  end
+
+  private
+
+  def render_not_modified_if_fresh(max_age, public:)
+    return unless cacheable_by_data_generation?
+
+    generation = DataGeneration.cached_current
+    return if generation.nil?
+
+    expires_in(max_age, public:)
+    fresh_when(strong_etag: [generation.id, request.path, request.query_parameters.sort],
+               last_modified: generation.created_at,
+               public:)
+  end
+
+  # The validators don't cover request bodies, so only reads can be cached. Controllers extend this
+  # for requests whose responses can change between syncs.
+  def cacheable_by_data_generation?
+    request.get? || request.head?
+  end
+end
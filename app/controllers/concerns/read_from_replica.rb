@@ -0,0 +1,19 @@
+# frozen_string_literal: true
+
+# API requests only read data, so are sent to the database replica (keeping load off the primary
+# while the sync is writing to it). If the replica has not yet caught up with the latest sync,
+# requests read from the primary instead.
+module ReadFromReplica
+  extend ActiveSupport::Concern
+
+  included do
+    around_action :read_from_replica
+  end
+
+  private
+
+  def read_from_replica(&)
+    role = DataGeneration.replica_up_to_date? ? :reading : :writing
+    ActiveRecord::Base.connected_to(role:, &)
+  end
+end
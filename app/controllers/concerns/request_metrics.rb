@@ -0,0 +1,46 @@
+# frozen_string_literal: true
+
+# Measures how many SQL queries each request makes, and how long it spends building the response
+# body, labelled with the endpoint and (for searches) how the location was matched.
+#
+# Streamed responses are written after the action returns, so their queries and serialisation
+# aren't included.
+module RequestMetrics
+  extend ActiveSupport::Concern
+
+  included do
+    around_action :measure_request
+  end
+
+  # the counter is kept for each thread (or fiber), as requests run concurrently
+  def self.count_query(payload)
+    return if payload[:cached] || %w[SCHEMA TRANSACTION].include?(payload[:name])
+
+    counter = ActiveSupport::IsolatedExecutionState[:request_metrics_sql_queries]
+    ActiveSupport::IsolatedExecutionState[:request_metrics_sql_queries] = counter + 1 unless counter.nil?
+  end
+
+  private
+
+  def measure_request
+    ActiveSupport::IsolatedExecutionState[:request_metrics_sql_queries] = 0
+    @serialisation_duration = 0.0
+    yield
+  ensure
+    tags = { endpoint: "#{controller_path}##{action_name}", match_type: @match_type || "none" }
+    Yabeda.api.sql_queries.measure(tags, ActiveSupport::IsolatedExecutionState.delete(:request_metrics_sql_queries))
+    Yabeda.api.serialisation_duration.measure(tags, @serialisation_duration)
+  end
+
+  def measure_serialisation
+    started_at = Process.clock_gettime(Process::CLOCK_MONOTONIC)
+    yield
+  ensure
+    @serialisation_duration += Process.clock_gettime(Process::CLOCK_MONOTONIC) - started_at
+  end
+
+  # labels the request's metrics with how a search matched its location
+  def label_match_type(match_type)
+    @match_type = match_type
+  end
+end
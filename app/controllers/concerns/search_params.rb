@@ -0,0 +1,38 @@
+# frozen_string_literal: true
+
+module SearchParams
+  private
+
+  def positive_integer_param(name)
+    value = params[name]
+    return nil if value.blank?
+
+    # JSON request bodies can give numbers rather than strings
+    integer = value.is_a?(String) && value.match?(/\A\d+\z/) ? value.to_i : value
+    raise InvalidParamError, name unless integer.is_a?(Integer) && integer.positive?
+
+    integer
+  end
+
+  def positive_number_param(name)
+    value = params[name]
+    return nil if value.blank?
+
+    number = case value
+             when String then Float(value, exception: false)
+             when Numeric then value.to_f
+             end
+    raise InvalidParamError, name unless number&.finite? && number.positive?
+
+    number
+  end
+
+  class InvalidParamError < StandardError
+    attr_reader :param_name
+
+    def initialize(param_name)
+      super
+      @param_name = param_name
+    end
+  end
+end
@@ -1,11 +1,19 @@
 # frozen_string_literal: true
 
+require "warm_up"
+
 class StatusController < ApplicationController
+  # not ready until this process has warmed up, or while the database can't be reached
   def index
+    head WarmUp.ready? && database_available? ? :ok : :service_unavailable
+  end
+
+  private
+
+  def database_available?
     ActiveRecord::Base.connection.execute("SELECT 1")
+    true
   rescue ActiveRecord::ConnectionNotEstablished
-    head :service_unavailable
-  else
-    head :ok
+    false
   end
 end
@@ -0,0 +1,41 @@
+# frozen_string_literal: true
+
+class DataGeneration < ApplicationRecord
+  has_many :sync_states, dependent: nil
+
+  @cache_mutex = Mutex.new
+
+  def self.current
+    order(id: :desc).first
+  end
+
+  # The current generation as last seen by this process. This is only re-checked every
+  # data_generation_check_interval seconds, so most requests don't need to query for it.
+  def self.cached_current
+    refresh_cache!
+    @cached_current
+  end
+
+  # Whether the replica had caught up with the current generation when it was last checked, so
+  # that reading from the replica never serves data older than the latest sync
+  def self.replica_up_to_date?
+    # without a separate reader host configured the replica is the primary, so can't be behind
+    return true if Rails.configuration.database_reader_host.nil?
+
+    refresh_cache!
+    @replica_up_to_date
+  end
+
+  def self.refresh_cache!
+    @cache_mutex.synchronize do
+      now = Process.clock_gettime(Process::CLOCK_MONOTONIC)
+      next unless @checked_at.nil? || now - @checked_at >= Rails.configuration.data_generation_check_interval
+
+      @cached_current = ActiveRecord::Base.connected_to(role: :writing) { current }
+      @replica_up_to_date = Rails.configuration.database_reader_host.nil? ||
+                            ActiveRecord::Base.connected_to(role: :reading) { current } == @cached_current
+      @checked_at = now
+    end
+  end
+  private_class_method :refresh_cache!
+end
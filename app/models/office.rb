@@ -21,8 +21,10 @@ class Office < ApplicationRecord
 
   private
 
+  # filters in memory rather than with a query, so that opening times can be preloaded for many
+  # offices at once
   def build_opening_times(opening_times_for)
-    office_opening_times = opening_times.where(opening_time_for: opening_times_for).to_a
+    office_opening_times = opening_times.select { |opening_time| opening_time.opening_time_for == opening_times_for }
 
     opening_hours = {}
     %w[monday tuesday wednesday thursday friday saturday sunday].each do |day_of_week|
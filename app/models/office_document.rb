@@ -0,0 +1,8 @@
+# frozen_string_literal: true
+
+# The already encoded API responses for an office, which are rendered whenever the LSS data is loaded
+class OfficeDocument < ApplicationRecord
+  self.primary_key = "office_id"
+
+  belongs_to :office
+end
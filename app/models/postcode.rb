@@ -12,18 +12,21 @@ class Postcode < ApplicationRecord
     local_authority_id.start_with? "N"
   end
 
+  def self.normalise(postcode)
+    postcode.delete(" ").downcase
+  end
+
+  # the inward code is always the last three characters
+  def self.canonicalise(normalised)
+    "#{normalised[0...-3]} #{normalised[-3..]}".upcase
+  end
+
   def self.normalise_and_find(postcode)
-    find_by normalised: postcode.delete(" ").downcase
+    find_by normalised: normalise(postcode)
   end
 
-  # this overrides the default Rails upsert because that doesn't know how to handle conflicts on
-  # virtual columns
-  def self.bulk_upsert(vals)
-    ActiveRecord::Base.connection.execute <<-SQL.squish
-      INSERT INTO "#{table_name}" (canonical,location,local_authority_id)
-      VALUES #{vals.map { |attrs| ActiveRecord::Base.sanitize_sql_array ['(:canonical, :location, :local_authority_id)', attrs] }.join(',')}
-      ON CONFLICT (normalised) DO
-      UPDATE SET location=EXCLUDED.location, local_authority_id=EXCLUDED.local_authority_id
-    SQL
+  def self.normalise_and_find_all(postcodes)
+    found = where(normalised: postcodes.map { |postcode| normalise(postcode) }).index_by(&:normalised)
+    postcodes.index_with { |postcode| found[normalise(postcode)] }
   end
 end
@@ -0,0 +1,13 @@
+# frozen_string_literal: true
+
+class PostcodeSearchResult < ApplicationRecord
+  self.primary_key = "key"
+
+  # Returns the IDs of the offices found by an exact search for this postcode, in order, or nil if
+  # they have not been precomputed. Sectors end in a digit and whole postcodes in two letters, so the
+  # keys never clash.
+  def self.office_ids_for(postcode)
+    normalised = postcode.delete(" ").downcase
+    where(key: [normalised, normalised[0..-3]]).order(Arel.sql("length(key) DESC")).pick(:office_ids)
+  end
+end
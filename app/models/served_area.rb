@@ -3,4 +3,11 @@
 class ServedArea < ApplicationRecord
   belongs_to :office
   belongs_to :local_authority
+
+  # Served areas are loaded with the LSS data, but refer to local authorities which are loaded with
+  # the postcodes, so any left for local authorities which no longer exist are removed whenever either
+  # is replaced
+  def self.delete_without_local_authority
+    where.not(local_authority_id: LocalAuthority.select(:id)).delete_all
+  end
 end
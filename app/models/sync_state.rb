@@ -0,0 +1,42 @@
+# frozen_string_literal: true
+
+class SyncState < ApplicationRecord
+  self.primary_key = "name"
+
+  belongs_to :data_generation
+
+  # any number will do, as long as nothing else takes the same advisory lock
+  DATA_CHANGE_LOCK_ID = 4_107_725_301
+
+  def self.source_changed?(name, source_etags)
+    find_by(name:)&.source_etags != source_etags
+  end
+
+  # Whether any of the sources a load depends on has been synced since it was last recorded (see
+  # data_generations)
+  def self.dependencies_changed?(name, dependencies)
+    find_by(name:)&.dependencies != dependencies.stringify_keys
+  end
+
+  # The current data generation of each of the named sources, which a load that depends on them
+  # records along with its own state
+  def self.data_generations(*names)
+    where(name: names).pluck(:name, :data_generation_id).to_h
+  end
+
+  # this should be called in the same transaction as the load, so that the recorded state always
+  # matches the data that was committed
+  def self.record!(name, source_etags, dependencies: {})
+    data_generation = DataGeneration.create!
+    state = find_or_initialize_by(name:)
+    state.update!(source_etags:, dependencies:, data_generation:, synced_at: Time.current)
+    state
+  end
+
+  # Each source is synced by its own job, and these can run at the same time, so changes to the
+  # live data (swapping in new tables, or precomputing search results) are made one at a time. This
+  # must be called in the transaction making the change, and holds the lock until it ends.
+  def self.lock_data_changes!
+    connection.execute("SELECT pg_advisory_xact_lock(#{DATA_CHANGE_LOCK_ID})")
+  end
+end
@@ -5,7 +5,9 @@ import os
 from aws_cdk import App, Stage, Environment, Tags
 
 from app.local_office_search_api import LocalOfficeSearchApiDeployment
+from app.performance_profile import ConnectionPooler, ContainerSize, PerformanceProfile
 from infrastructure.db import LocalOfficeSearchDatabase
+from infrastructure.db_parameters import DatabaseParameters
 
 
 app = App()
@@ -21,6 +23,31 @@ STAGE_VARS = {
         "geo_data_postcode_file": "Geo_postcodes_csv_uat.csv",
         "api_v0_host": "bureaudetails.qa.citizensadvice.org.uk",
         "api_v0_cert_arn": "arn:aws:acm:eu-west-1:979633842206:certificate/53339880-7787-4488-aa6d-4d9854fa13dc",  # *.qa.citizensadvice.org.uk
+        "performance_profile": PerformanceProfile(
+            puma_workers=2,
+            puma_threads=5,
+            server=ContainerSize(
+                cpu_request_millis=250,
+                cpu_limit_millis=1000,
+                memory_request_mib=768,
+                memory_limit_mib=1024,
+            ),
+            import_job=ContainerSize(
+                cpu_request_millis=1000,
+                cpu_limit_millis=2000,
+                memory_request_mib=1024,
+                memory_limit_mib=2048,
+            ),
+            lss_import_job=ContainerSize(
+                cpu_request_millis=250,
+                cpu_limit_millis=1000,
+                memory_request_mib=512,
+                memory_limit_mib=1024,
+            ),
+            min_replicas=1,
+            max_replicas=2,
+            connection_pooler=ConnectionPooler(pool_size=3),
+        ),
     },
     "prod": {
         "lss_bucket_name": "prod-advicelocationprodbucket-buckete75ea64c-1oasp6hbbkp4j",
@@ -28,16 +55,59 @@ STAGE_VARS = {
         "geo_data_postcode_file": "geo_postcodes_prod.csv",
         "api_v0_host": "bureaudetails.prod.content.citizensadvice.org.uk",
         "api_v0_cert_arn": "arn:aws:acm:eu-west-1:912473634278:certificate/f2d8f90a-1d29-4b07-9a03-41e530a470d9",  # *.prod.content.citizensadvice.org.uk
+        "performance_profile": PerformanceProfile(
+            puma_workers=2,
+            puma_threads=5,
+            server=ContainerSize(
+                cpu_request_millis=500,
+                cpu_limit_millis=1000,
+                memory_request_mib=1024,
+                memory_limit_mib=1536,
+            ),
+            import_job=ContainerSize(
+                cpu_request_millis=2000,
+                cpu_limit_millis=4000,
+                memory_request_mib=2048,
+                memory_limit_mib=3072,
+            ),
+            lss_import_job=ContainerSize(
+                cpu_request_millis=500,
+                cpu_limit_millis=1000,
+                memory_request_mib=768,
+                memory_limit_mib=1536,
+            ),
+            min_replicas=2,
+            max_replicas=6,
+            connection_pooler=ConnectionPooler(pool_size=5),
+        ),
     },
 }
 
+# Aurora reader instances, which the API reads from. With none, the reader endpoint is the writer.
+DB_READER_INSTANCES = {"dev": 0, "prod": 1}
+
+# The Aurora cluster's parameter group. Each stage's instances are t3.medium (4GiB).
+DB_PARAMETERS = {
+    "dev": DatabaseParameters(
+        work_mem_mib=8, maintenance_work_mem_mib=256, auto_explain_min_duration_ms=250
+    ),
+    "prod": DatabaseParameters(
+        work_mem_mib=16, maintenance_work_mem_mib=512, auto_explain_min_duration_ms=500
+    ),
+}
+
 STAGES = [
     Stage(app, "dev", env=Environment(account=ACCOUNT_IDS["devops"], region="eu-west-1")),
     Stage(app, "prod", env=Environment(account=ACCOUNT_IDS["prod2"], region="eu-west-1")),
 ]
 
 for stage in STAGES:
-    db_stack = LocalOfficeSearchDatabase(stage, "LocalOfficeSearchApiDb")
+    db_stack = LocalOfficeSearchDatabase(
+        stage,
+        "LocalOfficeSearchApiDb",
+        reader_instances=DB_READER_INSTANCES[stage.stage_name],
+        parameters=DB_PARAMETERS[stage.stage_name],
+    )
     LocalOfficeSearchApiDeployment(
         stage,
         "LocalOfficeSearchApiDeployment",
@@ -6,6 +6,7 @@ from aws_cdk.aws_rds import Credentials, DatabaseCluster
 from aws_cdk.aws_s3 import Bucket
 from cdk8s import Chart, Cron, Duration, Size, ApiObjectMetadataDefinition
 from cdk8s_plus_30 import (
+    ConcurrencyPolicy,
     Deployment,
     RestartPolicy,
     ServicePort,
@@ -38,14 +39,27 @@ from cdk8s_plus_30 import (
     Service,
     Ingress,
     IngressBackend,
+    Volume,
 )
 from constructs import Construct
 
+from .performance_profile import ConnectionPooler, ContainerSize, PerformanceProfile
+
 
 class LocalOfficeSearchApiChart(Chart):
     _APP_NAME = "local-office-search-api"
     _HTTP_PORT = 3060
     _METRICS_PORT = 9394
+    _POOLER_PORT = 6432
+    _POOLER_METRICS_PORT = 9127
+    _POOLER_IMAGE = "bitnami/pgbouncer:1.23.1"
+    _POOLER_EXPORTER_IMAGE = "prometheuscommunity/pgbouncer-exporter:v0.9.0"
+    _DB_NAME = "local_office_search_api"
+    _REPLICA_DB_NAME = "local_office_search_api_replica"
+    # each pod builds its own postcode index here, shared by its Puma workers
+    _POSTCODE_INDEX_DIR = "/var/cache/postcode-index"
+    # served to the HPA by the Prometheus adapter, from yabeda-rails' request duration histogram
+    _LATENCY_METRIC = "rails_request_duration_seconds_p95"
 
     def __init__(
         self,
@@ -65,6 +79,7 @@ class LocalOfficeSearchApiChart(Chart):
         app_secret_name: str,
         api_v0_host: str,
         api_v0_cert_arn: str,
+        performance_profile: PerformanceProfile,
     ):
         self._labels = {
             "app": self._APP_NAME,
@@ -98,17 +113,27 @@ class LocalOfficeSearchApiChart(Chart):
         self._lss_data_bucket_name = lss_data_bucket.bucket_name
         self._geo_data_bucket_name = geo_data_bucket.bucket_name
         self._geo_data_postcode_file = geo_data_postcode_file
+        self._performance_profile = performance_profile
 
         deployment = self._create_deployment()
         app_service = self._expose_services(deployment)
         self._expose_v0_api(api_v0_host, api_v0_cert_arn, app_service)
 
-        self._create_scheduled_import()
+        self._create_scheduled_imports()
+        self._create_statement_metrics_exporter()
         self._configure_autoscaler(deployment)
         self._allow_external_traffic()
         self._allow_metrics_collection()
 
     def _create_deployment(self):
+        pooler = self._performance_profile.connection_pooler
+        server_env = self._performance_profile.server_env()
+        if pooler:
+            server_env.update(self._pooler_client_env())
+        server_env.update(
+            {"POSTCODE_INDEX_DIR": self._POSTCODE_INDEX_DIR, "POSTCODE_INDEX_BUILD": "true"}
+        )
+
         deployment = Deployment(
             self,
             "Deployment",
@@ -123,13 +148,24 @@ class LocalOfficeSearchApiChart(Chart):
                         "-b",
                         "0.0.0.0",
                     ],
-                )
+                    size=self._performance_profile.server,
+                    profile_env=server_env,
+                    serves_requests=True,
+                ),
+                *(self._pooler_container_props(pooler) if pooler else []),
             ],
             service_account=self._service_account,
             restart_policy=RestartPolicy.ALWAYS,
             termination_grace_period=Duration.seconds(60),
         )
 
+        # the index is about 32 bytes per postcode, and is rebuilt from the database when a pod
+        # starts, so doesn't need to outlive it
+        postcode_index = Volume.from_empty_dir(
+            self, "PostcodeIndexVolume", "postcode-index", size_limit=Size.mebibytes(256)
+        )
+        deployment.containers[0].mount(self._POSTCODE_INDEX_DIR, postcode_index)
+
         self._add_labels(deployment.metadata)
         self._add_labels(deployment.pod_metadata)
         deployment.pod_metadata.add_label("component", "local-office-search-api-server")
@@ -160,16 +196,52 @@ class LocalOfficeSearchApiChart(Chart):
 
         return deployment
 
-    def _create_scheduled_import(self):
+    def _create_scheduled_imports(self):
+        """
+        The postcode and LSS imports are separate jobs, so the LSS data (which changes daily)
+        can be checked for changes often, without waiting on the postcode data (which changes
+        quarterly). Each skips its import if its data hasn't changed, but the LSS import also
+        runs whenever the postcodes have been imported since it last did.
+        """
+        self._create_scheduled_import(
+            "ScheduledPostcodeImport",
+            f"{self._APP_NAME}-postcode-import",
+            command_line=["bin/rake", "sync_database:postcodes"],
+            schedule=Cron.schedule(hour="9", minute="55"),
+            size=self._performance_profile.import_job,
+            profile_env=self._performance_profile.import_job_env(),
+        )
+        self._create_scheduled_import(
+            "ScheduledLssImport",
+            f"{self._APP_NAME}-lss-import",
+            command_line=["bin/rake", "sync_database:lss"],
+            schedule=Cron.schedule(minute="*/15"),
+            size=self._performance_profile.lss_import_job_size,
+            profile_env=self._performance_profile.lss_import_job_env(),
+        )
+
+    def _create_scheduled_import(
+        self,
+        construct_id: str,
+        name: str,
+        command_line: typing.List[str],
+        schedule: Cron,
+        size: ContainerSize,
+        profile_env: typing.Dict[str, str],
+    ):
         scheduled_job = CronJob(
             self,
-            "ScheduledImport",
-            schedule=Cron.schedule(hour="9", minute="55"),
+            construct_id,
+            schedule=schedule,
             time_zone="Europe/London",
+            # a run which takes longer than the schedule isn't overlapped by the next one
+            concurrency_policy=ConcurrencyPolicy.FORBID,
             containers=[
                 self._server_container_props(
-                    f"{self._APP_NAME}-scheduled-import",
-                    command_line=["bin/rake", "sync_database"],
+                    name,
+                    command_line=command_line,
+                    size=size,
+                    profile_env=profile_env,
                 )
             ],
             service_account=self._service_account,
@@ -178,12 +250,10 @@ class LocalOfficeSearchApiChart(Chart):
 
         self._add_labels(scheduled_job.metadata)
         self._add_labels(scheduled_job.pod_metadata)
-        scheduled_job.pod_metadata.add_label(
-            "component", "local-office-search-api-scheduled-import"
-        )
+        scheduled_job.pod_metadata.add_label("component", name)
 
         scheduled_job.metadata.add_annotation(
-            "ad.datadoghq.com/local-office-search-api-scheduled-import.logs",
+            f"ad.datadoghq.com/{name}.logs",
             json.dumps(
                 [
                     {
@@ -195,7 +265,71 @@ class LocalOfficeSearchApiChart(Chart):
             ),
         )
 
-    def _server_container_props(self, name: str, command_line: typing.List[str]):
+    def _create_statement_metrics_exporter(self):
+        """
+        The pg_stat_statements statistics are the same whichever pod reads them, so they are
+        exported by a single pod of their own, rather than by every server pod.
+        """
+        name = f"{self._APP_NAME}-statement-metrics"
+        exporter = Deployment(
+            self,
+            "StatementMetricsExporter",
+            replicas=1,
+            containers=[
+                ContainerProps(
+                    name=name,
+                    image=self._container_image,
+                    image_pull_policy=ImagePullPolicy.IF_NOT_PRESENT,
+                    args=["bin/rake", "statement_metrics:serve"],
+                    ports=[ContainerPort(name="metrics", number=self._METRICS_PORT)],
+                    env_variables={
+                        **self._app_env_vars(),
+                        **{
+                            key: EnvValue.from_value(value)
+                            for key, value in self._performance_profile.statement_metrics_env().items()
+                        },
+                        "METRICS_PORT": EnvValue.from_value(str(self._METRICS_PORT)),
+                    },
+                    readiness=Probe.from_http_get(
+                        path="/status",
+                        port=self._METRICS_PORT,
+                        period_seconds=Duration.seconds(10),
+                    ),
+                    resources=self._container_resources(
+                        ContainerSize(
+                            cpu_request_millis=50,
+                            cpu_limit_millis=250,
+                            memory_request_mib=256,
+                            memory_limit_mib=512,
+                        )
+                    ),
+                    security_context=ContainerSecurityContextProps(
+                        user=1000, read_only_root_filesystem=False
+                    ),
+                )
+            ],
+            service_account=self._service_account,
+            restart_policy=RestartPolicy.ALWAYS,
+        )
+
+        self._add_labels(exporter.metadata)
+        self._add_labels(exporter.pod_metadata)
+        exporter.pod_metadata.add_label("component", name)
+
+        metrics_service = exporter.expose_via_service(
+            name=name,
+            ports=[ServicePort(name="metrics", port=self._METRICS_PORT)],
+        )
+        metrics_service.metadata.add_label("custom-metrics-enabled", "true")
+
+    def _server_container_props(
+        self,
+        name: str,
+        command_line: typing.List[str],
+        size: ContainerSize,
+        profile_env: typing.Dict[str, str],
+        serves_requests: bool = False,
+    ):
         return ContainerProps(
             name=name,
             image=self._container_image,
@@ -205,25 +339,127 @@ class LocalOfficeSearchApiChart(Chart):
                 ContainerPort(name="http", number=self._HTTP_PORT),
                 ContainerPort(name="metrics", number=self._METRICS_PORT),
             ],
-            env_variables=self._app_env_vars(),
+            env_variables={
+                **self._app_env_vars(),
+                **{key: EnvValue.from_value(value) for key, value in profile_env.items()},
+            },
             readiness=Probe.from_http_get(
                 path="/status",
                 port=self._HTTP_PORT,
-                initial_delay_seconds=Duration.seconds(10),
                 period_seconds=Duration.seconds(10),
                 success_threshold=1,
                 failure_threshold=3,
                 timeout_seconds=Duration.seconds(5),
             ),
-            resources=ContainerResources(
-                cpu=CpuResources(request=Cpu.millis(400), limit=Cpu.millis(800)),
-                memory=MemoryResources(request=Size.mebibytes(512), limit=Size.gibibytes(1)),
+            # /status isn't OK until the server has booted and warmed up (see lib/warm_up.rb),
+            # so this is checked often, letting a new pod take traffic as soon as it is ready,
+            # but allows up to two minutes before the container is restarted
+            startup=(
+                Probe.from_http_get(
+                    path="/status",
+                    port=self._HTTP_PORT,
+                    period_seconds=Duration.seconds(2),
+                    failure_threshold=60,
+                    timeout_seconds=Duration.seconds(2),
+                )
+                if serves_requests
+                else None
             ),
+            resources=self._container_resources(size),
             security_context=ContainerSecurityContextProps(
                 user=1000, read_only_root_filesystem=False
             ),
         )
 
+    def _container_resources(self, size: ContainerSize):
+        return ContainerResources(
+            cpu=CpuResources(
+                request=Cpu.millis(size.cpu_request_millis),
+                limit=Cpu.millis(size.cpu_limit_millis),
+            ),
+            memory=MemoryResources(
+                request=Size.mebibytes(size.memory_request_mib),
+                limit=Size.mebibytes(size.memory_limit_mib),
+            ),
+        )
+
+    def _pooler_container_props(self, pooler: ConnectionPooler):
+        """
+        The PgBouncer sidecar, which pools the server's connections to the writer (as _DB_NAME) and
+        the reader endpoint (as _REPLICA_DB_NAME), and an exporter for its metrics
+        """
+        db_port = str(self._db.cluster_endpoint.port)
+        pooler_env = {
+            "POSTGRESQL_HOST": EnvValue.from_value(self._db.cluster_endpoint.hostname),
+            "POSTGRESQL_PORT": EnvValue.from_value(db_port),
+            "POSTGRESQL_USERNAME": EnvValue.from_value(self._db_username),
+            "POSTGRESQL_PASSWORD": self._db_secret.env_value("DB_PASSWORD"),
+            "POSTGRESQL_DATABASE": EnvValue.from_value(self._DB_NAME),
+            "PGBOUNCER_DATABASE": EnvValue.from_value(self._DB_NAME),
+            "PGBOUNCER_DSN_0": EnvValue.from_value(
+                f"{self._REPLICA_DB_NAME}=host={self._db.cluster_read_endpoint.hostname} "
+                f"port={db_port} dbname={self._DB_NAME}"
+            ),
+            "PGBOUNCER_PORT": EnvValue.from_value(str(self._POOLER_PORT)),
+            "PGBOUNCER_POOL_MODE": EnvValue.from_value(pooler.pool_mode),
+            "PGBOUNCER_DEFAULT_POOL_SIZE": EnvValue.from_value(str(pooler.pool_size)),
+            "PGBOUNCER_MAX_CLIENT_CONN": EnvValue.from_value(
+                str(self._performance_profile.pooler_max_client_connections)
+            ),
+            "PGBOUNCER_STATS_USERS": EnvValue.from_value(self._db_username),
+        }
+        exporter_env = {
+            "PGBOUNCER_USER": EnvValue.from_value(self._db_username),
+            "PGBOUNCER_PASSWORD": self._db_secret.env_value("DB_PASSWORD"),
+        }
+
+        return [
+            ContainerProps(
+                name=f"{self._APP_NAME}-pooler",
+                image=self._POOLER_IMAGE,
+                image_pull_policy=ImagePullPolicy.IF_NOT_PRESENT,
+                ports=[ContainerPort(name="pooler", number=self._POOLER_PORT)],
+                env_variables=pooler_env,
+                readiness=Probe.from_tcp_socket(
+                    port=self._POOLER_PORT, period_seconds=Duration.seconds(10)
+                ),
+                resources=self._container_resources(pooler.size),
+                security_context=ContainerSecurityContextProps(
+                    user=1001, read_only_root_filesystem=False
+                ),
+            ),
+            ContainerProps(
+                name=f"{self._APP_NAME}-pooler-metrics",
+                image=self._POOLER_EXPORTER_IMAGE,
+                image_pull_policy=ImagePullPolicy.IF_NOT_PRESENT,
+                args=[
+                    "--pgBouncer.connectionString=postgres://$(PGBOUNCER_USER):$(PGBOUNCER_PASSWORD)"
+                    f"@127.0.0.1:{self._POOLER_PORT}/pgbouncer?sslmode=disable",
+                    f"--web.listen-address=:{self._POOLER_METRICS_PORT}",
+                ],
+                ports=[ContainerPort(name="pooler-metrics", number=self._POOLER_METRICS_PORT)],
+                env_variables=exporter_env,
+                resources=self._container_resources(
+                    ContainerSize(
+                        cpu_request_millis=10,
+                        cpu_limit_millis=100,
+                        memory_request_mib=16,
+                        memory_limit_mib=32,
+                    )
+                ),
+                security_context=ContainerSecurityContextProps(user=65534),
+            ),
+        ]
+
+    def _pooler_client_env(self) -> typing.Dict[str, str]:
+        # Rails connects to both the writer and the reader through the pooler, over localhost
+        return {
+            "LOCAL_OFFICE_SEARCH_DB_HOST": "127.0.0.1",
+            "LOCAL_OFFICE_SEARCH_DB_READER_HOST": "127.0.0.1",
+            "LOCAL_OFFICE_SEARCH_DB_PORT": str(self._POOLER_PORT),
+            "LOCAL_OFFICE_SEARCH_DB_READER_NAME": self._REPLICA_DB_NAME,
+        }
+
     def _app_env_vars(self):
         return {
             "DD_ENV": EnvValue.from_field_ref(
@@ -236,7 +472,6 @@ class LocalOfficeSearchApiChart(Chart):
                 EnvFieldPaths.POD_LABEL, key="tags.datadoghq.com/version"
             ),
             "DD_AGENT_HOST": EnvValue.from_field_ref(EnvFieldPaths.NODE_IP),
-            "RAILS_MAX_THREADS": EnvValue.from_value("10"),
             "RAILS_ENV": EnvValue.from_value("production"),
             "RACK_ENV": EnvValue.from_value("production"),
             "NODE_ENV": EnvValue.from_value("production"),
@@ -256,10 +491,13 @@ class LocalOfficeSearchApiChart(Chart):
             "LOCAL_OFFICE_SEARCH_DB_HOST": EnvValue.from_value(
                 self._db.cluster_endpoint.hostname
             ),
+            "LOCAL_OFFICE_SEARCH_DB_READER_HOST": EnvValue.from_value(
+                self._db.cluster_read_endpoint.hostname
+            ),
             "LOCAL_OFFICE_SEARCH_DB_PORT": EnvValue.from_value(
                 str(self._db.cluster_endpoint.port)
             ),
-            "LOCAL_OFFICE_SEARCH_DB_NAME": EnvValue.from_value("local_office_search_api"),
+            "LOCAL_OFFICE_SEARCH_DB_NAME": EnvValue.from_value(self._DB_NAME),
         }
 
     def _expose_services(self, deployment: Deployment):
@@ -271,7 +509,10 @@ class LocalOfficeSearchApiChart(Chart):
 
         metrics_service = deployment.expose_via_service(
             name=f"{self._APP_NAME}-metrics",
-            ports=[ServicePort(name="metrics", port=self._METRICS_PORT)],
+            ports=[
+                ServicePort(name="metrics", port=self._METRICS_PORT),
+                *self._pooler_metrics_ports(),
+            ],
         )
         metrics_service.metadata.add_label("custom-metrics-enabled", "true")
 
@@ -316,16 +557,33 @@ class LocalOfficeSearchApiChart(Chart):
         )
 
     def _configure_autoscaler(self, deployment: Deployment):
+        # the proportion of threads busy serving requests
+        metrics = [
+            Metric.pods(
+                name="puma_business",
+                target=MetricTarget.average_value(
+                    self._performance_profile.target_busy_threads
+                ),
+            )
+        ]
+        if self._performance_profile.target_p95_latency_seconds is not None:
+            # the HPA scales on whichever metric needs the most replicas
+            metrics.append(
+                Metric.pods(
+                    name=self._LATENCY_METRIC,
+                    target=MetricTarget.average_value(
+                        self._performance_profile.target_p95_latency_seconds
+                    ),
+                )
+            )
+
         HorizontalPodAutoscaler(
             self,
             "Autoscaler",
             target=deployment,
-            min_replicas=2,
-            max_replicas=4,
-            # 75% of threads busy serving requests
-            metrics=[
-                Metric.pods(name="puma_business", target=MetricTarget.average_value(0.75))
-            ],
+            min_replicas=self._performance_profile.min_replicas,
+            max_replicas=self._performance_profile.max_replicas,
+            metrics=metrics,
         )
 
     def _allow_external_traffic(self):
@@ -361,12 +619,23 @@ class LocalOfficeSearchApiChart(Chart):
                                 )
                             ],
                         ),
-                        ports=[NetworkPolicyPort.of(port=self._METRICS_PORT)],
+                        ports=[
+                            NetworkPolicyPort.of(port=self._METRICS_PORT),
+                            *(
+                                NetworkPolicyPort.of(port=port.port)
+                                for port in self._pooler_metrics_ports()
+                            ),
+                        ],
                     )
                 ]
             ),
         )
 
+    def _pooler_metrics_ports(self):
+        if not self._performance_profile.connection_pooler:
+            return []
+        return [ServicePort(name="pooler-metrics", port=self._POOLER_METRICS_PORT)]
+
     def _add_labels(self, metadata: ApiObjectMetadataDefinition):
         for key, value in self._labels.items():
             metadata.add_label(key, value)
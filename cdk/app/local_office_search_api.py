@@ -15,6 +15,7 @@ from cdk8s import App
 from ca_cdk_constructs.eks.eks_cluster_integration import EksClusterIntegration
 
 from .chart import LocalOfficeSearchApiChart
+from .performance_profile import PerformanceProfile
 
 
 class LocalOfficeSearchApiDeployment(Stack):
@@ -30,6 +31,7 @@ class LocalOfficeSearchApiDeployment(Stack):
         geo_data_postcode_file: str,
         api_v0_host: str,
         api_v0_cert_arn: str,
+        performance_profile: PerformanceProfile,
         **kwargs,
     ) -> None:
         super().__init__(scope, construct_id, **kwargs)
@@ -146,5 +148,6 @@ class LocalOfficeSearchApiDeployment(Stack):
                 app_secret_name=app_secret_source.k8s_secret_name,
                 api_v0_host=api_v0_host,
                 api_v0_cert_arn=api_v0_cert_arn,
+                performance_profile=performance_profile,
             ),
         )
@@ -0,0 +1,161 @@
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class ContainerSize:
+    cpu_request_millis: int
+    cpu_limit_millis: int
+    memory_request_mib: int
+    memory_limit_mib: int
+
+    def __post_init__(self):
+        if self.cpu_request_millis > self.cpu_limit_millis:
+            raise ValueError("CPU request must not be more than the CPU limit")
+        if self.memory_request_mib > self.memory_limit_mib:
+            raise ValueError("memory request must not be more than the memory limit")
+
+
+@dataclass(frozen=True)
+class ConnectionPooler:
+    """
+    A PgBouncer sidecar in each server pod, which Rails connects to instead of the database. In
+    transaction mode the pooler only holds a database connection while a transaction is running, so
+    the pod needs far fewer connections than it has Puma threads.
+    """
+
+    pool_size: int
+    pool_mode: str = "transaction"
+    size: ContainerSize = ContainerSize(
+        cpu_request_millis=50, cpu_limit_millis=250, memory_request_mib=32, memory_limit_mib=64
+    )
+
+    POOL_MODES = ("session", "transaction")
+
+    def __post_init__(self):
+        if self.pool_size < 1:
+            raise ValueError("the connection pool needs at least one connection")
+        if self.pool_mode not in self.POOL_MODES:
+            raise ValueError(f"pool mode must be one of {', '.join(self.POOL_MODES)}")
+
+    @property
+    def transaction_pooling(self) -> bool:
+        return self.pool_mode == "transaction"
+
+
+@dataclass(frozen=True)
+class PerformanceProfile:
+    """
+    How much capacity a stage runs with. Everything which depends on the number of Puma processes
+    and threads (the database pool, container sizes and autoscaling) is derived from or checked
+    against this, so the settings can't drift apart.
+    """
+
+    puma_workers: int
+    puma_threads: int
+    server: ContainerSize
+    # the postcode import, which parses the whole ONS Postcode Directory
+    import_job: ContainerSize
+    min_replicas: int
+    max_replicas: int
+    # the proportion of Puma threads busy serving requests that the autoscaler aims for
+    target_busy_threads: float = 0.75
+    connection_pooler: Optional[ConnectionPooler] = None
+    # if set, the autoscaler also adds replicas when the p95 request latency is above this
+    target_p95_latency_seconds: Optional[float] = None
+    # the LSS import, which is far smaller than the postcode import; the same size if not set
+    lss_import_job: Optional[ContainerSize] = None
+
+    # roughly what each Puma process needs once the app is booted
+    MIN_MEMORY_PER_PROCESS_MIB = 256
+    # the postcode and LSS imports, which can run at the same time
+    IMPORT_JOBS = 2
+    # the statement metrics exporter, which needs one connection to each database instance
+    STATEMENT_METRICS_EXPORTERS = 1
+
+    def __post_init__(self):
+        if self.puma_workers < 0:
+            raise ValueError("Puma workers must not be negative")
+        if self.puma_threads < 1:
+            raise ValueError("Puma needs at least one thread")
+        if not 1 <= self.min_replicas <= self.max_replicas:
+            raise ValueError("replicas must be at least 1, and min_replicas <= max_replicas")
+        if not 0 < self.target_busy_threads <= 1:
+            raise ValueError("target_busy_threads must be a proportion of the threads")
+        if self.target_p95_latency_seconds is not None and self.target_p95_latency_seconds <= 0:
+            raise ValueError("target_p95_latency_seconds must be positive")
+        if self.server.memory_request_mib < self.puma_processes * self.MIN_MEMORY_PER_PROCESS_MIB:
+            raise ValueError(
+                f"{self.server.memory_request_mib}Mi is not enough memory for "
+                f"{self.puma_processes} Puma processes"
+            )
+
+    @property
+    def puma_processes(self) -> int:
+        # with no workers Puma runs in single mode, in one process
+        return max(self.puma_workers, 1)
+
+    @property
+    def db_pool_size(self) -> int:
+        # each Puma process needs a connection for each of its threads
+        return self.puma_threads
+
+    @property
+    def max_db_connections(self) -> int:
+        # each import job and the statement metrics exporter only ever use a single connection,
+        # and don't go through the pooler
+        return (
+            self.max_replicas * self.db_connections_per_pod
+            + self.IMPORT_JOBS
+            + self.STATEMENT_METRICS_EXPORTERS
+        )
+
+    @property
+    def db_connections_per_pod(self) -> int:
+        if self.connection_pooler:
+            return self.connection_pooler.pool_size
+        return self.puma_processes * self.db_pool_size
+
+    @property
+    def postcode_parser_workers(self) -> int:
+        return max(self.import_job.cpu_limit_millis // 1000, 1)
+
+    @property
+    def pooler_max_client_connections(self) -> int:
+        # Rails keeps a separate connection pool for each of the writing and reading roles
+        return 2 * self.puma_processes * self.db_pool_size
+
+    def server_env(self) -> dict[str, str]:
+        env = {
+            "WEB_CONCURRENCY": str(self.puma_workers),
+            "RAILS_MAX_THREADS": str(self.puma_threads),
+            "DB_POOL": str(self.db_pool_size),
+        }
+        if self.connection_pooler and self.connection_pooler.transaction_pooling:
+            # turns off prepared statements and advisory locks (see config/database.yml)
+            env["DB_TRANSACTION_POOLING"] = "true"
+        return env
+
+    @property
+    def lss_import_job_size(self) -> ContainerSize:
+        return self.lss_import_job or self.import_job
+
+    def import_job_env(self) -> dict[str, str]:
+        return {
+            **self.lss_import_job_env(),
+            "POSTCODE_PARSER_WORKERS": str(self.postcode_parser_workers),
+        }
+
+    def lss_import_job_env(self) -> dict[str, str]:
+        return self.single_connection_env()
+
+    def statement_metrics_env(self) -> dict[str, str]:
+        return self.single_connection_env()
+
+    @staticmethod
+    def single_connection_env() -> dict[str, str]:
+        return {
+            "WEB_CONCURRENCY": "0",
+            "RAILS_MAX_THREADS": "1",
+            "DB_POOL": "1",
+        }
@@ -21,14 +21,23 @@ from aws_cdk.aws_rds import (
 )
 from constructs import Construct
 
+from .db_parameters import DatabaseParameters
+
 
 class LocalOfficeSearchDatabase(Stack):
-    def __init__(self, scope: Construct, construct_id: str, **kwargs) -> None:
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        reader_instances: int = 0,
+        parameters: DatabaseParameters = DatabaseParameters(),
+        **kwargs,
+    ) -> None:
         super().__init__(scope, construct_id, **kwargs)
 
-        self.db = self._create_postgres_database()
+        self.db = self._create_postgres_database(reader_instances, parameters)
 
-    def _create_postgres_database(self):
+    def _create_postgres_database(self, reader_instances: int, parameters: DatabaseParameters):
         sg = SecurityGroup(self, "ClusterSecurityGroup", vpc=self._vpc)
         self.db_credentials = Credentials.from_generated_secret(
             "local_office_search_api",
@@ -47,7 +56,12 @@ class LocalOfficeSearchDatabase(Stack):
             copy_tags_to_snapshot=True,
             credentials=self.db_credentials,
             default_database_name="local_office_search_api",
-            parameter_group=ParameterGroup(self, "ClusterParameterGroup", engine=engine),
+            parameter_group=ParameterGroup(
+                self,
+                "ClusterParameterGroup",
+                engine=engine,
+                parameters=parameters.parameters(),
+            ),
             monitoring_interval=Duration.seconds(30),
             storage_encrypted=True,
             security_groups=[sg],
@@ -61,6 +75,17 @@ class LocalOfficeSearchDatabase(Stack):
                 preferred_maintenance_window="sat:06:00-sat:08:00",
                 publicly_accessible=False,
             ),
+            # the API reads from these (through the cluster's reader endpoint), leaving the writer
+            # free for the sync job
+            readers=[
+                ClusterInstance.provisioned(
+                    f"DbReader{n}",
+                    instance_type=InstanceType("t3.medium"),
+                    auto_minor_version_upgrade=True,
+                    publicly_accessible=False,
+                )
+                for n in range(1, reader_instances + 1)
+            ],
         )
 
         for private_subnet in self._vpc.private_subnets:
@@ -0,0 +1,71 @@
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class DatabaseParameters:
+    """
+    The settings of a stage's Aurora cluster parameter group.
+
+    pg_stat_statements records how often each statement runs and how long it takes, which the
+    app exports as metrics, and auto_explain logs the plan of any statement slower than a
+    threshold. maintenance_work_mem is sized for building the indexes of the sync's new tables,
+    and the autovacuum settings are for tables which are loaded in bulk daily, then only read.
+    """
+
+    work_mem_mib: int = 16
+    maintenance_work_mem_mib: int = 512
+    # statements slower than this have their plan logged, or none if not set
+    auto_explain_min_duration_ms: Optional[int] = 500
+    # whether logged plans include actual timings, which adds overhead to every statement
+    auto_explain_analyze: bool = False
+    # how many distinct statements pg_stat_statements keeps statistics for
+    statement_statistics_max: int = 5000
+    autovacuum_vacuum_cost_limit: int = 2000
+    autovacuum_vacuum_insert_scale_factor: float = 0.05
+    autovacuum_analyze_scale_factor: float = 0.02
+
+    SCALE_FACTORS = (
+        "autovacuum_vacuum_insert_scale_factor",
+        "autovacuum_analyze_scale_factor",
+    )
+
+    def __post_init__(self):
+        if self.work_mem_mib < 1:
+            raise ValueError("work_mem must be at least 1MiB")
+        if not self.work_mem_mib <= self.maintenance_work_mem_mib <= 2047:
+            raise ValueError(
+                "maintenance_work_mem must be at least work_mem, and at most 2047MiB "
+                "(the most Postgres allows)"
+            )
+        if (self.auto_explain_min_duration_ms or 0) < 0:
+            raise ValueError("auto_explain_min_duration_ms must not be negative")
+        if self.statement_statistics_max < 100:
+            raise ValueError("pg_stat_statements needs to keep at least 100 statements")
+        for name in self.SCALE_FACTORS:
+            if not 0 < getattr(self, name) <= 1:
+                raise ValueError(f"{name} must be a proportion of the table")
+
+    def parameters(self) -> dict[str, str]:
+        return {
+            "shared_preload_libraries": "pg_stat_statements,auto_explain",
+            "pg_stat_statements.track": "top",
+            "pg_stat_statements.max": str(self.statement_statistics_max),
+            "track_io_timing": "1",
+            # -1 turns auto_explain off
+            "auto_explain.log_min_duration": str(
+                -1
+                if self.auto_explain_min_duration_ms is None
+                else self.auto_explain_min_duration_ms
+            ),
+            "auto_explain.log_analyze": "1" if self.auto_explain_analyze else "0",
+            "auto_explain.log_format": "json",
+            # memory settings are in kB
+            "work_mem": str(self.work_mem_mib * 1024),
+            "maintenance_work_mem": str(self.maintenance_work_mem_mib * 1024),
+            "autovacuum_vacuum_cost_limit": str(self.autovacuum_vacuum_cost_limit),
+            "autovacuum_vacuum_insert_scale_factor": str(
+                self.autovacuum_vacuum_insert_scale_factor
+            ),
+            "autovacuum_analyze_scale_factor": str(self.autovacuum_analyze_scale_factor),
+        }
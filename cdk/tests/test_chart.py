@@ -0,0 +1,243 @@
+import pytest
+from aws_cdk import App as CdkApp, Stack
+from aws_cdk.aws_ecr import Repository
+from aws_cdk.aws_rds import Credentials, DatabaseCluster
+from aws_cdk.aws_s3 import Bucket
+from cdk8s import Testing
+
+from app.chart import LocalOfficeSearchApiChart
+from app.performance_profile import ConnectionPooler, ContainerSize
+from tests.test_performance_profile import profile
+
+
+def synth_chart(performance_profile):
+    stack = Stack(CdkApp(), "TestStack")
+    chart = LocalOfficeSearchApiChart(
+        Testing.app(),
+        "TestChart",
+        env="test",
+        namespace="test-local-office-search-api",
+        image_repo=Repository.from_repository_name(stack, "Repo", "local-office-search-api"),
+        image_version="test",
+        db=DatabaseCluster.from_database_cluster_attributes(
+            stack,
+            "Db",
+            cluster_identifier="test",
+            cluster_endpoint_address="db.example.com",
+            reader_endpoint_address="db-ro.example.com",
+            port=5432,
+        ),
+        db_credentials=Credentials.from_username("local_office_search_api"),
+        lss_data_bucket=Bucket.from_bucket_name(stack, "LssBucket", "lss-bucket"),
+        geo_data_bucket=Bucket.from_bucket_name(stack, "GeoDataBucket", "geo-data-bucket"),
+        geo_data_postcode_file="postcodes.csv",
+        service_account_name="local-office-search-api",
+        rds_secret_name="local-office-search-db",
+        app_secret_name="local-office-search-app",
+        api_v0_host="bureaudetails.example.com",
+        api_v0_cert_arn="arn:aws:acm:eu-west-1:000000000000:certificate/test",
+        performance_profile=performance_profile,
+    )
+    return Testing.synth(chart)
+
+
+def manifest(manifests, kind):
+    return next(m for m in manifests if m["kind"] == kind)
+
+
+def server_container(manifests):
+    return manifest(manifests, "Deployment")["spec"]["template"]["spec"]["containers"][0]
+
+
+def import_container(manifests, source="postcode"):
+    containers = [
+        m["spec"]["jobTemplate"]["spec"]["template"]["spec"]["containers"][0]
+        for m in manifests
+        if m["kind"] == "CronJob"
+    ]
+    name = f"local-office-search-api-{source}-import"
+    return next(container for container in containers if container["name"] == name)
+
+
+def env(container):
+    return {var["name"]: var.get("value") for var in container["env"]}
+
+
+@pytest.fixture(name="manifests")
+def manifests_fixture():
+    return synth_chart(profile())
+
+
+def test_server_runs_puma_with_a_db_connection_per_thread(manifests):
+    server_env = env(server_container(manifests))
+
+    assert server_env["WEB_CONCURRENCY"] == "2"
+    assert server_env["RAILS_MAX_THREADS"] == "5"
+    assert server_env["DB_POOL"] == server_env["RAILS_MAX_THREADS"]
+
+
+def test_server_and_import_job_are_sized_separately(manifests):
+    assert server_container(manifests)["resources"] == {
+        "requests": {"cpu": "500m", "memory": "1024Mi"},
+        "limits": {"cpu": "1000m", "memory": "1536Mi"},
+    }
+    assert import_container(manifests)["resources"] == {
+        "requests": {"cpu": "2000m", "memory": "2048Mi"},
+        "limits": {"cpu": "4000m", "memory": "3072Mi"},
+    }
+
+
+def test_import_job_parses_postcodes_with_a_worker_per_cpu(manifests):
+    import_env = env(import_container(manifests))
+
+    assert import_env["POSTCODE_PARSER_WORKERS"] == "4"
+    assert import_env["DB_POOL"] == "1"
+
+
+def test_app_is_given_the_writer_and_reader_endpoints(manifests):
+    server_env = env(server_container(manifests))
+
+    assert server_env["LOCAL_OFFICE_SEARCH_DB_HOST"] == "db.example.com"
+    assert server_env["LOCAL_OFFICE_SEARCH_DB_READER_HOST"] == "db-ro.example.com"
+
+
+def test_autoscaler_uses_the_profile_bounds_and_target(manifests):
+    autoscaler = manifest(manifests, "HorizontalPodAutoscaler")["spec"]
+
+    assert (autoscaler["minReplicas"], autoscaler["maxReplicas"]) == (2, 6)
+    assert float(autoscaler["metrics"][0]["pods"]["target"]["averageValue"]) == 0.75
+
+
+def test_autoscaler_only_targets_latency_when_configured(manifests):
+    autoscaler = manifest(manifests, "HorizontalPodAutoscaler")["spec"]
+    latency_autoscaler = manifest(
+        synth_chart(profile(target_p95_latency_seconds=0.5)), "HorizontalPodAutoscaler"
+    )["spec"]
+    metric_names = [metric["pods"]["metric"]["name"] for metric in autoscaler["metrics"]]
+
+    assert metric_names == ["puma_business"]
+    assert latency_autoscaler["metrics"][1]["pods"]["metric"]["name"] == (
+        "rails_request_duration_seconds_p95"
+    )
+    assert float(latency_autoscaler["metrics"][1]["pods"]["target"]["averageValue"]) == 0.5
+
+
+def test_every_setting_follows_the_profile():
+    manifests = synth_chart(profile(puma_workers=1, puma_threads=3, max_replicas=3))
+    server_env = env(server_container(manifests))
+    autoscaler = manifest(manifests, "HorizontalPodAutoscaler")["spec"]
+
+    assert (server_env["WEB_CONCURRENCY"], server_env["RAILS_MAX_THREADS"]) == ("1", "3")
+    assert server_env["DB_POOL"] == "3"
+    assert autoscaler["maxReplicas"] == 3
+
+
+def test_pooler_sidecar_is_only_added_when_configured(manifests):
+    containers = manifest(manifests, "Deployment")["spec"]["template"]["spec"]["containers"]
+
+    assert [container["name"] for container in containers] == ["local-office-search-api-server"]
+
+
+def test_server_connects_through_the_pooler_sidecar():
+    manifests = synth_chart(profile(connection_pooler=ConnectionPooler(pool_size=4)))
+    containers = {
+        container["name"]: container
+        for container in manifest(manifests, "Deployment")["spec"]["template"]["spec"]["containers"]
+    }
+    server_env = env(containers["local-office-search-api-server"])
+    pooler_env = env(containers["local-office-search-api-pooler"])
+
+    assert (server_env["LOCAL_OFFICE_SEARCH_DB_HOST"], server_env["LOCAL_OFFICE_SEARCH_DB_PORT"]) == (
+        "127.0.0.1",
+        "6432",
+    )
+    assert server_env["DB_TRANSACTION_POOLING"] == "true"
+    assert pooler_env["POSTGRESQL_HOST"] == "db.example.com"
+    assert "host=db-ro.example.com" in pooler_env["PGBOUNCER_DSN_0"]
+    assert (pooler_env["PGBOUNCER_POOL_MODE"], pooler_env["PGBOUNCER_DEFAULT_POOL_SIZE"]) == (
+        "transaction",
+        "4",
+    )
+    assert pooler_env["PGBOUNCER_MAX_CLIENT_CONN"] == "20"
+
+
+def test_pooler_metrics_are_exposed_alongside_the_app_metrics():
+    manifests = synth_chart(profile(connection_pooler=ConnectionPooler(pool_size=4)))
+    metrics_service = next(
+        m
+        for m in manifests
+        if m["kind"] == "Service" and m["metadata"]["name"] == "local-office-search-api-metrics"
+    )
+
+    assert [port["port"] for port in metrics_service["spec"]["ports"]] == [9394, 9127]
+
+
+def test_server_is_only_ready_once_it_has_started_and_warmed_up(manifests):
+    server = server_container(manifests)
+    startup_probe = server["startupProbe"]
+
+    assert startup_probe["httpGet"]["path"] == "/status"
+    assert startup_probe["periodSeconds"] * startup_probe["failureThreshold"] == 120
+    assert "initialDelaySeconds" not in server["readinessProbe"]
+    assert "startupProbe" not in import_container(manifests)
+
+
+def test_server_builds_the_postcode_index_into_a_pod_volume(manifests):
+    pod_spec = manifest(manifests, "Deployment")["spec"]["template"]["spec"]
+    server = server_container(manifests)
+    server_env = env(server)
+
+    assert server_env["POSTCODE_INDEX_BUILD"] == "true"
+    volume = {"name": "postcode-index", "emptyDir": {"sizeLimit": "256Mi"}}
+    assert volume in pod_spec["volumes"]
+    mount = next(m for m in server["volumeMounts"] if m["name"] == "postcode-index")
+    assert mount["mountPath"] == server_env["POSTCODE_INDEX_DIR"]
+    assert "POSTCODE_INDEX_DIR" not in env(import_container(manifests))
+
+
+def test_statement_metrics_are_exported_by_a_single_pod(manifests):
+    exporter = next(
+        m
+        for m in manifests
+        if m["kind"] == "Deployment"
+        and m["spec"]["template"]["spec"]["containers"][0]["name"]
+        == "local-office-search-api-statement-metrics"
+    )
+    container = exporter["spec"]["template"]["spec"]["containers"][0]
+    metrics_services = [
+        m
+        for m in manifests
+        if m["kind"] == "Service" and m["metadata"]["labels"].get("custom-metrics-enabled")
+    ]
+
+    assert exporter["spec"]["replicas"] == 1
+    assert container["args"] == ["bin/rake", "statement_metrics:serve"]
+    assert env(container)["DB_POOL"] == "1"
+    assert [s["metadata"]["name"] for s in metrics_services] == [
+        "local-office-search-api-metrics",
+        "local-office-search-api-statement-metrics",
+    ]
+
+
+def test_each_source_is_imported_by_its_own_job(manifests):
+    jobs = {
+        m["spec"]["jobTemplate"]["spec"]["template"]["spec"]["containers"][0]["args"][-1]: m["spec"]
+        for m in manifests
+        if m["kind"] == "CronJob"
+    }
+
+    assert jobs.keys() == {"sync_database:postcodes", "sync_database:lss"}
+    assert jobs["sync_database:postcodes"]["schedule"] == "55 9 * * *"
+    assert jobs["sync_database:lss"]["schedule"] == "*/15 * * * *"
+    assert all(job["concurrencyPolicy"] == "Forbid" for job in jobs.values())
+
+
+def test_lss_import_is_sized_separately():
+    lss_import_job = ContainerSize(
+        cpu_request_millis=250, cpu_limit_millis=1000, memory_request_mib=512, memory_limit_mib=1024
+    )
+    manifests = synth_chart(profile(lss_import_job=lss_import_job))
+    lss_import = import_container(manifests, "lss")
+
+    assert lss_import["resources"]["limits"] == {"cpu": "1000m", "memory": "1024Mi"}
+    assert "POSTCODE_PARSER_WORKERS" not in env(lss_import)
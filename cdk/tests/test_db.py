@@ -0,0 +1,49 @@
+from aws_cdk import App, Environment
+from aws_cdk.assertions import Match, Template
+
+from infrastructure.db import LocalOfficeSearchDatabase
+from infrastructure.db_parameters import DatabaseParameters
+
+
+def synth_db(parameters):
+    stack = LocalOfficeSearchDatabase(
+        App(),
+        "TestDb",
+        parameters=parameters,
+        env=Environment(account="000000000000", region="eu-west-1"),
+    )
+    return Template.from_stack(stack)
+
+
+def test_cluster_parameter_group_has_the_stage_parameters():
+    template = synth_db(
+        DatabaseParameters(
+            work_mem_mib=8, maintenance_work_mem_mib=256, auto_explain_min_duration_ms=250
+        )
+    )
+
+    template.has_resource_properties(
+        "AWS::RDS::DBClusterParameterGroup",
+        {
+            "Parameters": Match.object_like(
+                {
+                    "shared_preload_libraries": "pg_stat_statements,auto_explain",
+                    "pg_stat_statements.track": "top",
+                    "auto_explain.log_min_duration": "250",
+                    "work_mem": "8192",
+                    "maintenance_work_mem": "262144",
+                    "autovacuum_vacuum_insert_scale_factor": "0.05",
+                }
+            )
+        },
+    )
+
+
+def test_cluster_uses_the_parameter_group():
+    template = synth_db(DatabaseParameters())
+    parameter_group = template.find_resources("AWS::RDS::DBClusterParameterGroup")
+
+    template.has_resource_properties(
+        "AWS::RDS::DBCluster",
+        {"DBClusterParameterGroupName": {"Ref": next(iter(parameter_group))}},
+    )
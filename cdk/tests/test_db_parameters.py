@@ -0,0 +1,39 @@
+import pytest
+
+from infrastructure.db_parameters import DatabaseParameters
+
+
+def test_statement_statistics_and_slow_plans_are_recorded():
+    parameters = DatabaseParameters(auto_explain_min_duration_ms=250).parameters()
+
+    assert parameters["shared_preload_libraries"] == "pg_stat_statements,auto_explain"
+    assert parameters["pg_stat_statements.track"] == "top"
+    assert parameters["auto_explain.log_min_duration"] == "250"
+    assert parameters["auto_explain.log_analyze"] == "0"
+
+
+def test_auto_explain_can_be_turned_off():
+    parameters = DatabaseParameters(auto_explain_min_duration_ms=None).parameters()
+
+    assert parameters["auto_explain.log_min_duration"] == "-1"
+
+
+def test_memory_is_given_in_kilobytes():
+    parameters = DatabaseParameters(work_mem_mib=8, maintenance_work_mem_mib=256).parameters()
+
+    assert (parameters["work_mem"], parameters["maintenance_work_mem"]) == ("8192", "262144")
+
+
+def test_rejects_less_maintenance_work_mem_than_work_mem():
+    with pytest.raises(ValueError):
+        DatabaseParameters(work_mem_mib=64, maintenance_work_mem_mib=32)
+
+
+def test_rejects_more_maintenance_work_mem_than_postgres_allows():
+    with pytest.raises(ValueError):
+        DatabaseParameters(maintenance_work_mem_mib=4096)
+
+
+def test_rejects_scale_factors_which_are_not_proportions():
+    with pytest.raises(ValueError):
+        DatabaseParameters(autovacuum_analyze_scale_factor=0)
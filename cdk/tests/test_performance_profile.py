@@ -0,0 +1,104 @@
+import pytest
+
+from app.performance_profile import ConnectionPooler, ContainerSize, PerformanceProfile
+
+SERVER = ContainerSize(
+    cpu_request_millis=500, cpu_limit_millis=1000, memory_request_mib=1024, memory_limit_mib=1536
+)
+IMPORT_JOB = ContainerSize(
+    cpu_request_millis=2000, cpu_limit_millis=4000, memory_request_mib=2048, memory_limit_mib=3072
+)
+
+
+def profile(**overrides):
+    return PerformanceProfile(
+        **{
+            "puma_workers": 2,
+            "puma_threads": 5,
+            "server": SERVER,
+            "import_job": IMPORT_JOB,
+            "min_replicas": 2,
+            "max_replicas": 6,
+            **overrides,
+        }
+    )
+
+
+def test_db_pool_matches_puma_threads():
+    assert profile(puma_threads=8).db_pool_size == 8
+
+
+def test_max_db_connections_covers_every_thread_at_max_replicas_imports_and_exporter():
+    assert profile().max_db_connections == 6 * 2 * 5 + 2 + 1
+
+
+def test_single_mode_puma_counts_as_one_process():
+    assert profile(puma_workers=0).max_db_connections == 6 * 1 * 5 + 2 + 1
+
+
+def test_server_env_is_consistent():
+    assert profile().server_env() == {
+        "WEB_CONCURRENCY": "2",
+        "RAILS_MAX_THREADS": "5",
+        "DB_POOL": "5",
+    }
+
+
+def test_pooler_bounds_db_connections_by_its_pool_size():
+    assert profile(connection_pooler=ConnectionPooler(pool_size=4)).max_db_connections == 6 * 4 + 2 + 1
+
+
+def test_pooler_accepts_a_connection_from_each_pool_of_each_process():
+    assert profile(connection_pooler=ConnectionPooler(pool_size=4)).pooler_max_client_connections == 2 * 2 * 5
+
+
+def test_transaction_pooling_turns_off_session_features():
+    pooled = profile(connection_pooler=ConnectionPooler(pool_size=4))
+    session_pooled = profile(connection_pooler=ConnectionPooler(pool_size=4, pool_mode="session"))
+
+    assert pooled.server_env()["DB_TRANSACTION_POOLING"] == "true"
+    assert "DB_TRANSACTION_POOLING" not in session_pooled.server_env()
+
+
+def test_rejects_unknown_pool_modes():
+    with pytest.raises(ValueError):
+        ConnectionPooler(pool_size=4, pool_mode="statement")
+
+
+def test_postcode_parser_uses_a_worker_per_cpu_of_the_import_job():
+    assert profile().import_job_env()["POSTCODE_PARSER_WORKERS"] == "4"
+
+
+def test_lss_import_job_is_the_size_of_the_postcode_import_unless_set():
+    lss_import_job = ContainerSize(
+        cpu_request_millis=250, cpu_limit_millis=1000, memory_request_mib=512, memory_limit_mib=1024
+    )
+
+    assert profile().lss_import_job_size == IMPORT_JOB
+    assert profile(lss_import_job=lss_import_job).lss_import_job_size == lss_import_job
+    assert "POSTCODE_PARSER_WORKERS" not in profile().lss_import_job_env()
+
+
+def test_rejects_a_latency_target_which_is_not_positive():
+    with pytest.raises(ValueError):
+        profile(target_p95_latency_seconds=0)
+
+
+def test_rejects_requests_above_limits():
+    with pytest.raises(ValueError):
+        ContainerSize(
+            cpu_request_millis=1000,
+            cpu_limit_millis=500,
+            memory_request_mib=512,
+            memory_limit_mib=512,
+        )
+
+
+def test_rejects_min_replicas_above_max_replicas():
+    with pytest.raises(ValueError):
+        profile(min_replicas=4, max_replicas=2)
+
+
+def test_rejects_too_little_memory_for_puma_workers():
+    with pytest.raises(ValueError):
+        profile(puma_workers=8)
@@ -33,6 +33,50 @@ module LocalOfficeSearchApi
     config.geo_data_bucket = ENV.fetch("GEO_DATA_BUCKET", nil)
     config.geo_data_postcodes_file = ENV.fetch("GEO_DATA_POSTCODES_FILE", nil)
 
+    # A directory to read the data from instead of S3, with a subdirectory for each bucket
+    config.sync_source_dir = ENV.fetch("SYNC_SOURCE_DIR", nil)
+
+    # How many objects (or parts of large objects) are downloaded from S3 at once
+    config.s3_fetch_threads = ENV.fetch("S3_FETCH_THREADS", 8).to_i
+
+    # The number of processes used to parse the postcodes file, defaults to the number of CPUs
+    config.postcode_parser_workers = ENV.fetch("POSTCODE_PARSER_WORKERS", nil)&.to_i
+
+    # Where the postcode index used for exact postcode lookups is kept, if not set then postcodes are
+    # always looked up in the database
+    config.postcode_index_dir = ENV.fetch("POSTCODE_INDEX_DIR", nil)
+    # Whether the API builds the postcode index itself, when it warms up and whenever the postcodes
+    # have been synced, rather than only using one written by the sync
+    config.postcode_index_build = ENV.fetch("POSTCODE_INDEX_BUILD", "false") == "true"
+
+    # How long (in seconds) API responses can be cached for, and how often each process checks if the
+    # data has been synced since (which changes the ETag of every response)
+    config.v0_cache_max_age = ENV.fetch("V0_CACHE_MAX_AGE", 300).to_i
+    config.v2_cache_max_age = ENV.fetch("V2_CACHE_MAX_AGE", 300).to_i
+    config.data_generation_check_interval = ENV.fetch("DATA_GENERATION_CHECK_INTERVAL", 30).to_i
+
+    # The database replica which API requests read from, if there is one (see config/database.yml)
+    config.database_reader_host = ENV.fetch("LOCAL_OFFICE_SEARCH_DB_READER_HOST", nil)
+
+    # Whether the sync precomputes the results of exact postcode searches, and the most rows and
+    # time (in seconds) that can take before giving up
+    config.precompute_search_results = ENV.fetch("PRECOMPUTE_SEARCH_RESULTS", "false") == "true"
+    config.search_results_max_rows = ENV.fetch("SEARCH_RESULTS_MAX_ROWS", 1_000_000).to_i
+    config.search_results_timeout = ENV.fetch("SEARCH_RESULTS_TIMEOUT", 600).to_i
+
+    # Where the sync writes a JSON summary of how long each stage took, and the Prometheus push
+    # gateway it sends the same figures to, neither of which happen if not set
+    config.import_profile_path = ENV.fetch("IMPORT_PROFILE_PATH", nil)
+    config.import_metrics_push_gateway = ENV.fetch("PROMETHEUS_PUSH_GATEWAY_URL", nil)
+
+    # How many of the statements which have taken the most database time are exported as metrics
+    # (none if 0), and how often (in seconds) their statistics are read
+    config.statement_metrics_limit = ENV.fetch("STATEMENT_METRICS_LIMIT", 20).to_i
+    config.statement_metrics_interval = ENV.fetch("STATEMENT_METRICS_INTERVAL", 60).to_i
+
+    # Whether each server process warms up before /status reports it as ready (see lib/warm_up.rb)
+    config.warm_up = ENV.fetch("WARM_UP", "true") == "true"
+
     # Set tags for logs, including Datadog trace info
     # This needs to be set here because the logger is already initialized by the
     # time we get to the initializers
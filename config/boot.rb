@@ -1,5 +1,8 @@
 # frozen_string_literal: true
 
+# when the process started booting, which time-to-ready is measured from (see lib/warm_up.rb)
+BOOT_STARTED_AT = Process.clock_gettime(Process::CLOCK_MONOTONIC)
+
 ENV["BUNDLE_GEMFILE"] ||= File.expand_path("../Gemfile", __dir__)
 
 require "bundler/setup" # Set up gems listed in the Gemfile.
@@ -29,6 +29,15 @@ Rails.application.configure do
   config.action_controller.perform_caching = false
   config.cache_store = :null_store
 
+  # Always check for the current data generation, as each test creates its own.
+  config.data_generation_check_interval = 0
+
+  # Read statement statistics whenever they're collected.
+  config.statement_metrics_interval = 0
+
+  # Tests don't run under Puma, so nothing would warm up and /status would never be ready.
+  config.warm_up = false
+
   # Raise exceptions instead of rendering exception templates.
   config.action_dispatch.show_exceptions = false
 
@@ -0,0 +1,35 @@
+# frozen_string_literal: true
+
+# Metrics for the hot paths of the API, exported along with the Rails and Puma metrics on the
+# metrics port. yabeda-rails already measures the total time of each request.
+Yabeda.configure do
+  group :office_search do
+    histogram :phase_duration,
+              comment: "Time taken by each phase of an office search",
+              unit: :seconds,
+              tags: %i[phase],
+              buckets: [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1]
+
+    counter :outcomes_total,
+            comment: "Office searches by how the location was matched",
+            tags: %i[match_type]
+  end
+
+  group :api do
+    histogram :serialisation_duration,
+              comment: "Time taken to build the response body for each request",
+              unit: :seconds,
+              tags: %i[endpoint match_type],
+              buckets: [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1]
+
+    histogram :sql_queries,
+              comment: "SQL queries made by each request",
+              tags: %i[endpoint match_type],
+              buckets: [0, 1, 2, 3, 4, 6, 8, 12, 16, 24, 32]
+  end
+end
+
+# counted per request by RequestMetrics
+ActiveSupport::Notifications.subscribe("sql.active_record") do |_name, _start, _finish, _id, payload|
+  RequestMetrics.count_query(payload)
+end
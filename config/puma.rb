@@ -32,14 +32,33 @@ pidfile ENV.fetch("PIDFILE", "tmp/pids/server.pid")
 # Workers do not work on JRuby or Windows (both of which do not support
 # processes).
 #
-# workers ENV.fetch("WEB_CONCURRENCY") { 2 }
+# This is set for each stage by the performance profile in the CDK app. With
+# 0 (the default), Puma runs in single mode.
+#
+worker_count = ENV.fetch("WEB_CONCURRENCY", 0).to_i
+workers worker_count
 
 # Use the `preload_app!` method when specifying a `workers` number.
 # This directive tells Puma to first boot the application and load code
 # before forking the application. This takes advantage of Copy On Write
 # process behavior so workers use less memory.
 #
-# preload_app!
+preload_app! if worker_count.positive?
+
+# Each process warms up before /status reports it as ready (see lib/warm_up.rb). A worker doesn't
+# take connections until its on_worker_boot hook has finished, whereas in single mode the server is
+# already listening, so it warms up in the background.
+if worker_count.positive?
+  on_worker_boot do
+    require "warm_up"
+    WarmUp.run!
+  end
+else
+  on_booted do
+    require "warm_up"
+    Thread.new { WarmUp.run! }
+  end
+end
 
 activate_control_app
 plugin :yabeda
@@ -18,7 +18,9 @@ Rails.application.routes.draw do
 
     namespace :v2 do
       get "/offices/", to: "office#search"
+      post "/offices/search", to: "office#batch_search"
       get "/offices/:id", to: "office#show", as: :office
+      get "/suggest", to: "suggest#index"
     end
   end
 end
@@ -0,0 +1,8 @@
+# frozen_string_literal: true
+
+class AddSpatialIndexToOffices < ActiveRecord::Migration[7.1]
+  def change
+    # allows nearest-neighbour (<->) ordering and radius (ST_DWithin) filtering to use an index
+    add_index :offices, :location, using: :gist
+  end
+end
@@ -0,0 +1,11 @@
+# frozen_string_literal: true
+
+class AddTrigramIndexesForFuzzySearch < ActiveRecord::Migration[7.1]
+  def change
+    enable_extension "pg_trgm"
+
+    # these serve both ILIKE '%...%' and word similarity (<%) lookups in fuzzy search
+    add_index :offices, :name, using: :gin, opclass: :gin_trgm_ops
+    add_index :local_authorities, :name, using: :gin, opclass: :gin_trgm_ops
+  end
+end
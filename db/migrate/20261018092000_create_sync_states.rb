@@ -0,0 +1,19 @@
+# frozen_string_literal: true
+
+class CreateSyncStates < ActiveRecord::Migration[7.1]
+  def change
+    # rubocop:disable Rails/CreateTableWithTimestamps
+    # a new generation is created every time a sync changes the data
+    create_table :data_generations do |t|
+      t.datetime :created_at, null: false
+    end
+
+    # records what each loader last loaded, so unchanged sources can be skipped
+    create_table :sync_states, id: :string, primary_key: :name do |t|
+      t.jsonb :source_etags, null: false, default: {}
+      t.references :data_generation, null: false, foreign_key: true
+      t.datetime :synced_at, null: false
+    end
+    # rubocop:enable Rails/CreateTableWithTimestamps
+  end
+end
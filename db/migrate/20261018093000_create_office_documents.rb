@@ -0,0 +1,22 @@
+# frozen_string_literal: true
+
+class CreateOfficeDocuments < ActiveRecord::Migration[7.1]
+  def change
+    # rubocop:disable Rails/CreateTableWithTimestamps
+    # the API responses for each office, rendered when the LSS data is loaded and stored already
+    # encoded so they can be sent as they are
+    create_table :office_documents, id: false do |t|
+      t.column :office_id, "char(18)", primary_key: true
+      t.integer :legacy_id
+      t.string :membership_number
+      t.column :office_type, :office_type, null: false
+      t.text :v2_json, null: false
+      t.text :v0_json, null: false
+      t.text :v0_vacancy_json
+    end
+    add_foreign_key :office_documents, :offices, on_delete: :cascade
+    add_index :office_documents, %i[legacy_id office_type]
+    add_index :office_documents, %i[membership_number office_type]
+    # rubocop:enable Rails/CreateTableWithTimestamps
+  end
+end
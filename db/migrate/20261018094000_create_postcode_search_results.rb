@@ -0,0 +1,14 @@
+# frozen_string_literal: true
+
+class CreatePostcodeSearchResults < ActiveRecord::Migration[7.1]
+  def change
+    # rubocop:disable Rails/CreateTableWithTimestamps
+    # the offices found by an exact search, in order, keyed by either a whole normalised postcode or
+    # (where every postcode in it has the same results) a postcode sector
+    create_table :postcode_search_results, id: false do |t|
+      t.string :key, limit: 7, primary_key: true
+      t.column :office_ids, "char(18)", array: true, null: false
+    end
+    # rubocop:enable Rails/CreateTableWithTimestamps
+  end
+end
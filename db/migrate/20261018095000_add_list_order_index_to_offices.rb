@@ -0,0 +1,8 @@
+# frozen_string_literal: true
+
+class AddListOrderIndexToOffices < ActiveRecord::Migration[7.1]
+  def change
+    # v0 lists are in name order, and paged through by (name, id), for one type of office at a time
+    add_index :offices, %i[office_type name id]
+  end
+end
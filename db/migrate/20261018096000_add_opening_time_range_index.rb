@@ -0,0 +1,12 @@
+# frozen_string_literal: true
+
+class AddOpeningTimeRangeIndex < ActiveRecord::Migration[7.1]
+  def change
+    # btree_gist lets the enum columns go in the same GiST index as the range
+    enable_extension "btree_gist"
+
+    # serves the open_at and open_now search filters, which find the opening times covering a time
+    # on a day of the week
+    add_index :opening_times, %i[day_of_week opening_time_for range], using: :gist, name: "index_opening_times_on_day_and_range"
+  end
+end
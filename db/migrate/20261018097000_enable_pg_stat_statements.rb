@@ -0,0 +1,10 @@
+# frozen_string_literal: true
+
+class EnablePgStatStatements < ActiveRecord::Migration[7.1]
+  def change
+    # the statistics of the most expensive statements are exported as metrics (see
+    # StatementMetrics). They're only recorded where the database preloads the library, as the
+    # Aurora parameter group does.
+    enable_extension "pg_stat_statements"
+  end
+end
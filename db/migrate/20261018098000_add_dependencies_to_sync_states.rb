@@ -0,0 +1,9 @@
+# frozen_string_literal: true
+
+class AddDependenciesToSyncStates < ActiveRecord::Migration[7.1]
+  def change
+    # the data generation of each other source a load was checked against, such as the postcodes
+    # (and so local authorities) which the LSS served areas were, so it can be re-run when they change
+    add_column :sync_states, :dependencies, :jsonb, null: false, default: {}
+  end
+end
@@ -0,0 +1,9 @@
+# frozen_string_literal: true
+
+class AddPostcodePrefixIndex < ActiveRecord::Migration[7.1]
+  def change
+    # the unique index uses the database's collation, so can't serve LIKE 'prefix%'. This one serves
+    # the postcode suggestions when there is no postcode index file.
+    add_index :postcodes, :normalised, opclass: :text_pattern_ops, name: "index_postcodes_on_normalised_prefix"
+  end
+end
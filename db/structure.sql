@@ -37,6 +37,20 @@ CREATE SCHEMA topology;
 COMMENT ON SCHEMA topology IS 'PostGIS Topology schema';
 
 
+--
+-- Name: btree_gist; Type: EXTENSION; Schema: -; Owner: -
+--
+
+CREATE EXTENSION IF NOT EXISTS btree_gist WITH SCHEMA public;
+
+
+--
+-- Name: EXTENSION btree_gist; Type: COMMENT; Schema: -; Owner: -
+--
+
+COMMENT ON EXTENSION btree_gist IS 'support for indexing common datatypes in GiST';
+
+
 --
 -- Name: fuzzystrmatch; Type: EXTENSION; Schema: -; Owner: -
 --
@@ -51,6 +65,34 @@ CREATE EXTENSION IF NOT EXISTS fuzzystrmatch WITH SCHEMA public;
 COMMENT ON EXTENSION fuzzystrmatch IS 'determine similarities and distance between strings';
 
 
+--
+-- Name: pg_stat_statements; Type: EXTENSION; Schema: -; Owner: -
+--
+
+CREATE EXTENSION IF NOT EXISTS pg_stat_statements WITH SCHEMA public;
+
+
+--
+-- Name: EXTENSION pg_stat_statements; Type: COMMENT; Schema: -; Owner: -
+--
+
+COMMENT ON EXTENSION pg_stat_statements IS 'track planning and execution statistics of all SQL statements executed';
+
+
+--
+-- Name: pg_trgm; Type: EXTENSION; Schema: -; Owner: -
+--
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm WITH SCHEMA public;
+
+
+--
+-- Name: EXTENSION pg_trgm; Type: COMMENT; Schema: -; Owner: -
+--
+
+COMMENT ON EXTENSION pg_trgm IS 'text similarity measurement and index searching based on trigrams';
+
+
 --
 -- Name: postgis; Type: EXTENSION; Schema: -; Owner: -
 --
@@ -165,6 +207,35 @@ CREATE TABLE public.ar_internal_metadata (
 );
 
 
+--
+-- Name: data_generations; Type: TABLE; Schema: public; Owner: -
+--
+
+CREATE TABLE public.data_generations (
+    id bigint NOT NULL,
+    created_at timestamp(6) without time zone NOT NULL
+);
+
+
+--
+-- Name: data_generations_id_seq; Type: SEQUENCE; Schema: public; Owner: -
+--
+
+CREATE SEQUENCE public.data_generations_id_seq
+    START WITH 1
+    INCREMENT BY 1
+    NO MINVALUE
+    NO MAXVALUE
+    CACHE 1;
+
+
+--
+-- Name: data_generations_id_seq; Type: SEQUENCE OWNED BY; Schema: public; Owner: -
+--
+
+ALTER SEQUENCE public.data_generations_id_seq OWNED BY public.data_generations.id;
+
+
 --
 -- Name: local_authorities; Type: TABLE; Schema: public; Owner: -
 --
@@ -175,6 +246,21 @@ CREATE TABLE public.local_authorities (
 );
 
 
+--
+-- Name: office_documents; Type: TABLE; Schema: public; Owner: -
+--
+
+CREATE TABLE public.office_documents (
+    office_id character(18) NOT NULL,
+    legacy_id integer,
+    membership_number character varying,
+    office_type public.office_type NOT NULL,
+    v2_json text NOT NULL,
+    v0_json text NOT NULL,
+    v0_vacancy_json text
+);
+
+
 --
 -- Name: offices; Type: TABLE; Schema: public; Owner: -
 --
@@ -238,6 +324,16 @@ CREATE SEQUENCE public.opening_times_id_seq
 ALTER SEQUENCE public.opening_times_id_seq OWNED BY public.opening_times.id;
 
 
+--
+-- Name: postcode_search_results; Type: TABLE; Schema: public; Owner: -
+--
+
+CREATE TABLE public.postcode_search_results (
+    key character varying(7) NOT NULL,
+    office_ids character(18)[] NOT NULL
+);
+
+
 --
 -- Name: postcodes; Type: TABLE; Schema: public; Owner: -
 --
@@ -309,6 +405,26 @@ CREATE SEQUENCE public.served_areas_id_seq
 ALTER SEQUENCE public.served_areas_id_seq OWNED BY public.served_areas.id;
 
 
+--
+-- Name: sync_states; Type: TABLE; Schema: public; Owner: -
+--
+
+CREATE TABLE public.sync_states (
+    name character varying NOT NULL,
+    source_etags jsonb DEFAULT '{}'::jsonb NOT NULL,
+    data_generation_id bigint NOT NULL,
+    synced_at timestamp(6) without time zone NOT NULL,
+    dependencies jsonb DEFAULT '{}'::jsonb NOT NULL
+);
+
+
+--
+-- Name: data_generations id; Type: DEFAULT; Schema: public; Owner: -
+--
+
+ALTER TABLE ONLY public.data_generations ALTER COLUMN id SET DEFAULT nextval('public.data_generations_id_seq'::regclass);
+
+
 --
 -- Name: opening_times id; Type: DEFAULT; Schema: public; Owner: -
 --
@@ -338,6 +454,14 @@ ALTER TABLE ONLY public.ar_internal_metadata
     ADD CONSTRAINT ar_internal_metadata_pkey PRIMARY KEY (key);
 
 
+--
+-- Name: data_generations data_generations_pkey; Type: CONSTRAINT; Schema: public; Owner: -
+--
+
+ALTER TABLE ONLY public.data_generations
+    ADD CONSTRAINT data_generations_pkey PRIMARY KEY (id);
+
+
 --
 -- Name: local_authorities local_authorities_pkey; Type: CONSTRAINT; Schema: public; Owner: -
 --
@@ -346,6 +470,14 @@ ALTER TABLE ONLY public.local_authorities
     ADD CONSTRAINT local_authorities_pkey PRIMARY KEY (id);
 
 
+--
+-- Name: office_documents office_documents_pkey; Type: CONSTRAINT; Schema: public; Owner: -
+--
+
+ALTER TABLE ONLY public.office_documents
+    ADD CONSTRAINT office_documents_pkey PRIMARY KEY (office_id);
+
+
 --
 -- Name: offices offices_pkey; Type: CONSTRAINT; Schema: public; Owner: -
 --
@@ -362,6 +494,14 @@ ALTER TABLE ONLY public.opening_times
     ADD CONSTRAINT opening_times_pkey PRIMARY KEY (id);
 
 
+--
+-- Name: postcode_search_results postcode_search_results_pkey; Type: CONSTRAINT; Schema: public; Owner: -
+--
+
+ALTER TABLE ONLY public.postcode_search_results
+    ADD CONSTRAINT postcode_search_results_pkey PRIMARY KEY (key);
+
+
 --
 -- Name: postcodes postcodes_pkey; Type: CONSTRAINT; Schema: public; Owner: -
 --
@@ -386,6 +526,35 @@ ALTER TABLE ONLY public.served_areas
     ADD CONSTRAINT served_areas_pkey PRIMARY KEY (id);
 
 
+--
+-- Name: sync_states sync_states_pkey; Type: CONSTRAINT; Schema: public; Owner: -
+--
+
+ALTER TABLE ONLY public.sync_states
+    ADD CONSTRAINT sync_states_pkey PRIMARY KEY (name);
+
+
+--
+-- Name: index_local_authorities_on_name; Type: INDEX; Schema: public; Owner: -
+--
+
+CREATE INDEX index_local_authorities_on_name ON public.local_authorities USING gin (name public.gin_trgm_ops);
+
+
+--
+-- Name: index_office_documents_on_legacy_id_and_office_type; Type: INDEX; Schema: public; Owner: -
+--
+
+CREATE INDEX index_office_documents_on_legacy_id_and_office_type ON public.office_documents USING btree (legacy_id, office_type);
+
+
+--
+-- Name: index_office_documents_on_membership_number_and_office_type; Type: INDEX; Schema: public; Owner: -
+--
+
+CREATE INDEX index_office_documents_on_membership_number_and_office_type ON public.office_documents USING btree (membership_number, office_type);
+
+
 --
 -- Name: index_offices_on_legacy_id; Type: INDEX; Schema: public; Owner: -
 --
@@ -393,6 +562,13 @@ ALTER TABLE ONLY public.served_areas
 CREATE INDEX index_offices_on_legacy_id ON public.offices USING btree (legacy_id);
 
 
+--
+-- Name: index_offices_on_location; Type: INDEX; Schema: public; Owner: -
+--
+
+CREATE INDEX index_offices_on_location ON public.offices USING gist (location);
+
+
 --
 -- Name: index_offices_on_membership_number_and_office_type; Type: INDEX; Schema: public; Owner: -
 --
@@ -400,6 +576,20 @@ CREATE INDEX index_offices_on_legacy_id ON public.offices USING btree (legacy_id
 CREATE INDEX index_offices_on_membership_number_and_office_type ON public.offices USING btree (membership_number, office_type);
 
 
+--
+-- Name: index_offices_on_name; Type: INDEX; Schema: public; Owner: -
+--
+
+CREATE INDEX index_offices_on_name ON public.offices USING gin (name public.gin_trgm_ops);
+
+
+--
+-- Name: index_offices_on_office_type_and_name_and_id; Type: INDEX; Schema: public; Owner: -
+--
+
+CREATE INDEX index_offices_on_office_type_and_name_and_id ON public.offices USING btree (office_type, name, id);
+
+
 --
 -- Name: index_offices_on_parent_id; Type: INDEX; Schema: public; Owner: -
 --
@@ -407,6 +597,13 @@ CREATE INDEX index_offices_on_membership_number_and_office_type ON public.office
 CREATE INDEX index_offices_on_parent_id ON public.offices USING btree (parent_id);
 
 
+--
+-- Name: index_opening_times_on_day_and_range; Type: INDEX; Schema: public; Owner: -
+--
+
+CREATE INDEX index_opening_times_on_day_and_range ON public.opening_times USING gist (day_of_week, opening_time_for, range);
+
+
 --
 -- Name: index_opening_times_on_office_id; Type: INDEX; Schema: public; Owner: -
 --
@@ -428,6 +625,13 @@ CREATE INDEX index_postcodes_on_local_authority_id ON public.postcodes USING btr
 CREATE UNIQUE INDEX index_postcodes_on_normalised ON public.postcodes USING btree (normalised);
 
 
+--
+-- Name: index_postcodes_on_normalised_prefix; Type: INDEX; Schema: public; Owner: -
+--
+
+CREATE INDEX index_postcodes_on_normalised_prefix ON public.postcodes USING btree (normalised text_pattern_ops);
+
+
 --
 -- Name: index_served_areas_on_local_authority_id; Type: INDEX; Schema: public; Owner: -
 --
@@ -442,6 +646,13 @@ CREATE INDEX index_served_areas_on_local_authority_id ON public.served_areas USI
 CREATE INDEX index_served_areas_on_office_id ON public.served_areas USING btree (office_id);
 
 
+--
+-- Name: index_sync_states_on_data_generation_id; Type: INDEX; Schema: public; Owner: -
+--
+
+CREATE INDEX index_sync_states_on_data_generation_id ON public.sync_states USING btree (data_generation_id);
+
+
 --
 -- Name: served_areas fk_rails_21c56aa565; Type: FK CONSTRAINT; Schema: public; Owner: -
 --
@@ -482,6 +693,22 @@ ALTER TABLE ONLY public.offices
     ADD CONSTRAINT fk_rails_b381f08761 FOREIGN KEY (parent_id) REFERENCES public.offices(id) DEFERRABLE;
 
 
+--
+-- Name: sync_states fk_rails_bcfacb476b; Type: FK CONSTRAINT; Schema: public; Owner: -
+--
+
+ALTER TABLE ONLY public.sync_states
+    ADD CONSTRAINT fk_rails_bcfacb476b FOREIGN KEY (data_generation_id) REFERENCES public.data_generations(id);
+
+
+--
+-- Name: office_documents fk_rails_fb491af2f6; Type: FK CONSTRAINT; Schema: public; Owner: -
+--
+
+ALTER TABLE ONLY public.office_documents
+    ADD CONSTRAINT fk_rails_fb491af2f6 FOREIGN KEY (office_id) REFERENCES public.offices(id) ON DELETE CASCADE;
+
+
 --
 -- PostgreSQL database dump complete
 --
@@ -489,6 +716,16 @@ ALTER TABLE ONLY public.offices
 SET search_path TO "$user", public, topology, tiger;
 
 INSERT INTO "schema_migrations" (version) VALUES
+('20261018099000'),
+('20261018098000'),
+('20261018097000'),
+('20261018096000'),
+('20261018095000'),
+('20261018094000'),
+('20261018093000'),
+('20261018092000'),
+('20261018091000'),
+('20261018090000'),
 ('20240904130334'),
 ('20240813152802'),
 ('20231120143230'),
@@ -0,0 +1,34 @@
+# frozen_string_literal: true
+
+require "json"
+require "benchmark_suite/data_generator"
+require "benchmark_suite/endpoints"
+require "benchmark_suite/load_runner"
+
+# Benchmarks the sync and the API against a synthetic dataset the size of the national one. See
+# lib/tasks/benchmark.rake for how to run them.
+#
+# Results are written to a JSON file, with a section for each benchmark, so that the results of
+# two runs can be compared.
+module BenchmarkSuite
+  # Adds (or replaces) one section of a results file, leaving the sections of other benchmarks
+  def self.record!(path, section, **results)
+    existing = File.exist?(path) ? JSON.parse(File.read(path)) : {}
+    FileUtils.mkdir_p(File.dirname(path))
+    File.write(path, "#{JSON.pretty_generate(existing.merge(section.to_s => results))}\n")
+  end
+
+  # Returns the name, baseline value, current value and percentage change of every figure which is
+  # in both sets of results
+  def self.compare(baseline, current, prefix = nil)
+    baseline.each_with_object([]) do |(key, value), rows|
+      name = [prefix, key].compact.join(".")
+      other = current[key]
+      if value.is_a?(Hash) && other.is_a?(Hash)
+        rows.concat(compare(value, other, name))
+      elsif value.is_a?(Numeric) && other.is_a?(Numeric)
+        rows << [name, value, other, value.zero? ? nil : ((other - value) * 100.0 / value).round(1)]
+      end
+    end
+  end
+end
@@ -0,0 +1,258 @@
+# frozen_string_literal: true
+
+require "csv"
+require "fileutils"
+require "json"
+require "lss_loader"
+require "postcode_loader"
+
+module BenchmarkSuite
+  # Generates a synthetic dataset the size of the national one: an ONSPD postcodes file and the LSS
+  # CSVs, in the formats the loaders expect. The same seed always generates the same files.
+  #
+  # The files are laid out as the sync expects to find them in its buckets, so that the sync can
+  # read them with SYNC_SOURCE_DIR. Alongside them, manifest.json records how the dataset was
+  # generated and samples of the postcodes, places and offices in it to search for.
+  class DataGenerator
+    GEO_BUCKET = "geo-data"
+    LSS_BUCKET = "lss-data"
+    POSTCODES_FILE = "postcodes.csv"
+    MANIFEST_FILE = "manifest.json"
+
+    # roughly the size of each local authority, and the share of offices which are members
+    POSTCODES_PER_LOCAL_AUTHORITY = 7_500
+    OFFICES_PER_MEMBER = 12
+
+    # the letters used for the units and areas of postcodes
+    UNITS = %w[A B D E F G H J L N P Q R S T U W X Y Z].then { |letters| letters.product(letters).map(&:join) }.freeze
+    AREAS = %w[A B C D E F G H K L M N P R S T W Y].then { |letters| letters.product(letters).map(&:join) }.freeze
+    UNITS_PER_SECTOR = 100
+    POSTCODES_PER_DISTRICT = UNITS_PER_SECTOR * 10
+    DISTRICTS_PER_AREA = 20
+
+    NAME_PREFIXES = %w[North South East West Upper Lower Great Little Kings Market Old New].freeze
+    NAME_STEMS = %w[Ash Brook Clay Dun Elm Fair Glen Hart Ivy Kirk Lang Mill Oak Pen Red Stan Thorn Wold].freeze
+    NAME_SUFFIXES = %w[field ham ford bury wick ton ley worth borough chester].freeze
+    REGIONS = ["North East", "North West", "Yorkshire and The Humber", "East Midlands", "West Midlands",
+               "East of England", "London", "South East", "South West", "Wales"].freeze
+    WEEKDAYS = %w[Monday Tuesday Wednesday Thursday Friday].freeze
+    ACCESSIBILITY_INFO = %w[has_wheelchair_access has_induction_loop has_accessible_toilet has_step_free_access
+                            has_disabled_parking].freeze
+    VOLUNTEER_ROLES = %w[admin_and_customer_service campaigns giving_information_advice_and_client_support
+                         trustee receptionist].freeze
+
+    # rough bounds of Great Britain, which local authorities are placed within
+    LATITUDES = (50.3..57.5)
+    LONGITUDES = (-4.5..1.5)
+
+    LocalAuthority = Struct.new(:code, :name, :region, :latitude, :longitude, :postcodes)
+    Postcode = Struct.new(:canonical, :latitude, :longitude)
+
+    def initialize(dir, postcodes: 2_700_000, offices: 3_000, seed: 1)
+      @dir = dir
+      @postcode_count = postcodes
+      @office_count = offices
+      @seed = seed
+      @random = Random.new(seed)
+    end
+
+    def generate!
+      FileUtils.mkdir_p([File.join(@dir, GEO_BUCKET), File.join(@dir, LSS_BUCKET)])
+      @local_authorities = build_local_authorities
+      @postcode_samples = []
+      write_postcodes!
+      write_lss_csvs!
+      write_manifest!
+    end
+
+    private
+
+    # every local authority has at least one district of postcodes
+    def build_local_authorities
+      districts = (@postcode_count / POSTCODES_PER_DISTRICT.to_f).ceil
+      count = [(@postcode_count / POSTCODES_PER_LOCAL_AUTHORITY.to_f).ceil, districts].min.clamp(1, 400)
+      names = NAME_PREFIXES.product(NAME_STEMS, NAME_SUFFIXES).map { |prefix, stem, suffix| "#{prefix} #{stem}#{suffix}" }
+      names.shuffle(random: @random).first(count).each_with_index.map do |name, index|
+        LocalAuthority.new(format("E0%<type>d%<index>06d", type: 6 + (index % 4), index: index + 1), name,
+                           REGIONS[index % REGIONS.size], @random.rand(LATITUDES), @random.rand(LONGITUDES), [])
+      end
+    end
+
+    # Postcodes are numbered through areas, districts, sectors and units in turn. Each district is
+    # in one local authority, and its postcodes are scattered around that local authority's centre.
+    def write_postcodes!
+      File.open(File.join(@dir, GEO_BUCKET, POSTCODES_FILE), "w") do |file|
+        file.write(CSV.generate_line(PostcodeLoader::HEADERS))
+        sample_every = [@postcode_count / 1_000, 1].max
+        @postcode_count.times do |index|
+          district_index, unit_index = index.divmod(POSTCODES_PER_DISTRICT)
+          local_authority = @local_authorities[district_index % @local_authorities.size]
+          postcode = build_postcode(district_index, unit_index, local_authority)
+          file.write(postcode_row(postcode, index, local_authority))
+          @postcode_samples << postcode.canonical if (index % sample_every).zero? && !unassigned?(index)
+        end
+      end
+    end
+
+    def build_postcode(district_index, unit_index, local_authority)
+      area = AREAS.fetch(district_index / DISTRICTS_PER_AREA)
+      district = (district_index % DISTRICTS_PER_AREA) + 1
+      sector, unit = unit_index.divmod(UNITS_PER_SECTOR)
+      postcode = Postcode.new("#{area}#{district} #{sector}#{UNITS[unit]}",
+                              (local_authority.latitude + @random.rand(-0.08..0.08)).round(6),
+                              (local_authority.longitude + @random.rand(-0.12..0.12)).round(6))
+      local_authority.postcodes << postcode if local_authority.postcodes.size < 50
+      postcode
+    end
+
+    # A small share of postcodes have no local authority (as with those in the Channel Islands),
+    # which the loader skips. The fields are joined directly, as none of them need quoting.
+    # rubocop:disable Metrics/AbcSize
+    def postcode_row(postcode, index, local_authority)
+      outward = postcode.canonical.split.first
+      unassigned = unassigned?(index)
+      [
+        postcode.canonical, postcode.canonical.delete(" "), outward[/\A[A-Z]+/], outward, "1980-01-01", "", "Live", "2024_08",
+        ((postcode.longitude + 8) * 70_000).round(1), ((postcode.latitude - 49) * 111_000).round(1), "1.0",
+        postcode.latitude, postcode.longitude, "E15000001", local_authority.region, "E99999999", "(pseudo) England",
+        unassigned ? "" : local_authority.code, unassigned ? "" : local_authority.name,
+        "E05#{index % 1_000_000}", "#{local_authority.name} Central", "E99999999", "", "E43000#{index % 1000}", "",
+        "E14001#{index % 650}", "#{local_authority.name} and District", "E00#{index % 190_000}", "E01#{index % 33_000}",
+        "#{local_authority.name} #{index % 100}A", "E02#{index % 7_000}", "#{local_authority.name} #{index % 100}",
+        "E00#{index % 180_000}", "E01#{index % 32_000}", "C1", index % 32_844, "E16000#{index % 150}", "E38000#{index % 200}",
+        "NHS #{local_authority.region} ICB", "E23000#{index % 40}", "#{local_authority.region} Police", "E54000#{index % 42}",
+        "NHS #{local_authority.region} Integrated Care Board", "E14001#{index % 650}", "A Member", "LAB", "Labour"
+      ].join(",") << "\n"
+    end
+    # rubocop:enable Metrics/AbcSize
+
+    def unassigned?(index)
+      (index % 331).zero?
+    end
+
+    def write_lss_csvs!
+      @members = []
+      @advice_locations = []
+      member_count = [@office_count / OFFICES_PER_MEMBER, 1].max
+      write_lss_csv(:members_csv) { |csv| member_count.times { |index| csv << member_row(index) } }
+      write_lss_csv(:advice_locations_csv) do |csv|
+        (@office_count - member_count).times { |index| csv << advice_location_row(index) }
+        # excluded locations are left out by the loader, so they aren't counted as offices
+        (@office_count / 50).times { |index| csv << advice_location_row(index, excluded: true) }
+      end
+      write_lss_csv(:opening_hours_csv) { |csv| @advice_locations.each { |office| opening_hours_rows(office).each { |row| csv << row } } }
+      write_lss_csv(:volunteer_roles_csv) do |csv|
+        @advice_locations.each { |office| sample_values(VOLUNTEER_ROLES).each { |role| csv << [office[:id], role, ""] } }
+      end
+      write_lss_csv(:accessibility_info_csv) do |csv|
+        @advice_locations.each { |office| sample_values(ACCESSIBILITY_INFO).each { |info| csv << [office[:id], info, ""] } }
+      end
+      write_lss_csv(:local_authorities_csv) { |csv| @advice_locations.each { |office| served_area_rows(office).each { |row| csv << row } } }
+    end
+
+    def write_lss_csv(name)
+      CSV.open(File.join(@dir, LSS_BUCKET, LssLoader::LssLoader::SOURCE_FILES.fetch(name)), "w") do |csv|
+        csv << LssLoader::Validators.const_get("#{name.to_s.delete_suffix('_csv').upcase}_HEADERS")
+        yield csv
+      end
+    end
+
+    def sample_values(values)
+      values.sample(@random.rand(0..3), random: @random)
+    end
+
+    def member_row(index)
+      local_authority = @local_authorities[index % @local_authorities.size]
+      postcode = local_authority.postcodes.sample(random: @random)
+      member = { id: salesforce_id(index), local_authority:, membership_number: format("%<a>02d/%<b>04d", a: index / 100, b: index) }
+      @members << member
+      [
+        member[:id], LssLoader::OfficeBuilder::RECORD_TYPES.key(:member), "", "#{index + 1} High Street", local_authority.name.upcase,
+        "", "", "https://www.example.org/#{index}", "2024-07-19 10:15:40", "False", member[:membership_number],
+        (1_000_000 + index).to_s, (5_000_000 + index).to_s, "", local_authority.region, "", "Citizens Advice #{local_authority.name}",
+        "2004-03-04", local_authority.name, (100_000 + index).to_s, "advice#{index}@example.org",
+        "Citizens Advice #{local_authority.name}", local_authority.region, postcode.canonical, local_authority.code, ""
+      ]
+    end
+
+    # Most advice locations are offices, and the rest outreach, each placed at a postcode in its
+    # member's local authority
+    # rubocop:disable Metrics/AbcSize
+    def advice_location_row(index, excluded: false)
+      member = @members[index % @members.size]
+      local_authority = member[:local_authority]
+      postcode = local_authority.postcodes.sample(random: @random)
+      office_type = (index % 5).zero? ? :outreach : :office
+      id = salesforce_id(@members.size + index, excluded:)
+      name = "#{office_type == :office ? 'Citizens Advice' : 'Outreach at'} #{local_authority.name} #{index + 1}"
+      @advice_locations << { id:, legacy_id: (200_000 + index).to_s, office_type:, local_authority: } unless excluded
+      [
+        id, name, office_type.to_s.capitalize, member[:id], "#{index + 1} Market Street", local_authority.name.upcase,
+        local_authority.region, postcode.canonical, postcode.latitude, postcode.longitude,
+        format("0300 %<exchange>03d %<line>04d", exchange: index % 1000, line: index % 10_000),
+        "https://www.example.org/#{index}", "19/07/2023 10:15", (index.even? ? "True" : "False"), "advice#{index}@example.org", "",
+        (excluded ? "True" : "False"), "False", (200_000 + index).to_s, "", "False", member[:membership_number],
+        "We give free, independent advice on benefits, debt, housing and employment.", "", "", local_authority.region,
+        (index % 3).zero? ? "Yes" : "No", "", "Drop in on weekday mornings", "Call us on weekdays", "False", "", "", "Open",
+        "volunteer#{index}@example.org", local_authority.name, local_authority.code,
+        LssLoader::OfficeBuilder::RECORD_TYPES.key(office_type), ""
+      ]
+    end
+    # rubocop:enable Metrics/AbcSize
+
+    # every office is open on weekdays, some with a break for lunch, and about half also give
+    # telephone advice
+    def opening_hours_rows(office)
+      rows = WEEKDAYS.flat_map do |day|
+        if @random.rand < 0.3
+          [office_hours_row(office, day, "09:30", "12:30"), office_hours_row(office, day, "13:30", "16:30")]
+        else
+          [office_hours_row(office, day, "09:00", "17:00")]
+        end
+      end
+      return rows unless @random.rand < 0.5
+
+      rows + WEEKDAYS.first(4).map { |day| [office[:id], "Telephone advice hours", day, "10:00", "14:00", "", ""] }
+    end
+
+    def office_hours_row(office, day, opens, closes)
+      [office[:id], "Local office opening hours", day, opens, closes, "", ""]
+    end
+
+    # offices serve their own local authority, and some the next one as well
+    def served_area_rows(office)
+      local_authorities = [office[:local_authority]]
+      if @random.rand < 0.3
+        local_authorities << @local_authorities[(@local_authorities.index(office[:local_authority]) + 1) % @local_authorities.size]
+      end
+      local_authorities.uniq.each_with_index.map do |local_authority, index|
+        [office[:id], index.zero? ? "primary" : "secondary", local_authority.code, "2024-10-02"]
+      end
+    end
+
+    def salesforce_id(index, excluded: false)
+      "00#{excluded ? 'X' : '1'}4K#{index.to_s(36).upcase.rjust(13, '0')}"
+    end
+
+    def write_manifest!
+      File.write(File.join(@dir, MANIFEST_FILE), "#{JSON.pretty_generate(manifest)}\n")
+    end
+
+    def manifest
+      offices = @advice_locations.select { |office| office[:office_type] == :office }
+      {
+        seed: @seed,
+        postcodes: @postcode_count,
+        offices: @office_count,
+        local_authorities: @local_authorities.size,
+        samples: {
+          postcodes: @postcode_samples,
+          places: @local_authorities.map(&:name),
+          office_ids: @advice_locations.map { |office| office[:id] },
+          location_ids: offices.map { |office| office[:legacy_id] },
+          membership_numbers: @members.map { |member| member[:membership_number] }
+        }
+      }
+    end
+  end
+end
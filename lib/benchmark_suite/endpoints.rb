@@ -0,0 +1,61 @@
+# frozen_string_literal: true
+
+require "json"
+require "net/http"
+
+module BenchmarkSuite
+  # The API requests which are benchmarked, made with the postcodes, places and offices sampled in
+  # a generated dataset's manifest. Each is a block which builds the request with a given index.
+  class Endpoints
+    BATCH_SIZE = 20
+
+    def initialize(manifest, username:, password:, seed: 1)
+      random = Random.new(seed)
+      @samples = manifest.fetch("samples").transform_values { |values| values.shuffle(random:) }
+      @username = username
+      @password = password
+    end
+
+    # rubocop:disable Metrics/AbcSize
+    def to_h
+      {
+        "v2 search by postcode" => ->(index) { get("/api/v2/offices", q: sample("postcodes", index)) },
+        "v2 search by place" => ->(index) { get("/api/v2/offices", q: sample("places", index)) },
+        "v2 batch search" => ->(index) { post("/api/v2/offices/search", queries: batch("postcodes", index)) },
+        "v2 fetch by ids" => ->(index) { get("/api/v2/offices", ids: batch("office_ids", index).join(",")) },
+        "v2 office" => ->(index) { get("/api/v2/offices/#{sample('office_ids', index)}") },
+        "v2 suggest postcode" => ->(index) { get("/api/v2/suggest", prefix: sample("postcodes", index)[0, 4]) },
+        "v2 suggest place" => ->(index) { get("/api/v2/suggest", prefix: sample("places", index)[0, 3]) },
+        "v0 location" => ->(index) { v0_get("/api/v0/json/location/id/#{sample('location_ids', index)}") },
+        "v0 member" => ->(index) { v0_get("/api/v0/json/member/id/#{sample('membership_numbers', index)}") },
+        "v0 vacancy list" => ->(index) { v0_get("/api/v0/json/vacancy/list", near: sample("postcodes", index)) },
+        "v0 location list" => ->(_) { v0_get("/api/v0/json/location/list") },
+        "v0 member list" => ->(_) { v0_get("/api/v0/json/member/list") }
+      }
+    end
+    # rubocop:enable Metrics/AbcSize
+
+    private
+
+    def sample(name, index)
+      values = @samples.fetch(name)
+      values[index % values.size]
+    end
+
+    def batch(name, index)
+      Array.new(BATCH_SIZE) { |offset| sample(name, (index * BATCH_SIZE) + offset) }
+    end
+
+    def get(path, params = {})
+      Net::HTTP::Get.new(params.empty? ? path : "#{path}?#{URI.encode_www_form(params)}")
+    end
+
+    def post(path, body)
+      Net::HTTP::Post.new(path, "Content-Type" => "application/json").tap { |request| request.body = body.to_json }
+    end
+
+    def v0_get(path, params = {})
+      get(path, params).tap { |request| request.basic_auth(@username, @password) }
+    end
+  end
+end
@@ -0,0 +1,78 @@
+# frozen_string_literal: true
+
+require "json"
+require "net/http"
+
+module BenchmarkSuite
+  # Sends requests to an endpoint from several threads at once, each with its own keep-alive
+  # connection, and reports the throughput and latency percentiles of the responses.
+  #
+  # Endpoints are built from a block which is given the index of each request, and returns the
+  # Net::HTTPRequest to send, so that requests work through a list of samples in the same order on
+  # every run. The first few requests on each thread warm up the connection and aren't measured.
+  class LoadRunner
+    PERCENTILES = [50, 95, 99].freeze
+
+    def initialize(base_url, concurrency: 8, requests: 1_000, warmup: 10)
+      @base_uri = URI(base_url)
+      @concurrency = concurrency
+      @requests = requests
+      @warmup = warmup
+    end
+
+    def run(&build_request)
+      next_index = Queue.new
+      @requests.times { |index| next_index << index }
+      next_index.close
+
+      started_at = monotonic_now
+      samples = Array.new(@concurrency) { |thread| Thread.new { send_requests(thread, next_index, &build_request) } }.flat_map(&:value)
+      statistics(samples, monotonic_now - started_at)
+    end
+
+    def self.percentile(sorted_values, percentile)
+      return nil if sorted_values.empty?
+
+      sorted_values[((percentile / 100.0) * sorted_values.size).ceil.clamp(1, sorted_values.size) - 1]
+    end
+
+    private
+
+    # returns the latency and whether it succeeded for each request
+    def send_requests(thread, next_index, &build_request)
+      Net::HTTP.start(@base_uri.host, @base_uri.port, use_ssl: @base_uri.scheme == "https") do |http|
+        @warmup.times { |index| http.request(build_request.call(thread + (index * @concurrency))) }
+        samples = []
+        while (index = next_index.pop)
+          samples << timed_request(http, build_request.call(index))
+        end
+        samples
+      end
+    end
+
+    def timed_request(http, request)
+      started_at = monotonic_now
+      response = http.request(request)
+      [monotonic_now - started_at, response.is_a?(Net::HTTPSuccess)]
+    rescue IOError, SystemCallError, Net::ReadTimeout => e
+      Rails.logger.warn("Benchmark request failed", path: request.path, error: e.message)
+      [monotonic_now - started_at, false]
+    end
+
+    def statistics(samples, duration)
+      latencies = samples.map(&:first).sort
+      {
+        requests: samples.size,
+        errors: samples.count { |_, succeeded| !succeeded },
+        duration:,
+        requests_per_second: duration.positive? ? (samples.size / duration).round(1) : nil,
+        latency: PERCENTILES.to_h { |percentile| [:"p#{percentile}", self.class.percentile(latencies, percentile)] }
+                            .merge(mean: latencies.empty? ? nil : latencies.sum / latencies.size, max: latencies.last)
+      }
+    end
+
+    def monotonic_now
+      Process.clock_gettime(Process::CLOCK_MONOTONIC)
+    end
+  end
+end
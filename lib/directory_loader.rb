@@ -0,0 +1,50 @@
+# frozen_string_literal: true
+
+require "digest"
+
+# Reads the data to sync from a local directory rather than from S3, with a subdirectory for each
+# bucket. It responds to the same methods as S3Loader, so the sync can run against generated data
+# (as the benchmarks do) or without access to AWS.
+class DirectoryLoader
+  # the number of bytes read so far
+  attr_reader :bytes_fetched
+
+  def initialize(root)
+    @root = root
+    @bytes_fetched = 0
+  end
+
+  def fetch_all(bucket, keys)
+    files = {}
+    keys.each { |key| files[key] = File.open(object_path(bucket, key), "r:UTF-8") }
+    @bytes_fetched += files.each_value.sum(&:size)
+    files
+  rescue SystemCallError => e
+    files.each_value(&:close)
+    raise FetchError, "Could not read #{keys.join(', ')} from #{bucket}: #{e.message}"
+  end
+
+  def object_as_io(bucket, key)
+    fetch_all(bucket, [key]).fetch(key)
+  end
+
+  # Stands in for the S3 ETag, which changes whenever an object's content does. This uses the size
+  # and modification time, rather than a digest, so that large files aren't read twice.
+  def object_etags(bucket, keys)
+    keys.to_h do |key|
+      stat = File.stat(object_path(bucket, key))
+      [key, Digest::MD5.hexdigest("#{stat.size}:#{stat.mtime.to_r}")]
+    end
+  rescue SystemCallError => e
+    raise FetchError, "Could not read #{keys.join(', ')} from #{bucket}: #{e.message}"
+  end
+
+  private
+
+  def object_path(bucket, key)
+    File.join(@root, bucket, key)
+  end
+
+  class FetchError < StandardError
+  end
+end
@@ -0,0 +1,120 @@
+# frozen_string_literal: true
+
+require "json"
+require "prometheus/client"
+require "prometheus/client/push"
+
+# Measures each stage of an import: the wall and CPU time it takes, the peak memory used while it
+# runs, and the rows and bytes it handles. Each stage is logged as it finishes.
+#
+# Once the import is done, finish! writes a summary of every stage as JSON (laid out so that the
+# summaries of two runs can be compared with diff) and pushes the same figures to a Prometheus push
+# gateway, if either of those are configured.
+class ImportProfiler
+  Stage = Struct.new(:name, :failed, :wall_time, :cpu_time, :peak_rss_bytes, :rows_read, :rows_rejected, :rows_written,
+                     :bytes_fetched, keyword_init: true)
+
+  # the figures pushed for each stage, and the name of the metric for each
+  METRICS = {
+    wall_time: :import_stage_duration_seconds,
+    cpu_time: :import_stage_cpu_seconds,
+    peak_rss_bytes: :import_stage_peak_rss_bytes,
+    rows_read: :import_stage_rows_read,
+    rows_rejected: :import_stage_rows_rejected,
+    rows_written: :import_stage_rows_written,
+    bytes_fetched: :import_stage_bytes_fetched
+  }.freeze
+
+  attr_reader :stages
+
+  def initialize(job: "sync_database", summary_path: Rails.configuration.import_profile_path,
+                 push_gateway: Rails.configuration.import_metrics_push_gateway)
+    @job = job
+    @summary_path = summary_path
+    @push_gateway = push_gateway
+    @stages = []
+    @started_at = Time.current
+  end
+
+  # Yields the stage, so that the block can set how many rows and bytes it handled. Stages can't be
+  # nested, as the peak memory use is reset at the start of each one.
+  def stage(name)
+    stage = Stage.new(name:, failed: true, rows_read: 0, rows_rejected: 0, rows_written: 0, bytes_fetched: 0)
+    reset_peak_rss!
+    started_at = monotonic_now
+    cpu_started_at = cpu_time
+    result = yield stage
+    stage.failed = false
+    result
+  ensure
+    stage.wall_time = monotonic_now - started_at
+    stage.cpu_time = cpu_time - cpu_started_at
+    stage.peak_rss_bytes = peak_rss_bytes
+    @stages << stage
+    Rails.logger.info("Finished import stage #{name}", **stage.to_h)
+  end
+
+  def finish!
+    write_summary! unless @summary_path.nil?
+    push_metrics! unless @push_gateway.nil?
+  end
+
+  def summary
+    {
+      job: @job,
+      started_at: @started_at.iso8601,
+      wall_time: @stages.sum(&:wall_time),
+      cpu_time: @stages.sum(&:cpu_time),
+      stages: @stages.map(&:to_h)
+    }
+  end
+
+  private
+
+  def write_summary!
+    File.write(@summary_path, "#{JSON.pretty_generate(summary)}\n")
+    Rails.logger.info("Wrote import profile", path: @summary_path)
+  end
+
+  # replaces everything previously pushed for the job, so that stages which didn't run this time
+  # (because their data hadn't changed) aren't left with the figures from an earlier run
+  def push_metrics!
+    registry = Prometheus::Client::Registry.new
+    METRICS.each do |field, metric_name|
+      gauge = registry.gauge(metric_name, docstring: "#{field.to_s.humanize} for each stage of the last import", labels: %i[stage])
+      @stages.each { |stage| gauge.set(stage[field], labels: { stage: stage.name }) unless stage[field].nil? }
+    end
+    registry.gauge(:import_last_run_timestamp_seconds, docstring: "When the last import started").set(@started_at.to_f)
+    registry.gauge(:import_last_run_failed, docstring: "Whether any stage of the last import failed")
+            .set(@stages.any?(&:failed) ? 1 : 0)
+
+    Prometheus::Client::Push.new(job: @job, gateway: @push_gateway).replace(registry)
+  rescue StandardError => e
+    # the import has already finished by now, so this shouldn't fail it
+    Rails.logger.warn("Could not push import metrics", gateway: @push_gateway, error: e.message)
+  end
+
+  # the CPU time of forked workers is included once they have been waited for
+  def cpu_time
+    times = Process.times
+    times.utime + times.stime + times.cutime + times.cstime
+  end
+
+  # On Linux, writing 5 to clear_refs resets the peak resident set size (VmHWM) of the process
+  def reset_peak_rss!
+    File.write("/proc/self/clear_refs", "5")
+  rescue SystemCallError
+    nil
+  end
+
+  def peak_rss_bytes
+    kilobytes = File.foreach("/proc/self/status").find { |line| line.start_with?("VmHWM:") }&.split&.at(1)
+    kilobytes.nil? ? nil : kilobytes.to_i * 1024
+  rescue SystemCallError
+    nil
+  end
+
+  def monotonic_now
+    Process.clock_gettime(Process::CLOCK_MONOTONIC)
+  end
+end
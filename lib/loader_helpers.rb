@@ -3,7 +3,15 @@
 module LoaderHelpers
   private
 
-  def defer_constraint_until_commit!(constraint_id)
-    ActiveRecord::Base.connection.execute("SET CONSTRAINTS #{constraint_id} DEFERRED")
+  # Creates an empty temporary table with the same types as the given columns of a model's table.
+  # Loaders copy the raw data into this, and then build the new tables from it.
+  def create_staging_table!(staging_table, model, columns)
+    connection = ActiveRecord::Base.connection
+    quoted_staging_table = connection.quote_table_name(staging_table)
+    connection.execute("DROP TABLE IF EXISTS #{quoted_staging_table}")
+    connection.execute(<<~SQL.squish)
+      CREATE TEMPORARY TABLE #{quoted_staging_table} ON COMMIT DROP AS
+      #{model.unscoped.select(*columns).to_sql} WITH NO DATA
+    SQL
   end
 end
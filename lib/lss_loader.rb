@@ -1,15 +1,17 @@
 # frozen_string_literal: true
 
 require "csv"
+require "copy_writer"
 require "csv_helpers"
-require "loader_helpers"
+require "import_profiler"
+require "shadow_tables"
+require "lss_loader/document_builder"
 require "lss_loader/office_builder"
 require "lss_loader/opening_time_builder"
 require "lss_loader/validators"
 
 module LssLoader
   class LssLoader
-    include LoaderHelpers
     include Validators
 
     # rubocop:disable Metrics/ParameterLists
@@ -18,38 +20,97 @@ module LssLoader
                    opening_hours_csv:,
                    volunteer_roles_csv:,
                    accessibility_info_csv:,
-                   local_authorities_csv:)
+                   local_authorities_csv:,
+                   profiler: ImportProfiler.new)
       @members_csv = CSV.new(members_csv, headers: true, return_headers: true)
       @advice_locations_csv = CSV.new(advice_locations_csv, headers: true, return_headers: true)
       @opening_hours_csv = CSV.new(opening_hours_csv, headers: true, return_headers: true)
       @volunteer_roles_csv = CSV.new(volunteer_roles_csv, headers: true, return_headers: true)
       @accessibility_info_csv = CSV.new(accessibility_info_csv, headers: true, return_headers: true)
       @local_authorities_csv = CSV.new(local_authorities_csv, headers: true, return_headers: true)
+      @profiler = profiler
       initialise_csv_headers!
     end
     # rubocop:enable Metrics/ParameterLists
 
+    # the file each CSV is exported to in the LSS data bucket
+    SOURCE_FILES = {
+      members_csv: "citizens_advice_members_flat.csv",
+      advice_locations_csv: "advice_locations_flat.csv",
+      opening_hours_csv: "advice_location_opening_hours_flat.csv",
+      volunteer_roles_csv: "advice_locations_volunteer_roles_tidy.csv",
+      accessibility_info_csv: "advice_locations_accessibility_tidy.csv",
+      local_authorities_csv: "local_authority_data_tidy.csv"
+    }.freeze
+
+    SERVED_AREA_COLUMNS = %w[office_id local_authority_id].freeze
+    OPENING_TIME_COLUMNS = %w[office_id opening_time_for day_of_week range].freeze
+
     def load!
-      ActiveRecord::Base.transaction do
-        defer_integrity_checks_until_commit!
-        validate_csv_headers!
-        clear_existing_records!
-
-        offices, served_areas = OfficeBuilder.new(members_csv: @members_csv,
-                                                  advice_locations_csv: @advice_locations_csv,
-                                                  accessibility_info_csv: @accessibility_info_csv,
-                                                  volunteer_roles_csv: @volunteer_roles_csv,
-                                                  local_authorities_csv: @local_authorities_csv).build
-        opening_times = OpeningTimeBuilder.new(@opening_hours_csv, offices.map(&:id)).build
-
-        offices.map(&:save!)
-        served_areas.map(&:save!)
-        opening_times.map(&:save!)
+      build!
+      swap!
+    end
+
+    # Loads the data into new copies of the LSS tables, leaving the live tables as they are until swap!
+    def build!
+      validate_csv_headers!
+
+      offices, served_areas = @profiler.stage("lss.build_offices") { |stage| build_offices(stage) }
+      opening_times = @profiler.stage("lss.build_opening_times") do |stage|
+        OpeningTimeBuilder.new(@opening_hours_csv, offices.map(&:id)).build.tap do |built|
+          stage.rows_read = rows_read(@opening_hours_csv)
+          stage.rows_written = built.size
+        end
       end
+
+      @profiler.stage("lss.write_tables") do |stage|
+        stage.rows_read = offices.size + served_areas.size + opening_times.size
+        self.class.shadow_tables.build! do
+          stage.rows_written = [
+            CopyWriter.new(Office).write!(offices),
+            CopyWriter.new(ServedArea, SERVED_AREA_COLUMNS).write!(served_areas),
+            CopyWriter.new(OpeningTimes, OPENING_TIME_COLUMNS).write!(opening_times),
+            # rendered from the new tables, as those are first on the search path here
+            CopyWriter.new(OfficeDocument).write!(DocumentBuilder.new.build)
+          ].sum
+        end
+      end
+    end
+
+    # Makes the data loaded by build! live, keeping the data it replaces for rollback!
+    def swap!
+      self.class.shadow_tables.swap! { ServedArea.delete_without_local_authority }
+    end
+
+    def self.rollback!
+      shadow_tables.rollback! { ServedArea.delete_without_local_authority }
+    end
+
+    def self.shadow_tables
+      ShadowTables.new(Office, ServedArea, OpeningTimes, OfficeDocument)
     end
 
     private
 
+    def build_offices(stage)
+      builder = OfficeBuilder.new(members_csv: @members_csv,
+                                  advice_locations_csv: @advice_locations_csv,
+                                  accessibility_info_csv: @accessibility_info_csv,
+                                  volunteer_roles_csv: @volunteer_roles_csv,
+                                  local_authorities_csv: @local_authorities_csv)
+      offices, served_areas = builder.build
+      stage.rows_read = [@members_csv, @advice_locations_csv, @accessibility_info_csv, @volunteer_roles_csv,
+                         @local_authorities_csv].sum { |csv| rows_read(csv) }
+      stage.rows_rejected = builder.rows_rejected
+      stage.rows_written = offices.size + served_areas.size
+      [offices, served_areas]
+    end
+
+    # the header row is counted as a line, as it was read when the loader was created
+    def rows_read(csv)
+      [csv.lineno - 1, 0].max
+    end
+
     def initialise_csv_headers!
       @members_csv.shift if @members_csv.headers == true
       @advice_locations_csv.shift if @advice_locations_csv.headers == true
@@ -58,17 +119,6 @@ module LssLoader
       @accessibility_info_csv.shift if @accessibility_info_csv.headers == true
       @local_authorities_csv.shift if @local_authorities_csv.headers == true
     end
-
-    def clear_existing_records!
-      ServedArea.delete_all
-      OpeningTimes.delete_all
-      Office.delete_all
-    end
-
-    def defer_integrity_checks_until_commit!
-      office_parent_foreign_key = "fk_rails_b381f08761"
-      defer_constraint_until_commit! office_parent_foreign_key
-    end
   end
 
   class LssLoadError < StandardError
@@ -0,0 +1,37 @@
+# frozen_string_literal: true
+
+module LssLoader
+  # Renders the API responses for every office from the loaded data, so the API can send them as
+  # they are rather than serialising on every request
+  class DocumentBuilder
+    include Api::V2::Serialisers
+    include Api::V0::Serialisers
+
+    def build
+      offices = Office.preload(:parent, :children, *LOCATION_PRELOADS).to_a
+      locations_by_membership_number = offices.select { |office| %w[office outreach].include?(office.office_type) }
+                                              .group_by(&:membership_number)
+      offices.map { |office| build_document(office, locations_by_membership_number) }
+    end
+
+    private
+
+    def build_document(office, locations_by_membership_number)
+      OfficeDocument.new(office_id: office.id,
+                         legacy_id: office.legacy_id,
+                         membership_number: office.membership_number,
+                         office_type: office.office_type,
+                         v2_json: office_as_json(office).to_json,
+                         v0_json: v0_json(office, locations_by_membership_number).to_json,
+                         v0_vacancy_json: office.volunteer_roles.empty? ? nil : vacancy_as_v0_json(office).to_json)
+    end
+
+    def v0_json(office, locations_by_membership_number)
+      if office.office_type == "member"
+        member_as_v0_json(office, locations_by_membership_number.fetch(office.membership_number, []))
+      else
+        location_as_v0_json(office)
+      end
+    end
+  end
+end
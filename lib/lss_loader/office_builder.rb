@@ -4,6 +4,16 @@ module LssLoader
   class OfficeBuilder
     include CsvHelpers
 
+    # the Salesforce record type of each kind of office
+    RECORD_TYPES = {
+      "0124K000000HyUGQA0" => :member,
+      "0124K0000000qqTQAQ" => :office,
+      "0124K0000000qqUQAQ" => :outreach
+    }.freeze
+
+    # advice locations excluded from the front end, and served areas for unknown local authorities
+    attr_reader :rows_rejected
+
     def initialize(members_csv:, advice_locations_csv:, accessibility_info_csv:, volunteer_roles_csv:, local_authorities_csv:)
       @members_csv = members_csv
       @advice_locations_csv = advice_locations_csv
@@ -16,6 +26,7 @@ module LssLoader
       @offices = {}
       @served_areas = []
       @valid_local_authority_ids = LocalAuthority.ids.to_set
+      @rows_rejected = 0
 
       load_members_csv!
       load_advice_locations_csv!
@@ -38,7 +49,10 @@ module LssLoader
 
     def load_advice_locations_csv!
       @advice_locations_csv.each do |row|
-        next if advice_location_row_is_excluded?(row)
+        if advice_location_row_is_excluded?(row)
+          @rows_rejected += 1
+          next
+        end
 
         build_office_from_advice_location_row(row)
       end
@@ -62,6 +76,8 @@ module LssLoader
         local_authority_id = str_or_nil(row["local_authority_ons_code"])
         if @offices.include?(office_id) && @valid_local_authority_ids.include?(local_authority_id)
           @served_areas << ServedArea.new(office_id:, local_authority_id:)
+        else
+          @rows_rejected += 1
         end
       end
     end
@@ -142,16 +158,7 @@ module LssLoader
     end
 
     def record_type_id_to_office_type(record_type_id)
-      case record_type_id
-      when "0124K000000HyUGQA0"
-        :member
-      when "0124K0000000qqTQAQ"
-        :office
-      when "0124K0000000qqUQAQ"
-        :outreach
-      else
-        raise LssLoadError, "Unrecognised RecordTypeId #{record_type_id}"
-      end
+      RECORD_TYPES.fetch(record_type_id) { raise LssLoadError, "Unrecognised RecordTypeId #{record_type_id}" }
     end
   end
 end
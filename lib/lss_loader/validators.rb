@@ -2,6 +2,34 @@
 
 module LssLoader
   module Validators
+    MEMBERS_HEADERS = %w[
+      salesforce_id location_type_id salesforce_parent_id street_name city latitude longitude public_website
+      last_modified_date excluded_from_lss_front_end membership_number charity_number company_number membership_end_date
+      government_region membership_status member_short_name membership_start_date local_authority_ons_name resource_directory_id
+      enquiries_email member_full_name county postcode local_authority_ons_code transformation_date
+    ].freeze
+
+    ADVICE_LOCATIONS_HEADERS = %w[
+      salesforce_advice_location_id advice_location_name location_type_name salesforce_parent_id
+      street_name city county postcode latitude longitude phone public_website last_modified_date allows_drop_in_visits
+      enquiries_email emergency_contact_email excluded_from_lss_front_end has_referral_service resource_directory_id
+      service_notes is_location_closed membership_number advice_service_information charity_number company_number
+      government_region currently_recruiting_volunteers short_name face_to_face_advice_hours_information
+      telephone_advice_hours_information excluded_from_lss_reports closed_from reopened_from location_status
+      volunteer_recruitment_email local_authority_ons_name local_authority_ons_code location_type_id transformation_date
+    ].freeze
+
+    OPENING_HOURS_HEADERS = %w[
+      advice_location_salesforce_id session_type session_day start_time_value end_time_value lastmodifieddate transformation_date
+    ].freeze
+
+    VOLUNTEER_ROLES_HEADERS = %w[salesforce_advice_location_id volunteer_roles transformation_date].freeze
+
+    ACCESSIBILITY_INFO_HEADERS = %w[salesforce_advice_location_id advice_location_accessibility transformation_date].freeze
+
+    LOCAL_AUTHORITIES_HEADERS = %w[salesforce_advice_location_id local_authority_code_type local_authority_ons_code
+                                   transformation_date].freeze
+
     def validate_csv_headers!
       raise LssLoadError, "Members CSV file was not in expected format" unless members_csv_has_expected_headers?
       raise LssLoadError, "Advice Locations CSV file was not in expected format" unless advice_locations_csv_has_expected_headers?
@@ -14,45 +42,27 @@ module LssLoader
     private
 
     def members_csv_has_expected_headers?
-      @members_csv.headers == %w[
-        salesforce_id location_type_id salesforce_parent_id street_name city latitude longitude public_website
-        last_modified_date excluded_from_lss_front_end membership_number charity_number company_number membership_end_date
-        government_region membership_status member_short_name membership_start_date local_authority_ons_name resource_directory_id
-        enquiries_email member_full_name county postcode local_authority_ons_code transformation_date
-      ]
+      @members_csv.headers == MEMBERS_HEADERS
     end
 
     def advice_locations_csv_has_expected_headers?
-      @advice_locations_csv.headers == %w[
-        salesforce_advice_location_id advice_location_name location_type_name salesforce_parent_id
-        street_name city county postcode latitude longitude phone public_website last_modified_date allows_drop_in_visits
-        enquiries_email emergency_contact_email excluded_from_lss_front_end has_referral_service resource_directory_id
-        service_notes is_location_closed membership_number advice_service_information charity_number company_number
-        government_region currently_recruiting_volunteers short_name face_to_face_advice_hours_information
-        telephone_advice_hours_information excluded_from_lss_reports closed_from reopened_from location_status
-        volunteer_recruitment_email local_authority_ons_name local_authority_ons_code location_type_id transformation_date
-      ]
+      @advice_locations_csv.headers == ADVICE_LOCATIONS_HEADERS
     end
 
     def opening_hours_csv_has_expected_headers?
-      @opening_hours_csv.headers == %w[
-        advice_location_salesforce_id session_type session_day start_time_value end_time_value lastmodifieddate transformation_date
-      ]
+      @opening_hours_csv.headers == OPENING_HOURS_HEADERS
     end
 
     def volunteer_roles_csv_has_expected_headers?
-      @volunteer_roles_csv.headers == %w[
-        salesforce_advice_location_id volunteer_roles transformation_date
-      ]
+      @volunteer_roles_csv.headers == VOLUNTEER_ROLES_HEADERS
     end
 
     def accessibility_info_csv_has_expected_headers?
-      @accessibility_info_csv.headers == %w[salesforce_advice_location_id advice_location_accessibility transformation_date]
+      @accessibility_info_csv.headers == ACCESSIBILITY_INFO_HEADERS
     end
 
     def local_authorities_csv_has_expected_headers?
-      @local_authorities_csv.headers == %w[salesforce_advice_location_id local_authority_code_type local_authority_ons_code
-                                           transformation_date]
+      @local_authorities_csv.headers == LOCAL_AUTHORITIES_HEADERS
     end
   end
 end
@@ -1,17 +1,66 @@
 # frozen_string_literal: true
 
+require "postcode_index"
+
+# rubocop:disable Metrics/ModuleLength
 module OfficeSearch
+  DEFAULT_LIMIT = 10
+  MAX_LIMIT = 50
+
+  # opening times are in local time
+  TIME_ZONE = "Europe/London"
+
+  # Limits a search to offices open at a time on a day of the week, by either their office or
+  # telephone advice hours (opening_time_for), given as opts[:open_at]
+  OpenAt = Struct.new(:day_of_week, :time, :opening_time_for, keyword_init: true) do
+    def self.now(opening_time_for)
+      now = Time.current.in_time_zone(TIME_ZONE)
+      new(day_of_week: now.strftime("%A").downcase, time: Tod::TimeOfDay.new(now.hour, now.min), opening_time_for:)
+    end
+  end
+
   def self.by_location(near, opts = {})
+    opts = with_default_opts(opts)
+
+    exact_location_results = measure(:postcode_lookup) { find_exact_location(near) }
+    results = exact_location_results.nil? ? [by_fuzzy_location(near, opts), nil] : by_exact_location(near, *exact_location_results, opts)
+    count_outcome(results.last.nil? ? "fuzzy" : "exact")
+    results
+  rescue OutOfAreaError => e
+    count_outcome("out_of_area_#{e.country}")
+    raise
+  rescue UnknownLocationError
+    count_outcome("unknown")
+    raise
+  end
+
+  # the offices are loaded here, so that the time taken by the query is measured separately
+  def self.by_exact_location(near, location, local_authority_id, opts)
+    offices = measure(:precomputed_lookup) { precomputed_results(near, opts) } ||
+              measure(:query_build) { build_query_from_location(location, local_authority_id, opts) }
+    [measure(:query_execution) { offices.load }, location]
+  end
+
+  # Runs the same search as by_location for each query, returning a hash of each query to either the
+  # results and location by_location would return, or the error it would raise. The postcodes are
+  # all looked up at once, and the offices for every query are found with a single statement.
+  #
+  # Precomputed results are not used here, as the batch query answers exact searches just as well.
+  def self.by_locations(queries, opts = {})
+    opts = with_default_opts(opts)
+
+    postcodes = measure(:batch_postcode_lookup) { PostcodeIndex.lookup_all(queries.uniq) }
+    in_area = postcodes.select { |_, postcode| !postcode.nil? && out_of_area_country(postcode).nil? }
+    offices = measure(:batch_query) { build_batch_query(in_area, postcodes.select { |_, postcode| postcode.nil? }.keys, opts) }
+    postcodes.to_h { |query, postcode| [query, batch_result(query, postcode, offices.fetch(query, []), opts)] }
+  end
+
+  def self.with_default_opts(opts)
+    opts = opts.dup
     opts[:only_with_vacancies] ||= false
     opts[:only_in_same_local_authority] ||= false
-
-    exact_location_results = find_exact_location(near)
-    if exact_location_results.nil?
-      [by_fuzzy_location(near, opts), nil]
-    else
-      location, local_authority_id = exact_location_results
-      [build_query_from_location(location, local_authority_id, opts), location]
-    end
+    opts[:limit] = [opts[:limit], MAX_LIMIT].min unless opts[:limit].nil?
+    opts
   end
 
   class UnknownLocationError < StandardError
@@ -38,39 +87,211 @@ module OfficeSearch
   end
 
   def self.find_exact_location(near)
-    postcode = Postcode.normalise_and_find(near)
+    postcode = PostcodeIndex.lookup(near)
     return nil if postcode.nil?
-    raise OutOfAreaError, :ni if postcode.northern_irish?
-    raise OutOfAreaError, :scotland if postcode.scottish?
+
+    country = out_of_area_country(postcode)
+    raise OutOfAreaError, country unless country.nil?
 
     [postcode.location, postcode.local_authority_id]
   end
 
+  def self.out_of_area_country(postcode)
+    if postcode.northern_irish?
+      :ni
+    elsif postcode.scottish?
+      :scotland
+    end
+  end
+
+  # Results are only precomputed (see PostcodeSearchResultsBuilder) when the sync is configured to,
+  # and for the default search of all offices in the same local authority
+  def self.precomputed_results(near, opts)
+    return nil unless Rails.configuration.precompute_search_results
+    return nil unless opts[:only_in_same_local_authority] && !opts[:only_with_vacancies] && opts[:radius].nil? && opts[:limit].nil? &&
+                      opts[:open_at].nil?
+
+    office_ids = PostcodeSearchResult.office_ids_for(near)
+    office_ids.nil? ? nil : Office.where(id: office_ids).in_order_of(:id, office_ids)
+  end
+
   def self.build_query_from_location(location, local_authority_id, opts)
     q = Office.where(office_type: :office)
-    q = if opts[:only_in_same_local_authority]
-          q.joins(:served_areas).where(served_areas: { local_authority_id: })
-        else
-          q.limit(10)
-        end
+    q = q.joins(:served_areas).where(served_areas: { local_authority_id: }) if opts[:only_in_same_local_authority]
+    nearest_offices(q, geography_sql(location), opts)
+  end
+
+  # the same as build_query_from_location, for the location of each row in a batch of searches
+  def self.build_batch_query_from_location(opts)
+    q = Office.where(office_type: :office)
+    q = q.joins(:served_areas).where("served_areas.local_authority_id = batch.local_authority_id") if opts[:only_in_same_local_authority]
+    nearest_offices(q, "batch.location", opts)
+  end
 
+  def self.nearest_offices(query, location_sql, opts)
+    q = query
     q = q.where.not(volunteer_roles: []) if opts[:only_with_vacancies]
-    q.order(Office.arel_table[:location].st_distance(location))
+    q = q.where(open_at_sql(opts[:open_at])) unless opts[:open_at].nil?
+    q = q.where(within_radius_sql(location_sql, opts[:radius])) unless opts[:radius].nil?
+
+    # only cap the number of results when searching across all areas, as all offices in a local
+    # authority should be shown
+    limit = opts[:limit] || (opts[:only_in_same_local_authority] ? nil : DEFAULT_LIMIT)
+    # offices the same distance away are ordered by id, as in the precomputed results
+    q.order(nearest_first_sql(location_sql), :id).limit(limit)
+  end
+
+  # <-> is the PostGIS KNN operator, which (unlike ST_Distance) can walk the GiST index on
+  # offices.location to return the nearest offices without sorting the whole table
+  def self.nearest_first_sql(location_sql)
+    Arel.sql("#{Office.table_name}.location <-> #{location_sql}")
+  end
+
+  def self.within_radius_sql(location_sql, radius_in_metres)
+    ActiveRecord::Base.sanitize_sql_array(
+      ["ST_DWithin(#{Office.table_name}.location, #{location_sql}, ?)", radius_in_metres]
+    )
+  end
+
+  # Checked for each office the location search returns, as part of the same query. When few offices
+  # are open, Postgres can instead find those which are first, with the GiST index on opening times.
+  def self.open_at_sql(open_at)
+    ActiveRecord::Base.sanitize_sql_array([<<~SQL.squish, open_at.day_of_week, open_at.opening_time_for, open_at.time.to_s])
+      EXISTS (
+        SELECT 1 FROM opening_times
+        WHERE opening_times.office_id = offices.id AND opening_times.day_of_week = ?
+          AND opening_times.opening_time_for = ? AND opening_times.range @> ?::time
+      )
+    SQL
+  end
+
+  def self.geography_sql(location)
+    ActiveRecord::Base.sanitize_sql_array(["ST_GeogFromText(?)", "SRID=4326;#{location.as_text}"])
   end
 
   def self.by_fuzzy_location(near, opts)
-    fuzzy_query = build_fuzzy_query(near, opts)
-    raise UnknownLocationError if fuzzy_query.empty?
+    fuzzy_query = measure(:fuzzy_search) { build_fuzzy_query(near, opts).load }
+    raise UnknownLocationError unless fuzzy_location_known?(near, fuzzy_query, opts)
 
     fuzzy_query
   end
 
+  # with open_at, a place can match offices without any of them being open at the time
+  def self.fuzzy_location_known?(near, offices, opts)
+    !offices.empty? || (!opts[:open_at].nil? && build_fuzzy_query(near, opts.except(:open_at)).exists?)
+  end
+
+  # Offices are matched on their own name, or the name of a local authority they serve, using
+  # pg_trgm so that both substrings ("test") and misspellings ("Manchster") are found through the
+  # trigram indexes. Each office is ranked by its best word similarity across those names.
   def self.build_fuzzy_query(near, opts)
-    office_with_local_authorities = Office.left_outer_joins(served_areas: :local_authority).distinct
-    q = office_with_local_authorities.where(Office.arel_table[:name].matches("%#{near}%"))
-    q = q.or(office_with_local_authorities.where(LocalAuthority.arel_table[:name].matches("%#{near}%")))
-    q = q.where(office_type: :office)
+    connection = ActiveRecord::Base.connection
+    fuzzy_matches_query(connection.quote(near), connection.quote(fuzzy_pattern(near)), opts)
+  end
+
+  def self.fuzzy_matches_query(near_sql, pattern_sql, opts)
+    q = Office.joins(fuzzy_matches_join_sql(near_sql, pattern_sql)).where(office_type: :office)
     q = q.where.not(volunteer_roles: []) if opts[:only_with_vacancies]
-    q.limit(10)
+    q = q.where(open_at_sql(opts[:open_at])) unless opts[:open_at].nil?
+    q.order(Arel.sql("fuzzy_matches.similarity DESC"), :name).limit(opts[:limit] || DEFAULT_LIMIT)
+  end
+
+  def self.fuzzy_pattern(near)
+    "%#{ActiveRecord::Base.sanitize_sql_like(near)}%"
+  end
+
+  def self.fuzzy_matches_join_sql(near_sql, pattern_sql)
+    <<~SQL.squish
+      INNER JOIN (
+        SELECT office_id, max(similarity) AS similarity FROM (
+          SELECT offices.id AS office_id, word_similarity(#{near_sql}, offices.name) AS similarity
+          FROM offices
+          WHERE offices.name ILIKE #{pattern_sql} OR #{near_sql} <% offices.name
+          UNION ALL
+          SELECT served_areas.office_id, word_similarity(#{near_sql}, local_authorities.name)
+          FROM local_authorities
+          INNER JOIN served_areas ON served_areas.local_authority_id = local_authorities.id
+          WHERE local_authorities.name ILIKE #{pattern_sql} OR #{near_sql} <% local_authorities.name
+        ) AS all_matches
+        GROUP BY office_id
+      ) AS fuzzy_matches ON fuzzy_matches.office_id = offices.id
+    SQL
+  end
+
+  # Each search in the batch is a LATERAL subquery, run for each row of a list of the searches, so
+  # that the offices for every query are returned by one statement. Returns the offices found for
+  # each query, in order.
+  def self.build_batch_query(exact, fuzzy, opts)
+    queries = exact.keys + fuzzy
+    return {} if queries.empty?
+
+    search_indexes = queries.each_with_index.to_h
+    batches = []
+    batches << exact_batch_sql(exact, search_indexes, opts) unless exact.empty?
+    batches << fuzzy_batch_sql(fuzzy, search_indexes, opts) unless fuzzy.empty?
+    offices = Office.find_by_sql("#{batches.join(' UNION ALL ')} ORDER BY search_index, search_rank")
+    offices.group_by { |office| queries[office.search_index] }
+  end
+
+  def self.exact_batch_sql(postcodes, search_indexes, opts)
+    batch_sql(
+      "unnest(ARRAY[:search_indexes]::integer[], ARRAY[:locations]::geography[], ARRAY[:local_authority_ids]::text[]) " \
+      "AS batch(search_index, location, local_authority_id)",
+      { search_indexes: search_indexes.values_at(*postcodes.keys),
+        locations: postcodes.values.map { |postcode| "SRID=4326;#{postcode.location.as_text}" },
+        local_authority_ids: postcodes.values.map(&:local_authority_id) },
+      build_batch_query_from_location(opts)
+    )
+  end
+
+  def self.fuzzy_batch_sql(nears, search_indexes, opts)
+    batch_sql(
+      "unnest(ARRAY[:search_indexes]::integer[], ARRAY[:nears]::text[], ARRAY[:patterns]::text[]) AS batch(search_index, near, pattern)",
+      { search_indexes: search_indexes.values_at(*nears), nears:, patterns: nears.map { |near| fuzzy_pattern(near) } },
+      fuzzy_matches_query("batch.near", "batch.pattern", opts)
+    )
+  end
+
+  # row_number() numbers the offices by the same ordering as the search, so that they can be put
+  # back into that order once every search has been combined
+  def self.batch_sql(batch_sql, batch_values, search)
+    ranked = search.select("#{Office.table_name}.*", Arel.sql("row_number() OVER (ORDER BY #{order_sql(search)}) AS search_rank"))
+    <<~SQL.squish
+      SELECT batch.search_index, matches.*
+      FROM #{ActiveRecord::Base.sanitize_sql_array([batch_sql, batch_values])}
+      CROSS JOIN LATERAL (#{ranked.to_sql}) AS matches
+    SQL
+  end
+
+  def self.order_sql(query)
+    query.arel.orders.map { |order| order.is_a?(String) ? order : order.to_sql }.join(", ")
+  end
+
+  def self.batch_result(query, postcode, offices, opts)
+    if postcode.nil?
+      known = fuzzy_location_known?(query, offices, opts)
+      count_outcome(known ? "fuzzy" : "unknown")
+      known ? [offices, nil] : UnknownLocationError.new
+    elsif (country = out_of_area_country(postcode))
+      count_outcome("out_of_area_#{country}")
+      OutOfAreaError.new(country)
+    else
+      count_outcome("exact")
+      [offices, postcode.location]
+    end
+  end
+
+  # see config/initializers/yabeda.rb
+  def self.measure(phase)
+    started_at = Process.clock_gettime(Process::CLOCK_MONOTONIC)
+    yield
+  ensure
+    Yabeda.office_search.phase_duration.measure({ phase: }, Process.clock_gettime(Process::CLOCK_MONOTONIC) - started_at)
+  end
+
+  # the match types are the same as in the v2 API
+  def self.count_outcome(match_type)
+    Yabeda.office_search.outcomes_total.increment({ match_type: })
   end
 end
+# rubocop:enable Metrics/ModuleLength
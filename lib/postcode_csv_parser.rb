@@ -0,0 +1,183 @@
+# frozen_string_literal: true
+
+require "csv"
+require "csv_helpers"
+require "etc"
+
+# Parses the body of the ONSPD postcode CSV across several forked worker processes, so that parsing
+# uses all available cores and runs at the same time as the parsed rows are written to the database.
+#
+# The parent process splits the file into chunks of whole rows and hands them out to the workers.
+# Each worker parses its chunks as plain arrays, keeps only the columns we load, and sends the result
+# back as CSV which can be streamed straight into a COPY.
+class PostcodeCsvParser
+  include CsvHelpers
+
+  PROJECTED_COLUMNS = %w[postcode lat lon local_authority_code local_authority_name].freeze
+
+  Worker = Struct.new(:pid, :input, :output, :status)
+
+  # counts of the rows parsed so far, and of those which were skipped
+  attr_reader :rows_read, :rows_rejected
+
+  def initialize(io, headers, workers: nil, chunk_size: 1024 * 1024)
+    @io = io
+    @column_indexes = PROJECTED_COLUMNS.map { |column| headers.index(column) }
+    @worker_count = workers || Etc.nprocessors
+    @chunk_size = chunk_size
+    @rows_read = 0
+    @rows_rejected = 0
+  end
+
+  # Yields CSV text containing whole rows of canonical postcode, location (as WKT), local authority
+  # code and local authority name, along with the number of rows in that text. Rows without a local
+  # authority are skipped.
+  def each_chunk(&)
+    workers = []
+    @worker_count.times { workers << start_worker(workers) }
+    feeder = Thread.new { feed_workers(workers) }
+    feeder.report_on_exception = false
+    collect_from_workers(workers, &)
+    feeder.join
+    wait_for_workers!(workers)
+  ensure
+    workers.each { |worker| stop_worker(worker) }
+  end
+
+  private
+
+  def start_worker(other_workers)
+    input_read, input_write = IO.pipe
+    output_read, output_write = IO.pipe
+    pid = fork do
+      other_workers.each { |worker| [worker.input, worker.output].each(&:close) }
+      input_write.close
+      output_read.close
+      run_worker(input_read, output_write)
+    end
+    input_read.close
+    output_write.close
+    Worker.new(pid, input_write, output_read)
+  end
+
+  # exit! is used so that no at_exit handlers or finalizers run in the worker, as those could
+  # interfere with resources (such as the database connection) which belong to the parent
+  def run_worker(input, output)
+    while (frame = read_frame(input))
+      write_frame(output, "D", *parse_chunk(frame.last))
+    end
+    output.close
+    exit!(0)
+  rescue StandardError => e
+    write_frame(output, "E", 0, 0, e.message.b)
+    exit!(1)
+  end
+
+  def parse_chunk(chunk)
+    rows = 0
+    rejected = 0
+    csv = CSV.parse(chunk.force_encoding(Encoding::UTF_8)).filter_map do |row|
+      postcode, lat, lon, local_authority_code, local_authority_name = row.values_at(*@column_indexes)
+      if local_authority_code.nil? || local_authority_name.nil?
+        rejected += 1
+        next
+      end
+
+      rows += 1
+      CSV.generate_line([postcode, point_wkt_or_nil(lat, lon), local_authority_code, local_authority_name])
+    end
+    [rows, rejected, csv.join.b]
+  end
+
+  def feed_workers(workers)
+    each_input_chunk.with_index { |chunk, index| write_frame(workers[index % workers.size].input, "D", 0, 0, chunk) }
+  ensure
+    workers.each { |worker| worker.input.close unless worker.input.closed? }
+  end
+
+  def collect_from_workers(workers)
+    outputs = workers.map(&:output)
+    until outputs.empty?
+      IO.select(outputs)[0].each do |output|
+        tag, rows, rejected, data = read_frame(output)
+        if tag.nil?
+          outputs.delete(output)
+        elsif tag == "E"
+          raise ParseError, data.force_encoding(Encoding::UTF_8)
+        else
+          @rows_read += rows + rejected
+          @rows_rejected += rejected
+          yield data, rows if rows.positive?
+        end
+      end
+    end
+  end
+
+  # a worker which dies without reporting an error (e.g. if it is killed) would otherwise silently
+  # drop rows
+  def wait_for_workers!(workers)
+    workers.each do |worker|
+      _, worker.status = Process.wait2(worker.pid)
+      raise ParseError, "Postcode parser worker #{worker.pid} failed (#{worker.status})" unless worker.status.success?
+    end
+  end
+
+  def stop_worker(worker)
+    [worker.input, worker.output].each { |io| io.close unless io.closed? }
+    return unless worker.status.nil?
+
+    Process.kill(:TERM, worker.pid)
+    Process.wait(worker.pid)
+  rescue Errno::ESRCH, Errno::ECHILD
+    # the worker has already exited
+  end
+
+  # Chunks always end on a row boundary, which is the last newline not inside a quoted field. As
+  # quotes inside fields are escaped by doubling them, that's a newline with an even number of quotes
+  # before it in the chunk. Reading with a length means chunks are binary, so indexes are byte offsets.
+  def each_input_chunk
+    return enum_for(__method__) unless block_given?
+
+    remainder = "".b
+    while (data = @io.read(@chunk_size))
+      buffer = remainder << data
+      boundary = last_row_boundary(buffer)
+      next if boundary.nil?
+
+      yield buffer.byteslice(0, boundary + 1)
+      remainder = buffer.byteslice(boundary + 1, buffer.bytesize - boundary - 1)
+    end
+    yield remainder unless remainder.empty?
+  end
+
+  def last_row_boundary(buffer)
+    boundary = buffer.rindex("\n")
+    return nil if boundary.nil?
+
+    quotes = buffer.byteslice(0, boundary).count('"')
+    while quotes.odd?
+      previous = boundary.zero? ? nil : buffer.rindex("\n", boundary - 1)
+      return nil if previous.nil?
+
+      quotes -= buffer.byteslice(previous, boundary - previous).count('"')
+      boundary = previous
+    end
+    boundary
+  end
+
+  # frames are a tag, the number of rows and of rejected rows in the data, and then the data
+  def write_frame(io, tag, rows, rejected, data)
+    io.write [tag, rows, rejected, data.bytesize].pack("aNNN"), data
+  end
+
+  def read_frame(io)
+    header = io.read(13)
+    return nil if header.nil?
+
+    tag, rows, rejected, length = header.unpack("aNNN")
+    [tag, rows, rejected, io.read(length) || "".b]
+  end
+
+  class ParseError < StandardError
+  end
+end
@@ -0,0 +1,243 @@
+# frozen_string_literal: true
+
+# A compact, sorted file of every postcode which allows exact postcode lookups to be answered without
+# a database round-trip.
+#
+# The file is a header followed by fixed-width records sorted by the bytes of the normalised
+# postcode, so lookups are a binary search using pread. Nothing is loaded into Ruby objects, and as
+# reads go through the page cache the file is shared between all processes on a host.
+#
+# Each file is written for a particular postcode data generation, and is only used while that is the
+# current postcode generation. That is checked again whenever this process sees a new data
+# generation (see DataGeneration.cached_current), so after the postcodes are synced the old index is
+# only used for up to data_generation_check_interval seconds, as long as the rest of the process's
+# cached data is. If there is no file for the current generation, lookups fall back to the database.
+#
+# The sync writes the index if it has a POSTCODE_INDEX_DIR. With POSTCODE_INDEX_BUILD, API processes
+# build it themselves, into a directory shared by the processes on a host: when they warm up, and in
+# the background whenever they find the postcodes have been synced since.
+class PostcodeIndex
+  MAGIC = "LOSPIDX1"
+  HEADER_FORMAT = "a8Q>N"
+  HEADER_SIZE = 20
+  # normalised postcode, latitude, longitude, local authority ID
+  RECORD_FORMAT = "a7EEa9"
+  RECORD_SIZE = 32
+  # how often to look again for the index file while there isn't one for the current generation
+  RELOAD_INTERVAL = 60
+
+  attr_reader :generation, :count
+
+  def initialize(path)
+    @file = File.open(path, "rb")
+    magic, @generation, @count = @file.pread(HEADER_SIZE, 0).unpack(HEADER_FORMAT)
+    raise IndexError, "#{path} is not a postcode index" unless magic == MAGIC
+  end
+
+  def find(postcode)
+    normalised = Postcode.normalise(postcode)
+    # keys are padded to 7 bytes, so longer ones would otherwise be cut short and match
+    return nil if normalised.empty? || normalised.bytesize > 7
+
+    key = [normalised].pack("a7")
+    low = 0
+    high = @count - 1
+    while low <= high
+      middle = (low + high) / 2
+      record = @file.pread(RECORD_SIZE, HEADER_SIZE + (middle * RECORD_SIZE))
+      case record.byteslice(0, 7) <=> key
+      when 0
+        return postcode_from_record(record)
+      when -1
+        low = middle + 1
+      else
+        high = middle - 1
+      end
+    end
+    nil
+  end
+
+  # Returns up to limit normalised postcodes starting with the (normalised) prefix, in order. The
+  # first is found with a binary search, and the rest follow it in the file.
+  def complete(prefix, limit)
+    first = first_at_or_after(prefix)
+    records = @file.pread([limit, @count - first].min * RECORD_SIZE, HEADER_SIZE + (first * RECORD_SIZE))
+    records.unpack("a7x#{RECORD_SIZE - 7}" * (records.bytesize / RECORD_SIZE))
+           .map { |key| key.delete("\0") }
+           .take_while { |normalised| normalised.start_with?(prefix) }
+  end
+
+  def close
+    @file.close
+  end
+
+  private
+
+  # the index of the first record whose key sorts at or after the key given. Keys are padded with
+  # NULs, so a prefix sorts before every postcode which starts with it.
+  def first_at_or_after(key)
+    low = 0
+    high = @count
+    while low < high
+      middle = (low + high) / 2
+      if @file.pread(7, HEADER_SIZE + (middle * RECORD_SIZE)) < key
+        low = middle + 1
+      else
+        high = middle
+      end
+    end
+    low
+  end
+
+  def postcode_from_record(record)
+    _, latitude, longitude, local_authority_id = record.unpack(RECORD_FORMAT)
+    Postcode.new(location: "POINT(#{longitude} #{latitude})", local_authority_id:)
+  end
+
+  class << self
+    # Returns the postcode, or nil if it does not exist. Falls back to the database if there is no
+    # index for the current data.
+    def lookup(postcode)
+      index = current
+      index.nil? ? Postcode.normalise_and_find(postcode) : index.find(postcode)
+    end
+
+    # Returns a hash of each postcode to the postcode found, or nil. Without an index, they are all
+    # looked up with one query.
+    def lookup_all(postcodes)
+      index = current
+      index.nil? ? Postcode.normalise_and_find_all(postcodes) : postcodes.index_with { |postcode| index.find(postcode) }
+    end
+
+    def current
+      return nil if Rails.configuration.postcode_index_dir.nil?
+
+      data_generation = DataGeneration.cached_current&.id
+      @mutex.synchronize do
+        reload!(data_generation) if @checked_at.nil? || @checked_data_generation != data_generation ||
+                                    monotonic_now - @checked_at > RELOAD_INTERVAL
+        @current
+      end
+    end
+
+    # Writes the index for the current postcode data, unless there is one already. Processes sharing
+    # the directory take turns, so only the first to get there writes it.
+    def build_current!
+      dir = Rails.configuration.postcode_index_dir
+      return if dir.nil?
+
+      FileUtils.mkdir_p(dir)
+      File.open(File.join(dir, "build.lock"), File::RDWR | File::CREAT) do |lock|
+        lock.flock(File::LOCK_EX)
+        role = DataGeneration.replica_up_to_date? ? :reading : :writing
+        ActiveRecord::Base.connected_to(role:) { build_for_current_generation!(dir) }
+      end
+    end
+
+    def write!(dir, generation)
+      FileUtils.mkdir_p(dir)
+      path = path_for(dir, generation)
+      count = 0
+      File.open("#{path}.tmp", "wb") do |file|
+        file.write [MAGIC, generation, 0].pack(HEADER_FORMAT)
+        count = copy_postcodes_into(file)
+        file.pwrite [MAGIC, generation, count].pack(HEADER_FORMAT), 0
+        file.fsync
+      end
+      # the rename is atomic, so readers never see a partially written index
+      File.rename("#{path}.tmp", path)
+      remove_other_generations!(dir, generation)
+      Rails.logger.info("Wrote postcode index", path:, generation:, postcodes: count)
+      path
+    end
+
+    def path_for(dir, generation)
+      File.join(dir, "postcodes-#{generation}.idx")
+    end
+
+    def reset!
+      @mutex.synchronize do
+        @current = nil
+        @checked_at = nil
+        @checked_data_generation = nil
+      end
+    end
+
+    private
+
+    def reload!(data_generation)
+      @checked_at = monotonic_now
+      @checked_data_generation = data_generation
+      generation = postcode_generation
+      return if @current&.generation == generation
+
+      path = generation.nil? ? nil : path_for(Rails.configuration.postcode_index_dir, generation)
+      # the previous index is left to be closed when it is garbage collected, as other threads may
+      # still be reading from it
+      @current = path.present? && File.exist?(path) ? new(path) : nil
+      Rails.logger.info("Loaded postcode index", path:, generation:) unless @current.nil?
+      build_in_background if @current.nil? && !generation.nil? && Rails.configuration.postcode_index_build
+    end
+
+    def postcode_generation
+      SyncState.find_by(name: "postcodes")&.data_generation_id
+    end
+
+    # lookups use the database until the index has been built, and then load it at the next check
+    def build_in_background
+      return if @builder&.alive?
+
+      @builder = Thread.new do
+        Rails.application.executor.wrap { build_current! }
+        @mutex.synchronize { @checked_at = nil }
+      rescue StandardError => e
+        Rails.logger.warn("Failed to build postcode index", error: e.message)
+      end
+    end
+
+    # If the postcodes are synced while they are being written, the file may not match its
+    # generation, so is removed for the next build to replace.
+    def build_for_current_generation!(dir)
+      generation = postcode_generation
+      return if generation.nil? || File.exist?(path_for(dir, generation))
+
+      path = write!(dir, generation)
+      File.delete(path) unless postcode_generation == generation
+    end
+
+    # C collation sorts by bytes, which is the order the binary search relies on
+    def copy_postcodes_into(file)
+      count = 0
+      raw_connection = ActiveRecord::Base.connection.raw_connection
+      raw_connection.copy_data(<<~SQL.squish) do
+        COPY (
+          SELECT normalised, ST_Y(location::geometry), ST_X(location::geometry), local_authority_id
+          FROM postcodes ORDER BY normalised COLLATE "C"
+        ) TO STDOUT
+      SQL
+        while (line = raw_connection.get_copy_data)
+          normalised, latitude, longitude, local_authority_id = line.chomp.split("\t")
+          file.write [normalised, latitude.to_f, longitude.to_f, local_authority_id].pack(RECORD_FORMAT)
+          count += 1
+        end
+      end
+      count
+    end
+
+    # open readers keep working after their file is removed, as the file is only unlinked
+    def remove_other_generations!(dir, generation)
+      Dir.glob(File.join(dir, "postcodes-*.idx")).each do |path|
+        File.delete(path) unless path == path_for(dir, generation)
+      end
+    end
+
+    def monotonic_now
+      Process.clock_gettime(Process::CLOCK_MONOTONIC)
+    end
+  end
+
+  @mutex = Mutex.new
+
+  class IndexError < StandardError
+  end
+end
@@ -1,86 +1,128 @@
 # frozen_string_literal: true
 
-require "csv_helpers"
+require "copy_writer"
+require "import_profiler"
 require "loader_helpers"
+require "postcode_csv_parser"
+require "shadow_tables"
 
 class PostcodeLoader
-  include CsvHelpers
   include LoaderHelpers
 
-  def initialize(postcode_csv)
-    @postcode_csv = CSV.new postcode_csv, headers: true, return_headers: true
+  POSTCODE_COLUMNS = %w[canonical location local_authority_id].freeze
+  # the postcodes are copied into this, and the new tables built from it
+  STAGED_POSTCODES = "pg_temp.postcodes_import"
+
+  # the columns of the ONS Postcode Directory (ONSPD), as exported to CSV
+  HEADERS = %w[
+    postcode postcode_no_space postcode_area postcode_district date_start date_end state onspd_version
+    easting northing positional_quality lat lon european_economic_region_code european_economic_region_name
+    county_code county_name local_authority_code local_authority_name ward_code ward_name
+    county_electoral_division_code county_electoral_division_name parish_code parish_name
+    parliamentary_constituency_code parliamentary_constituency_name census_output_area_2021_code
+    lower_super_output_area_2021_code lower_super_output_area_2021_name middle_super_output_area_2021_code
+    middle_super_output_area_2021_name census_output_area_2011_code lower_super_output_area_2011_code
+    rural_urban_area_2011_code imd_rank primary_care_trust_code integrated_care_board_subdivision_code
+    integrated_care_board_subdivision_name police_force_area_code police_force_area_name integrated_care_board_code
+    integrated_care_board_name westminster_member_of_parliament_code westminster_member_of_parliament
+    westminster_political_party_code westminster_political_party
+  ].freeze
+
+  def initialize(postcode_csv, parser_workers: Rails.configuration.postcode_parser_workers, profiler: ImportProfiler.new)
+    @postcode_csv = postcode_csv
+    @parser_workers = parser_workers
+    @profiler = profiler
     initialise_csv_headers!
   end
 
   def load!
+    build!
+    swap!
+  end
+
+  # Loads the postcodes and local authorities into new copies of their tables, leaving the live
+  # tables as they are until swap!
+  def build!
+    validate_csv_headers!
     ActiveRecord::Base.transaction do
-      validate_csv_headers!
-      defer_local_authority_integrity_checks_until_commit!
-      LocalAuthority.delete_all
-      local_authority_ids = create_postcodes_and_local_authorities!
-      nullify_dangling_offices! local_authority_ids
+      staged = @profiler.stage("postcodes.parse") { |stage| stage_postcodes!(stage) }
+      @profiler.stage("postcodes.build_tables") do |stage|
+        stage.rows_read = staged
+        self.class.shadow_tables.build! do
+          stage.rows_written = build_local_authorities! + build_postcodes!
+        end
+      end
     end
   end
 
-  private
+  # Makes the data loaded by build! live, keeping the data it replaces for rollback!
+  def swap!
+    self.class.shadow_tables.swap! { ServedArea.delete_without_local_authority }
+  end
 
-  # rubocop:disable Metrics/AbcSize
-  def create_postcodes_and_local_authorities!
-    # rubocop:disable Rails/SkipsModelValidations - we rely on database validations
-    local_authorities = {}
-    # do this in chunks for performance reasons
-    @postcode_csv.each_slice(10_000) do |rows|
-      rows.reject! { |row| row["local_authority_code"].nil? || row["local_authority_name"].nil? }
-      rows.each do |row|
-        local_authorities[row["local_authority_code"]] = row["local_authority_name"]
-      end
+  def self.rollback!
+    shadow_tables.rollback! { ServedArea.delete_without_local_authority }
+  end
 
-      Postcode.bulk_upsert(rows.map { |row| postcode_attrs_from_row(row) })
-    end
-    LocalAuthority.insert_all(local_authorities.map { |id, name| { id:, name: } })
-    # rubocop:enable Rails/SkipsModelValidations
-    local_authorities.keys
+  def self.shadow_tables
+    ShadowTables.new(LocalAuthority, Postcode)
   end
-  # rubocop:enable Metrics/AbcSize
 
-  def postcode_attrs_from_row(row)
-    { canonical: row["postcode"], local_authority_id: row["local_authority_code"], location: point_wkt_or_nil(row["lat"], row["lon"]) }
+  private
+
+  # the local authority names are staged alongside the postcodes, so that the set of local
+  # authorities can be found in the database rather than by building it up row-by-row in Ruby
+  def stage_postcodes!(stage)
+    create_staging_table!(STAGED_POSTCODES, Postcode, POSTCODE_COLUMNS)
+    ActiveRecord::Base.connection.execute("ALTER TABLE #{STAGED_POSTCODES} ADD COLUMN local_authority_name text")
+
+    parser = PostcodeCsvParser.new(@postcode_csv, @headers, workers: @parser_workers)
+    stage.rows_written = CopyWriter.new(Postcode, POSTCODE_COLUMNS + ["local_authority_name"], table_name: STAGED_POSTCODES)
+                                   .write_csv!(parser.enum_for(:each_chunk))
+    stage.rows_read = parser.rows_read
+    stage.rows_rejected = parser.rows_rejected
+    stage.rows_written
+  rescue PostcodeCsvParser::ParseError => e
+    raise PostcodeLoadError, "Postcodes CSV file could not be parsed: #{e.message}"
   end
 
-  def initialise_csv_headers!
-    @postcode_csv.shift if @postcode_csv.headers == true
+  def build_local_authorities!
+    local_authorities = ActiveRecord::Base.connection.exec_update(<<~SQL.squish)
+      INSERT INTO local_authorities (id, name)
+      SELECT DISTINCT ON (local_authority_id) local_authority_id, local_authority_name FROM #{STAGED_POSTCODES}
+    SQL
+    Rails.logger.info("Built local authorities", local_authorities:)
+    local_authorities
   end
 
-  def validate_csv_headers!
-    raise PostcodeLoadError, "Postcodes CSV file was not in expected format" unless postcode_csv_has_expected_headers?
+  # Postcodes which were already loaded keep their IDs. The live table has to be named explicitly
+  # here, as the new postcodes table is first on the search path.
+  def build_postcodes!
+    postcodes = ActiveRecord::Base.connection.exec_update(<<~SQL.squish)
+      INSERT INTO postcodes (id, canonical, location, local_authority_id)
+      SELECT coalesce(live.id, nextval(pg_get_serial_sequence('#{ShadowTables::LIVE_SCHEMA}.postcodes', 'id'))),
+             staged.canonical, staged.location, staged.local_authority_id
+      FROM (
+        SELECT DISTINCT ON (lower(replace(canonical, ' ', ''))) canonical, location, local_authority_id FROM #{STAGED_POSTCODES}
+      ) AS staged
+      LEFT JOIN #{ShadowTables::LIVE_SCHEMA}.postcodes AS live ON live.normalised = lower(replace(staged.canonical, ' ', ''))
+    SQL
+    Rails.logger.info("Built postcodes", postcodes:)
+    postcodes
   end
 
-  def defer_local_authority_integrity_checks_until_commit!
-    postcode_local_authority_foreign_key = "fk_rails_7ab3384eab"
-    served_areas_local_authority_foreign_key = "fk_rails_90a03e3955"
-    defer_constraint_until_commit! postcode_local_authority_foreign_key
-    defer_constraint_until_commit! served_areas_local_authority_foreign_key
+  # only the header line is parsed here, the rest of the file is parsed by PostcodeCsvParser
+  def initialise_csv_headers!
+    header_line = @postcode_csv.gets
+    @headers = header_line.nil? ? [] : CSV.parse_line(header_line)
   end
 
-  # - we rely on database validations
-  def nullify_dangling_offices!(current_local_authority_ids)
-    ServedArea.where.not(local_authority_id: current_local_authority_ids).delete_all
+  def validate_csv_headers!
+    raise PostcodeLoadError, "Postcodes CSV file was not in expected format" unless postcode_csv_has_expected_headers?
   end
 
   def postcode_csv_has_expected_headers?
-    @postcode_csv.headers == %w[
-      postcode postcode_no_space postcode_area postcode_district date_start date_end state onspd_version
-      easting northing positional_quality lat lon european_economic_region_code european_economic_region_name
-      county_code county_name local_authority_code local_authority_name ward_code ward_name
-      county_electoral_division_code county_electoral_division_name parish_code parish_name
-      parliamentary_constituency_code parliamentary_constituency_name census_output_area_2021_code
-      lower_super_output_area_2021_code lower_super_output_area_2021_name middle_super_output_area_2021_code
-      middle_super_output_area_2021_name census_output_area_2011_code lower_super_output_area_2011_code
-      rural_urban_area_2011_code imd_rank primary_care_trust_code integrated_care_board_subdivision_code
-      integrated_care_board_subdivision_name police_force_area_code police_force_area_name integrated_care_board_code
-      integrated_care_board_name westminster_member_of_parliament_code westminster_member_of_parliament
-      westminster_political_party_code westminster_political_party
-    ]
+    @headers == HEADERS
   end
 
   class PostcodeLoadError < StandardError
@@ -0,0 +1,76 @@
+# frozen_string_literal: true
+
+# Precomputes the results of an exact postcode search (the offices serving the postcode's local
+# authority, nearest first), so that OfficeSearch can answer those with a single lookup.
+#
+# Where every postcode in a sector has the same results, only one row is stored for the whole
+# sector. Postcodes in Scotland and Northern Ireland are skipped, as those are out of area.
+#
+# This has to be cleared in the same transaction as any change to the postcode or LSS data, and then
+# rebuilt. If it would take longer than the time budget, or store more rows than the size budget,
+# nothing is stored and searches fall back to running the query.
+class PostcodeSearchResultsBuilder
+  def initialize(max_rows: Rails.configuration.search_results_max_rows, timeout: Rails.configuration.search_results_timeout)
+    @max_rows = max_rows
+    @timeout = timeout
+  end
+
+  def build!
+    start_time = Process.clock_gettime(Process::CLOCK_MONOTONIC)
+    rows = ActiveRecord::Base.transaction(requires_new: true) { build_within_budget! }
+    Rails.logger.info("Precomputed postcode search results", rows:,
+                                                             duration: Process.clock_gettime(Process::CLOCK_MONOTONIC) - start_time)
+    rows
+  rescue ActiveRecord::QueryCanceled, OverBudgetError => e
+    Rails.logger.warn("Not precomputing postcode search results, as they are over budget", error: e.message)
+    PostcodeSearchResult.delete_all
+    0
+  end
+
+  private
+
+  def build_within_budget!
+    connection = ActiveRecord::Base.connection
+    connection.execute("SET LOCAL statement_timeout = #{Integer(@timeout) * 1000}")
+    PostcodeSearchResult.delete_all
+    rows = connection.exec_update(build_sql)
+    raise OverBudgetError, "#{rows} rows is more than the limit of #{@max_rows}" if rows > @max_rows
+
+    connection.execute("SET LOCAL statement_timeout TO DEFAULT")
+    rows
+  end
+
+  # the order must match OfficeSearch.build_query_from_location, with ties broken by ID
+  def build_sql
+    <<~SQL.squish
+      INSERT INTO postcode_search_results (key, office_ids)
+      WITH postcode_results AS (
+        SELECT
+          postcodes.normalised,
+          left(postcodes.normalised, length(postcodes.normalised) - 2) AS sector,
+          coalesce(
+            array_agg(offices.id ORDER BY offices.location <-> postcodes.location, offices.id) FILTER (WHERE offices.id IS NOT NULL),
+            '{}'
+          ) AS office_ids
+        FROM postcodes
+        LEFT JOIN served_areas ON served_areas.local_authority_id = postcodes.local_authority_id
+        LEFT JOIN offices ON offices.id = served_areas.office_id AND offices.office_type = 'office'
+        WHERE left(postcodes.local_authority_id, 1) NOT IN ('S', 'N')
+        GROUP BY postcodes.id
+      ),
+      uniform_sectors AS (
+        SELECT sector, min(office_ids) AS office_ids
+        FROM postcode_results
+        GROUP BY sector
+        HAVING count(DISTINCT office_ids) = 1
+      )
+      SELECT sector, office_ids FROM uniform_sectors
+      UNION ALL
+      SELECT normalised, office_ids FROM postcode_results
+      WHERE NOT EXISTS (SELECT 1 FROM uniform_sectors WHERE uniform_sectors.sector = postcode_results.sector)
+    SQL
+  end
+
+  class OverBudgetError < StandardError
+  end
+end
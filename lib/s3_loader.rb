@@ -1,19 +1,168 @@
 # frozen_string_literal: true
 
+require "tempfile"
+require "zlib"
+
+# Downloads objects from S3 into temporary files, fetching several objects (or parts of a large
+# object) at once. Objects with a .gz or .zst extension are decompressed as they are downloaded.
+#
+# If any download fails the whole fetch fails with a FetchError, rather than returning a partial file.
 class S3Loader
-  def initialize(s3_client = nil)
+  # objects bigger than this are downloaded in parts of this size, with a ranged GET for each
+  PART_SIZE = 16 * 1024 * 1024
+
+  # the number of (compressed) bytes downloaded so far
+  attr_reader :bytes_fetched
+
+  def initialize(s3_client = nil, threads: Rails.configuration.s3_fetch_threads)
     @s3_client = s3_client || Aws::S3::Client.new
+    @threads = threads
+    @bytes_fetched = 0
+  end
+
+  # Returns an IO for each key, reading the (decompressed) contents of the object as UTF-8. These
+  # read from temporary files which have already been unlinked, so are removed once closed.
+  def fetch_all(bucket, keys)
+    started_at = monotonic_now
+    objects = keys.to_h { |key| [key, @s3_client.head_object(bucket:, key:)] }
+    files = keys.to_h { |key| [key, unlinked_tempfile] }
+    downloads, decompressions = keys.map { |key| plan_download(bucket, key, objects[key], files[key]) }.transpose
+    run_concurrently(downloads.flatten)
+    run_concurrently(decompressions.flatten)
+
+    bytes = objects.values.sum(&:content_length)
+    @bytes_fetched += bytes
+    log_throughput("Downloaded #{keys.size} objects from #{bucket}", bytes, monotonic_now - started_at)
+    files.each_value do |file|
+      file.rewind
+      file.set_encoding(Encoding::UTF_8)
+    end
+    files
+  rescue StandardError => e
+    files&.each_value(&:close)
+    raise FetchError, "Could not download #{keys.join(', ')} from #{bucket}: #{e.message}"
   end
 
   def object_as_io(bucket, key)
-    read, write = IO.pipe
-    fork do
-      read.close
-      @s3_client.get_object(bucket:, key:) do |chunk|
-        write << chunk.force_encoding("UTF-8")
-      end
+    fetch_all(bucket, [key]).fetch(key)
+  end
+
+  # the ETag changes whenever an object's content does, so can be used to skip unchanged objects
+  # without downloading them
+  def object_etags(bucket, keys)
+    keys.to_h { |key| [key, @s3_client.head_object(bucket:, key:).etag] }
+  end
+
+  private
+
+  # Returns the jobs which download the object, and those which then have to run once every
+  # download has finished. Small objects are streamed through the decompressor straight into their
+  # file. Large objects are fetched in parts, each written at its own offset, and then decompressed.
+  def plan_download(bucket, key, object, file)
+    return [[-> { download_whole!(bucket, key, object, file) }], []] if object.content_length <= PART_SIZE
+
+    raw_file = compressed?(key) ? unlinked_tempfile : file
+    parts = (0...object.content_length).step(PART_SIZE).map do |offset|
+      -> { download_part!(bucket, key, object, raw_file, offset) }
+    end
+    [parts, compressed?(key) ? [-> { decompress_parts!(key, raw_file, file) }] : []]
+  end
+
+  def download_whole!(bucket, key, object, file)
+    started_at = monotonic_now
+    bytes = 0
+    decompressor = decompressor_for(key)
+    @s3_client.get_object(bucket:, key:, if_match: object.etag) do |chunk|
+      bytes += chunk.bytesize
+      file.write(decompressor.call(chunk))
+    end
+    file.write(decompressor.call(nil))
+    check_size!(key, bytes, object.content_length)
+    log_throughput("Downloaded #{key}", bytes, monotonic_now - started_at)
+  end
+
+  # if_match makes sure every part comes from the same version of the object
+  def download_part!(bucket, key, object, file, offset)
+    last = [offset + PART_SIZE, object.content_length].min - 1
+    position = offset
+    @s3_client.get_object(bucket:, key:, range: "bytes=#{offset}-#{last}", if_match: object.etag) do |chunk|
+      file.pwrite(chunk, position)
+      position += chunk.bytesize
+    end
+    check_size!("#{key} bytes #{offset}-#{last}", position - offset, last - offset + 1)
+  end
+
+  def decompress_parts!(key, raw_file, file)
+    started_at = monotonic_now
+    decompressor = decompressor_for(key)
+    raw_file.rewind
+    while (chunk = raw_file.read(PART_SIZE))
+      file.write(decompressor.call(chunk))
+    end
+    file.write(decompressor.call(nil))
+    log_throughput("Decompressed #{key}", raw_file.size, monotonic_now - started_at)
+  ensure
+    raw_file.close
+  end
+
+  # Decompressors are called with each chunk in turn, and then with nil once there are no more
+  def decompressor_for(key)
+    case File.extname(key)
+    when ".gz"
+      inflater = Zlib::Inflate.new(Zlib::MAX_WBITS + 32)
+      ->(chunk) { chunk.nil? ? inflater.finish.tap { inflater.close } : inflater.inflate(chunk) }
+    when ".zst"
+      stream = Zstd::StreamingDecompress.new
+      ->(chunk) { chunk.nil? ? "" : stream.decompress(chunk) }
+    else
+      ->(chunk) { chunk.nil? ? "" : chunk }
     end
-    write.close
-    read
+  end
+
+  def compressed?(key)
+    %w[.gz .zst].include?(File.extname(key))
+  end
+
+  # Runs the jobs on a bounded number of threads, in order. If any job fails, no more are started
+  # and the first error is raised once the running ones finish.
+  def run_concurrently(jobs)
+    return if jobs.empty?
+
+    queue = Queue.new
+    jobs.each { |job| queue << job }
+    queue.close
+    errors = Queue.new
+
+    Array.new([@threads, jobs.size].min) do
+      Thread.new do
+        while (job = queue.pop)
+          job.call
+        end
+      rescue StandardError => e
+        errors << e
+        queue.clear
+      end
+    end.each(&:join)
+
+    raise errors.pop unless errors.empty?
+  end
+
+  def check_size!(description, bytes, expected)
+    raise FetchError, "#{description} was truncated, got #{bytes} of #{expected} bytes" unless bytes == expected
+  end
+
+  def unlinked_tempfile
+    Tempfile.create("s3-object", binmode: true).tap { |file| File.unlink(file.path) }
+  end
+
+  def log_throughput(message, bytes, duration)
+    Rails.logger.info(message, bytes:, duration:, bytes_per_second: duration.positive? ? (bytes / duration).round : nil)
+  end
+
+  def monotonic_now
+    Process.clock_gettime(Process::CLOCK_MONOTONIC)
+  end
+
+  class FetchError < StandardError
   end
 end
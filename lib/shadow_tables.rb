@@ -0,0 +1,230 @@
+# frozen_string_literal: true
+
+# Loads a complete new copy of a set of tables alongside the live ones, and then swaps it in, so
+# that an import never updates or deletes rows in the tables the API is reading from.
+#
+# The new tables are built in the import_shadow schema, without any indexes or constraints until
+# the data has been loaded. Swapping them in moves the live tables into the import_previous schema
+# and the shadow tables into public, which only needs a brief exclusive lock. The previous tables
+# are kept until the next swap, so they can be swapped back in with rollback!.
+#
+# Foreign keys between a table in the set and one outside it are re-created on each swap, so that
+# they always point at the live tables.
+class ShadowTables
+  LIVE_SCHEMA = "public"
+  SHADOW_SCHEMA = "import_shadow"
+  PREVIOUS_SCHEMA = "import_previous"
+
+  # how long a swap waits for API queries using the live tables to finish, before giving up and
+  # trying again, so that requests don't queue behind it for long
+  LOCK_TIMEOUT = "5s"
+  SWAP_ATTEMPTS = 3
+
+  def initialize(*models)
+    @table_names = models.map(&:table_name)
+  end
+
+  # Creates empty shadow tables, and yields with them first on the search path, so that anything
+  # written to (or read from) these models in the block uses the new copy. Once the block returns
+  # the indexes and constraints of the live tables are added, and the new tables analysed.
+  def build!
+    create_schema! SHADOW_SCHEMA
+    constraints = live_constraints
+    indexes = live_indexes
+
+    ActiveRecord::Base.transaction(requires_new: true) do
+      drop_tables! SHADOW_SCHEMA
+      @table_names.each do |table|
+        shadow_table = connection.quote_table_name("#{SHADOW_SCHEMA}.#{table}")
+        live_table = connection.quote_table_name("#{LIVE_SCHEMA}.#{table}")
+        execute "CREATE TABLE #{shadow_table} (LIKE #{live_table} INCLUDING DEFAULTS INCLUDING GENERATED)"
+      end
+
+      with_shadow_tables_first do
+        result = yield
+        add_constraints_and_indexes! constraints, indexes
+        @table_names.each { |table| execute "ANALYZE #{connection.quote_table_name("#{SHADOW_SCHEMA}.#{table}")}" }
+        result
+      end
+    end
+  end
+
+  # Makes the shadow tables live, keeping the current ones as the previous generation. The block
+  # is called once the tables have been swapped, before foreign keys from other tables are checked.
+  def swap!(&after_swap)
+    raise SwapError, "There are no new tables to swap in for #{@table_names.join(', ')}" unless tables_exist?(SHADOW_SCHEMA)
+
+    with_lock_retries do
+      create_schema! PREVIOUS_SCHEMA
+      drop_tables! PREVIOUS_SCHEMA
+      replace_live_tables!(retired_to: PREVIOUS_SCHEMA, replaced_from: SHADOW_SCHEMA, &after_swap)
+    end
+  end
+
+  # Makes the previous tables live again. The tables this replaces are discarded at the next build.
+  def rollback!(&after_swap)
+    raise SwapError, "There are no previous tables to roll back to for #{@table_names.join(', ')}" unless tables_exist?(PREVIOUS_SCHEMA)
+
+    with_lock_retries do
+      create_schema! SHADOW_SCHEMA
+      drop_tables! SHADOW_SCHEMA
+      replace_live_tables!(retired_to: SHADOW_SCHEMA, replaced_from: PREVIOUS_SCHEMA, &after_swap)
+    end
+  end
+
+  private
+
+  def replace_live_tables!(retired_to:, replaced_from:)
+    external_foreign_keys = live_external_foreign_keys
+    # the locks are taken in the same order by every swap, within the one transaction
+    (@table_names + external_foreign_keys.map(&:first)).uniq.each do |table|
+      execute "LOCK TABLE #{connection.quote_table_name("#{LIVE_SCHEMA}.#{table}")} IN ACCESS EXCLUSIVE MODE"
+    end
+
+    @table_names.each do |table|
+      live_table = connection.quote_table_name("#{LIVE_SCHEMA}.#{table}")
+      replacement = connection.quote_table_name("#{replaced_from}.#{table}")
+      execute "ALTER TABLE #{live_table} SET SCHEMA #{connection.quote_table_name(retired_to)}"
+      execute "ALTER TABLE #{replacement} SET SCHEMA #{connection.quote_table_name(LIVE_SCHEMA)}"
+    end
+    transfer_sequences! retired_to
+
+    yield if block_given?
+    external_foreign_keys.each do |_, drop_statement, add_statement|
+      execute drop_statement
+      execute add_statement
+    end
+  end
+
+  # Sequences for serial columns belong to the table they were created with, so move with it. Every
+  # generation uses the same sequence, so it is handed over to the tables which are now live.
+  def transfer_sequences!(retired_to)
+    select_rows(<<~SQL.squish, retired_to).each do |sequence, table, column|
+      SELECT sequence.relname, owner.relname, attribute.attname
+      FROM pg_depend
+      JOIN pg_class sequence ON sequence.oid = pg_depend.objid AND sequence.relkind = 'S'
+      JOIN pg_class owner ON owner.oid = pg_depend.refobjid
+      JOIN pg_attribute attribute ON attribute.attrelid = owner.oid AND attribute.attnum = pg_depend.refobjsubid
+      WHERE pg_depend.deptype = 'a' AND owner.relnamespace = to_regnamespace($1) AND owner.relname = ANY($2)
+    SQL
+      retired_sequence = connection.quote_table_name("#{retired_to}.#{sequence}")
+      owner = "#{connection.quote_table_name("#{LIVE_SCHEMA}.#{table}")}.#{connection.quote_column_name(column)}"
+      execute "ALTER SEQUENCE #{retired_sequence} OWNED BY #{owner}"
+      execute "ALTER SEQUENCE #{retired_sequence} SET SCHEMA #{connection.quote_table_name(LIVE_SCHEMA)}"
+    end
+  end
+
+  # primary keys and unique constraints first, as foreign keys depend on them
+  def add_constraints_and_indexes!(constraints, indexes)
+    keys, foreign_keys = constraints.partition { |type, _| type != "f" }
+    keys.each { |_, statement| execute statement }
+    indexes.each { |statement| execute statement }
+    foreign_keys.each { |_, statement| execute statement }
+  end
+
+  # The statements which add the constraints and indexes are built from the catalogue, with
+  # identifiers quoted by format's %I.
+  #
+  # These must be read before the search path changes, so that the definitions refer to tables by
+  # their unqualified names, which then resolve to the shadow tables where there is one
+  def live_constraints
+    select_rows(<<~SQL.squish, LIVE_SCHEMA)
+      SELECT pg_constraint.contype,
+        format('ALTER TABLE %I ADD CONSTRAINT %I %s', owner.relname, pg_constraint.conname, pg_get_constraintdef(pg_constraint.oid))
+      FROM pg_constraint
+      JOIN pg_class owner ON owner.oid = pg_constraint.conrelid
+      WHERE owner.relnamespace = to_regnamespace($1) AND owner.relname = ANY($2) AND pg_constraint.contype IN ('p', 'u', 'x', 'c', 'f')
+      ORDER BY owner.relname, pg_constraint.conname
+    SQL
+  end
+
+  # indexes which back a constraint are created along with the constraint. The index definitions
+  # name the live table, so are pointed at the shadow one.
+  def live_indexes
+    select_rows(<<~SQL.squish, LIVE_SCHEMA, SHADOW_SCHEMA).map(&:first)
+      SELECT regexp_replace(pg_get_indexdef(pg_index.indexrelid), ' ON \\S+ USING ', format(' ON %I.%I USING ', $3::text, owner.relname))
+      FROM pg_index
+      JOIN pg_class owner ON owner.oid = pg_index.indrelid
+      WHERE owner.relnamespace = to_regnamespace($1) AND owner.relname = ANY($2)
+        AND NOT EXISTS (SELECT 1 FROM pg_constraint WHERE pg_constraint.conindid = pg_index.indexrelid AND pg_constraint.conrelid = owner.oid)
+      ORDER BY owner.relname
+    SQL
+  end
+
+  # foreign keys from a table in this set to one outside it, or the other way around, with the
+  # statements which drop and re-create them
+  def live_external_foreign_keys
+    select_rows(<<~SQL.squish, LIVE_SCHEMA)
+      SELECT owner.relname,
+        format('ALTER TABLE %I.%I DROP CONSTRAINT IF EXISTS %I', $1::text, owner.relname, pg_constraint.conname),
+        format('ALTER TABLE %I.%I ADD CONSTRAINT %I %s', $1::text, owner.relname, pg_constraint.conname,
+               pg_get_constraintdef(pg_constraint.oid))
+      FROM pg_constraint
+      JOIN pg_class owner ON owner.oid = pg_constraint.conrelid
+      JOIN pg_class referenced ON referenced.oid = pg_constraint.confrelid
+      WHERE pg_constraint.contype = 'f'
+        AND owner.relnamespace = to_regnamespace($1) AND referenced.relnamespace = to_regnamespace($1)
+        AND (owner.relname = ANY($2)) <> (referenced.relname = ANY($2))
+    SQL
+  end
+
+  def with_shadow_tables_first
+    search_path = connection.select_value("SHOW search_path")
+    set_local_search_path "#{connection.quote_table_name(SHADOW_SCHEMA)}, #{search_path}"
+    result = yield
+    # if the block raises, rolling back the transaction restores the search path
+    set_local_search_path search_path
+    result
+  end
+
+  def set_local_search_path(search_path)
+    connection.select_value("SELECT set_config('search_path', $1, true)", "SQL", [search_path])
+  end
+
+  def with_lock_retries
+    attempt = 1
+    begin
+      ActiveRecord::Base.transaction(requires_new: true) do
+        execute "SET LOCAL lock_timeout = '#{LOCK_TIMEOUT}'"
+        yield
+        execute "SET LOCAL lock_timeout TO DEFAULT"
+      end
+    rescue ActiveRecord::LockWaitTimeout
+      raise if attempt >= SWAP_ATTEMPTS
+
+      Rails.logger.warn("Timed out waiting to swap tables, retrying", tables: @table_names, attempt:)
+      attempt += 1
+      retry
+    end
+  end
+
+  def tables_exist?(schema)
+    @table_names.all? do |table|
+      connection.select_value("SELECT to_regclass($1) IS NOT NULL", "SQL", [connection.quote_table_name("#{schema}.#{table}")])
+    end
+  end
+
+  def create_schema!(schema)
+    execute "CREATE SCHEMA IF NOT EXISTS #{connection.quote_table_name(schema)}"
+  end
+
+  # these are only ever referenced by each other, or tables in other old generations
+  def drop_tables!(schema)
+    @table_names.each { |table| execute "DROP TABLE IF EXISTS #{connection.quote_table_name("#{schema}.#{table}")} CASCADE" }
+  end
+
+  def select_rows(sql, schema, *binds)
+    connection.select_rows(sql, "SQL", [schema, PG::TextEncoder::Array.new.encode(@table_names), *binds])
+  end
+
+  def execute(sql)
+    connection.execute(sql)
+  end
+
+  def connection
+    ActiveRecord::Base.connection
+  end
+
+  class SwapError < StandardError
+  end
+end
@@ -0,0 +1,113 @@
+# frozen_string_literal: true
+
+require "prometheus/client"
+require "prometheus/client/formats/text"
+
+# Exports the statistics pg_stat_statements keeps for the statements which have taken the most
+# database time, as gauges, so that we can see which queries dominate.
+#
+# The statistics are the same whichever process reads them, so rather than being exported by every
+# API process they are served by a single exporter (bin/rake statement_metrics:serve), which
+# deployed environments run as a deployment of its own.
+#
+# Each database instance keeps its own statistics, so they're read from the writer and, if there's
+# a separate one, the reader, labelled with the role. Statements are labelled with their queryid,
+# and the text of each is logged the first time it is among the top ones. The metrics are built
+# afresh when they are scraped, but no more often than every statement_metrics_interval seconds, so
+# statements which drop out of the top ones are no longer exported.
+module StatementMetrics
+  # how much of each statement's normalised text is logged
+  QUERY_LOG_LENGTH = 1000
+
+  # pg_stat_statements times are in milliseconds
+  METRICS = {
+    database_statement_calls: ["Times each statement has been run", ->(statement) { statement["calls"] }],
+    database_statement_total_time_seconds: ["Total time spent running each statement",
+                                            ->(statement) { statement["total_exec_time"] / 1000.0 }],
+    database_statement_mean_time_seconds: ["Mean time taken to run each statement",
+                                           ->(statement) { statement["mean_exec_time"] / 1000.0 }],
+    database_statement_rows: ["Total rows returned or changed by each statement", ->(statement) { statement["rows"] }]
+  }.freeze
+
+  TOP_STATEMENTS_SQL = <<~'SQL'.squish
+    SELECT queryid::text AS queryid, left(regexp_replace(query, '\s+', ' ', 'g'), ?) AS query, calls, total_exec_time,
+           mean_exec_time, rows
+    FROM pg_stat_statements
+    WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database()) AND toplevel
+    ORDER BY total_exec_time DESC
+    LIMIT ?
+  SQL
+
+  @mutex = Mutex.new
+  @logged_queries = Set.new
+
+  # The metrics in the Prometheus text format
+  def self.metrics_text
+    @mutex.synchronize do
+      now = Process.clock_gettime(Process::CLOCK_MONOTONIC)
+      if @collected_at.nil? || now - @collected_at >= Rails.configuration.statement_metrics_interval
+        @metrics_text = Prometheus::Client::Formats::Text.marshal(registry)
+        @collected_at = now
+      end
+      @metrics_text
+    end
+  end
+
+  # A Rack app which serves the metrics at /metrics, and responds to probes at /status
+  def self.app
+    lambda do |env|
+      case env["PATH_INFO"]
+      when "/metrics" then [200, { "content-type" => Prometheus::Client::Formats::Text::CONTENT_TYPE }, [metrics_text]]
+      when "/status" then [200, { "content-type" => "text/plain" }, ["OK"]]
+      else [404, { "content-type" => "text/plain" }, ["Not found"]]
+      end
+    end
+  end
+
+  # Returns the statements which have taken the most time on the database of a role, or none if
+  # pg_stat_statements isn't loaded there (it needs to be in shared_preload_libraries)
+  def self.top_statements(role, limit)
+    ActiveRecord::Base.connected_to(role:) do
+      ActiveRecord::Base.connection.select_all(ActiveRecord::Base.sanitize_sql_array([TOP_STATEMENTS_SQL, QUERY_LOG_LENGTH, limit])).to_a
+    end
+  rescue ActiveRecord::StatementInvalid => e
+    Rails.logger.warn("Could not read statement statistics", role:, error: e.message)
+    []
+  end
+
+  def self.reset!
+    @mutex.synchronize do
+      @collected_at = nil
+      @metrics_text = nil
+      @logged_queries.clear
+    end
+  end
+
+  def self.registry
+    registry = Prometheus::Client::Registry.new
+    gauges = METRICS.to_h { |name, (docstring, _)| [name, registry.gauge(name, docstring:, labels: %i[role queryid])] }
+    limit = Rails.configuration.statement_metrics_limit
+    return registry unless limit.positive?
+
+    roles.each do |role|
+      top_statements(role, limit).each do |statement|
+        log_query(role, statement)
+        labels = { role: role.to_s, queryid: statement["queryid"] }
+        METRICS.each { |name, (_, value)| gauges[name].set(value.call(statement), labels:) }
+      end
+    end
+    registry
+  end
+
+  def self.roles
+    Rails.configuration.database_reader_host.nil? ? %i[writing] : %i[writing reading]
+  end
+
+  # so that the queryid labels can be matched up with the statements' text
+  def self.log_query(role, statement)
+    return unless @logged_queries.add?([role, statement["queryid"]])
+
+    Rails.logger.info("Top statement", role:, queryid: statement["queryid"], query: statement["query"])
+  end
+  private_class_method :registry, :roles, :log_query
+end
@@ -0,0 +1,115 @@
+# frozen_string_literal: true
+
+require "postcode_index"
+
+# Completions for a search box as someone types: postcodes, and the names of the local authorities
+# and offices which a fuzzy search finds offices for.
+#
+# Postcodes come from the postcode index if there is one, or otherwise from the prefix index on the
+# postcodes table. The names are few enough to keep in each process, as sorted arrays of every
+# place a word starts in each name, so they are found with a binary search. They are loaded again
+# whenever the data generation changes.
+#
+# Postcodes come first, then names which start with the prefix, then names with a later word which
+# starts with it, each in alphabetical order.
+class Suggestions
+  DEFAULT_LIMIT = 10
+  MAX_LIMIT = 20
+  # a postcode starts with one or two letters then a digit, and is at most 7 characters without its
+  # space
+  POSTCODE_PREFIX = /\A[a-z]{1,2}\d[a-z\d]{0,4}\z/
+
+  Suggestion = Struct.new(:type, :text, :id)
+
+  attr_reader :generation_id
+
+  def initialize(generation_id, names)
+    @generation_id = generation_id
+    @name_starts = []
+    @word_starts = []
+    names.each do |name|
+      words = self.class.normalise(name.text).split
+      @name_starts << [words.join(" "), name] unless words.empty?
+      (1...words.size).each { |position| @word_starts << [words[position..].join(" "), name] }
+    end
+    [@name_starts, @word_starts].each { |starts| starts.sort_by! { |key, name| [key, name.type, name.id] } }
+  end
+
+  # Returns up to limit names with a word which starts with the (normalised) prefix
+  def names(prefix, limit)
+    found = []
+    return found if prefix.empty?
+
+    [@name_starts, @word_starts].each do |starts|
+      first = starts.bsearch_index { |key, _| key >= prefix } || starts.size
+      (first...starts.size).each do |position|
+        key, name = starts[position]
+        break if found.size >= limit || !key.start_with?(prefix)
+
+        found << name unless found.include?(name)
+      end
+    end
+    found
+  end
+
+  def size
+    @name_starts.size
+  end
+
+  class << self
+    def suggest(prefix, limit = nil)
+      limit = [limit || DEFAULT_LIMIT, MAX_LIMIT].min
+      found = postcodes(Postcode.normalise(prefix), limit)
+      found + current.names(normalise(prefix), limit - found.size)
+    end
+
+    # names are matched ignoring case and punctuation, so "bristol c" finds "Bristol, City of"
+    def normalise(text)
+      text.downcase.gsub(/[^[:alnum:]]+/, " ").strip
+    end
+
+    # the suggestions for the current data generation. Those read before there is one (when the
+    # data hasn't been synced) are kept until the first sync.
+    def current
+      generation_id = DataGeneration.cached_current&.id
+
+      @mutex.synchronize do
+        if @current.nil? || @current.generation_id != generation_id
+          @current = build(generation_id)
+          Rails.logger.info("Loaded suggestions", generation: generation_id, names: @current.size)
+        end
+        @current
+      end
+    end
+
+    def reset!
+      @mutex.synchronize { @current = nil }
+    end
+
+    private
+
+    def postcodes(normalised, limit)
+      return [] unless normalised.match?(POSTCODE_PREFIX)
+
+      index = PostcodeIndex.current
+      canonical = if index.nil?
+                    Postcode.where("normalised LIKE ?", "#{normalised}%").order(:normalised).limit(limit).pluck(:canonical)
+                  else
+                    index.complete(normalised, limit).map { |postcode| Postcode.canonicalise(postcode) }
+                  end
+      canonical.map { |postcode| Suggestion.new("postcode", postcode) }
+    end
+
+    # only the names a search would find offices for: offices, and the local authorities they serve
+    def build(generation_id)
+      offices = Office.where(office_type: :office)
+      served = ServedArea.joins(:office).merge(offices).select(:local_authority_id)
+      local_authorities = LocalAuthority.where(id: served).pluck(:id, :name)
+      names = local_authorities.map { |id, name| Suggestion.new("local_authority", name, id) } +
+              offices.pluck(:id, :name).map { |id, name| Suggestion.new("office", name, id) }
+      new(generation_id, names)
+    end
+  end
+
+  @mutex = Mutex.new
+end
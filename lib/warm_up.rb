@@ -0,0 +1,111 @@
+# frozen_string_literal: true
+
+require "office_search"
+require "postcode_index"
+require "suggestions"
+
+# Gets a server process ready to take traffic before it reports itself as ready, so that pods added
+# by the autoscaler don't serve their first requests on new database connections and code paths
+# which haven't run yet.
+#
+# Warming up fills the connection pools, loads the data which is kept in-process, and makes a
+# search and serialises offices the way requests do. Each step is best-effort: if there's no data
+# yet, or a step fails, the process is still marked ready, as /status checks the database itself.
+#
+# It runs from the Puma hooks in config/puma.rb, once in each process which serves requests. Until
+# it has finished, /status reports the service as unavailable.
+#
+# Warming up can be turned off with WARM_UP=false, in which case processes are ready as soon as they
+# have booted.
+module WarmUp
+  # the serialisers of both APIs, to render offices with outside of a controller
+  class Serialiser
+    include Api::V2::Serialisers
+    include Api::V0::Serialisers
+
+    public :location_as_v0_json
+  end
+
+  # how many offices are serialised
+  SAMPLE_OFFICES = 10
+
+  @ready = false
+
+  def self.ready?
+    @ready || !Rails.configuration.warm_up
+  end
+
+  def self.run!
+    started_at = monotonic_now
+    steps = Rails.application.executor.wrap do
+      %i[fill_connection_pools load_lookups search_and_serialise].index_with { |step| timed { send(step) } }
+    end
+    @ready = true
+    Rails.logger.info("Ready", warm_up_duration: monotonic_now - started_at, time_to_ready: monotonic_now - BOOT_STARTED_AT, steps:)
+  end
+
+  def self.reset!
+    @ready = false
+  end
+
+  # fills the pool of each role to its size (which is RAILS_MAX_THREADS, one per Puma thread)
+  def self.fill_connection_pools
+    %i[writing reading].each do |role|
+      ActiveRecord::Base.connected_to(role:) do
+        pool = ActiveRecord::Base.connection_pool
+        connections = Array.new(pool.size) { pool.checkout }
+        connections.each { |connection| pool.checkin(connection) }
+      end
+    end
+  end
+
+  def self.load_lookups
+    DataGeneration.cached_current
+    DataGeneration.replica_up_to_date?
+    PostcodeIndex.build_current! if Rails.configuration.postcode_index_build
+    PostcodeIndex.current
+    Suggestions.current
+  end
+
+  # searches by an office's postcode and its town, then serialises some offices as the v0 and v2
+  # APIs would, reading from the same database as requests do
+  def self.search_and_serialise
+    role = DataGeneration.replica_up_to_date? ? :reading : :writing
+    ActiveRecord::Base.connected_to(role:) do
+      Office.where.not(postcode: nil).pick(:postcode, :city)&.compact&.each { |near| search(near) }
+      serialise(Office.preload(:parent, :children, *Api::V0::Serialisers::LOCATION_PRELOADS).order(:id).limit(SAMPLE_OFFICES))
+    end
+  end
+
+  def self.search(near)
+    OfficeSearch.by_location(near)
+  rescue OfficeSearch::UnknownLocationError, OfficeSearch::OutOfAreaError
+    nil
+  end
+
+  def self.serialise(offices)
+    serialiser = Serialiser.new
+    offices.each do |office|
+      serialiser.office_as_json(office).to_json
+      serialiser.office_as_search_result_json(office).to_json
+      serialiser.location_as_v0_json(office).to_json
+    end
+  end
+
+  # returns how long the step took, logging (rather than raising) any error
+  def self.timed
+    started_at = monotonic_now
+    begin
+      yield
+    rescue StandardError => e
+      Rails.logger.warn("Warm-up step failed", error: e.message)
+    end
+    monotonic_now - started_at
+  end
+
+  def self.monotonic_now
+    Process.clock_gettime(Process::CLOCK_MONOTONIC)
+  end
+  private_class_method :fill_connection_pools, :load_lookups, :search_and_serialise, :search, :serialise, :timed,
+                       :monotonic_now
+end
@@ -0,0 +1,60 @@
+# frozen_string_literal: true
+
+require "rails_helper"
+require "benchmark_suite"
+require "lss_loader"
+require "postcode_loader"
+
+RSpec.describe BenchmarkSuite do
+  describe BenchmarkSuite::DataGenerator do
+    let(:dir) { Dir.mktmpdir }
+
+    after { FileUtils.rm_rf(dir) }
+
+    def generate(**opts)
+      described_class.new(dir, postcodes: 2_500, offices: 60, **opts).generate!
+      JSON.parse(File.read(File.join(dir, "manifest.json")))
+    end
+
+    def lss_csvs
+      LssLoader::LssLoader::SOURCE_FILES.transform_values { |file| File.open(File.join(dir, "lss-data", file)) }
+    end
+
+    it "generates files which the loaders accept" do
+      manifest = generate
+      File.open(File.join(dir, "geo-data", "postcodes.csv")) { |csv| PostcodeLoader.new(csv, parser_workers: 2).load! }
+      csvs = lss_csvs
+      LssLoader::LssLoader.new(**csvs).load!
+      csvs.each_value(&:close)
+
+      sample_office_ids = manifest.dig("samples", "office_ids")
+      loaded = { postcodes: Postcode.count, local_authorities: LocalAuthority.count, offices: Office.count,
+                 opening_times: OpeningTimes.count, sample_offices: Office.where(id: sample_office_ids).count }
+      expect(loaded).to match(postcodes: be_between(2_490, 2_500), local_authorities: manifest["local_authorities"], offices: 60,
+                              opening_times: be_positive, sample_offices: sample_office_ids.size)
+    end
+
+    it "generates the same files from the same seed" do
+      generate
+      first = File.read(File.join(dir, "geo-data", "postcodes.csv"))
+      generate
+
+      expect(File.read(File.join(dir, "geo-data", "postcodes.csv"))).to eq(first)
+    end
+  end
+
+  describe BenchmarkSuite::LoadRunner do
+    it "uses the nearest rank for percentiles" do
+      latencies = (1..20).to_a
+
+      expect([50, 95, 99].map { |percentile| described_class.percentile(latencies, percentile) }).to eq([10, 19, 20])
+    end
+  end
+
+  it "compares every figure in both results" do
+    baseline = { "sync" => { "duration" => 100.0, "dataset" => { "seed" => 1 } }, "endpoints" => { "url" => "http://localhost" } }
+    current = { "sync" => { "duration" => 90.0, "dataset" => { "seed" => 1 } } }
+
+    expect(described_class.compare(baseline, current)).to eq([["sync.duration", 100.0, 90.0, -10.0], ["sync.dataset.seed", 1, 1, 0.0]])
+  end
+end
@@ -0,0 +1,32 @@
+# frozen_string_literal: true
+
+require "rails_helper"
+require "copy_writer"
+
+RSpec.describe CopyWriter do
+  it "copies records with arrays, nulls and locations into the database" do
+    office = Office.new(id: generate_salesforce_id, name: "Testtown \"Central\" Citizens Advice", office_type: :office,
+                        location: "POINT(-0.78 52.66)", accessibility_information: %w[has_induction_loop has_staff_room],
+                        about_text: "Open on\nweekdays", allows_drop_ins: true)
+
+    described_class.new(Office).write!([office])
+
+    expect(Office.find(office.id).serializable_hash).to eq(office.serializable_hash)
+  end
+
+  it "copies opening times into the database" do
+    office = Office.create!(id: generate_salesforce_id, name: "Testtown Citizens Advice", office_type: :office)
+    range = Tod::Shift.new(Tod::TimeOfDay.new(9), Tod::TimeOfDay.new(17))
+
+    described_class.new(OpeningTimes, %w[office_id opening_time_for day_of_week range])
+                   .write!([OpeningTimes.new(office_id: office.id, opening_time_for: "office", day_of_week: "monday", range:)])
+
+    expect(OpeningTimes.find_by(office_id: office.id).range).to eq(range)
+  end
+
+  it "returns the number of records written" do
+    offices = Array.new(3) { Office.new(id: generate_salesforce_id, name: "Testtown Citizens Advice", office_type: :office) }
+
+    expect(described_class.new(Office).write!(offices)).to eq(3)
+  end
+end
@@ -0,0 +1,40 @@
+# frozen_string_literal: true
+
+require "rails_helper"
+require "directory_loader"
+
+RSpec.describe DirectoryLoader do
+  subject(:loader) { described_class.new(dir) }
+
+  let(:dir) { Dir.mktmpdir }
+
+  before do
+    FileUtils.mkdir_p(File.join(dir, "lss-bucket"))
+    File.write(File.join(dir, "lss-bucket", "members.csv"), "id,name\n1,Felpersham\n")
+  end
+
+  after { FileUtils.rm_rf(dir) }
+
+  it "reads each object from the bucket's directory" do
+    ios = loader.fetch_all("lss-bucket", ["members.csv"])
+
+    expect(ios.transform_values(&:read)).to eq("members.csv" => "id,name\n1,Felpersham\n")
+  end
+
+  it "counts the bytes read" do
+    loader.object_as_io("lss-bucket", "members.csv")
+
+    expect(loader.bytes_fetched).to eq(21)
+  end
+
+  it "changes the ETag when an object changes" do
+    etags = loader.object_etags("lss-bucket", ["members.csv"])
+    File.write(File.join(dir, "lss-bucket", "members.csv"), "id,name\n1,Felpersham\n2,Tatchester\n")
+
+    expect(loader.object_etags("lss-bucket", ["members.csv"])).not_to eq(etags)
+  end
+
+  it "raises a FetchError for missing objects" do
+    expect { loader.fetch_all("lss-bucket", ["advice_locations.csv"]) }.to raise_error(DirectoryLoader::FetchError)
+  end
+end
@@ -0,0 +1,67 @@
+# frozen_string_literal: true
+
+require "rails_helper"
+require "import_profiler"
+
+RSpec.describe ImportProfiler do
+  let(:summary_path) { File.join(Dir.tmpdir, "import_profile_#{SecureRandom.hex(4)}.json") }
+
+  after { FileUtils.rm_f(summary_path) }
+
+  it "returns what the stage returns" do
+    profiler = described_class.new(summary_path: nil, push_gateway: nil)
+
+    expect(profiler.stage("postcodes.parse") { :parsed }).to eq(:parsed)
+  end
+
+  it "records the counts set by each stage, and how long it took" do
+    profiler = described_class.new(summary_path: nil, push_gateway: nil)
+
+    profiler.stage("postcodes.parse") do |stage|
+      stage.rows_read = 3
+      stage.rows_rejected = 1
+      stage.rows_written = 2
+    end
+
+    expect(profiler.stages.sole).to have_attributes(name: "postcodes.parse", failed: false, rows_read: 3, rows_rejected: 1,
+                                                    rows_written: 2, bytes_fetched: 0, wall_time: be >= 0, cpu_time: be >= 0)
+  end
+
+  # rubocop:disable RSpec/MultipleExpectations
+  it "records stages which fail" do
+    profiler = described_class.new(summary_path: nil, push_gateway: nil)
+
+    expect { profiler.stage("lss.swap") { raise ActiveRecord::StatementInvalid, "failed" } }.to raise_error(ActiveRecord::StatementInvalid)
+    expect(profiler.stages.sole).to have_attributes(name: "lss.swap", failed: true)
+  end
+  # rubocop:enable RSpec/MultipleExpectations
+
+  it "writes a summary of every stage" do
+    profiler = described_class.new(summary_path:, push_gateway: nil)
+    profiler.stage("lss.download") { |stage| stage.bytes_fetched = 1024 }
+    profiler.stage("lss.write_tables") { |stage| stage.rows_written = 10 }
+
+    profiler.finish!
+
+    expect(JSON.parse(File.read(summary_path))).to include(
+      "job" => "sync_database",
+      "stages" => [
+        a_hash_including("name" => "lss.download", "bytes_fetched" => 1024, "rows_written" => 0),
+        a_hash_including("name" => "lss.write_tables", "bytes_fetched" => 0, "rows_written" => 10)
+      ]
+    )
+  end
+
+  # rubocop:disable RSpec/MultipleExpectations
+  it "doesn't fail the import if the metrics can't be pushed" do
+    push = instance_double(Prometheus::Client::Push)
+    allow(Prometheus::Client::Push).to receive(:new).with(job: "sync_database", gateway: "http://pushgateway:9091").and_return(push)
+    allow(push).to receive(:replace).and_raise(Errno::ECONNREFUSED)
+    profiler = described_class.new(summary_path: nil, push_gateway: "http://pushgateway:9091")
+    profiler.stage("postcodes.download") { |stage| stage.bytes_fetched = 1024 }
+
+    expect { profiler.finish! }.not_to raise_error
+    expect(push).to have_received(:replace)
+  end
+  # rubocop:enable RSpec/MultipleExpectations
+end
@@ -21,6 +21,50 @@ RSpec.describe LssLoader do
     expect(Office.all.map(&:id)).to eq [id]
   end
 
+  it "does not change the live offices until they are swapped in" do
+    id = create_a_single_office
+
+    load_from_fixtures(locations_csv_filename: "minimal", &:build!)
+
+    expect(Office.pluck(:id)).to eq [id]
+  end
+
+  it "rolls back to the offices and documents which were replaced" do
+    load_from_fixtures locations_csv_filename: "minimal"
+    load_from_fixtures
+
+    LssLoader::LssLoader.rollback!
+
+    expect([Office.pluck(:id), OfficeDocument.pluck(:office_id)]).to eq [["0014K000009EMMbQAO"], ["0014K000009EMMbQAO"]]
+  end
+
+  it "updates offices which have changed" do
+    load_from_fixtures locations_csv_filename: "minimal"
+    load_from_fixtures locations_csv_filename: "all_strings_populated"
+
+    expect(Office.find("0014K000009EMMbQAO").about_text).to eq "About our advice service"
+  end
+
+  it "removes opening times which are no longer in the data" do
+    load_from_fixtures locations_csv_filename: "minimal", opening_hours_csv_filename: "minimal"
+    load_from_fixtures locations_csv_filename: "minimal"
+
+    expect(OpeningTimes.count).to eq 0
+  end
+
+  it "renders the API documents for each office" do
+    load_from_fixtures locations_csv_filename: "minimal"
+
+    expect(JSON.parse(OfficeDocument.find("0014K000009EMMbQAO").v2_json)).to include("name" => "Citizens Advice Bristol")
+  end
+
+  it "removes the documents of offices no longer in the data" do
+    load_from_fixtures locations_csv_filename: "minimal"
+    load_from_fixtures
+
+    expect(OfficeDocument.count).to eq 0
+  end
+
   it "loads a single advice location record into the database with minimal fields" do
     load_from_fixtures locations_csv_filename: "minimal"
 
@@ -155,6 +199,14 @@ RSpec.describe LssLoader do
     expect(Office.count).to eq 0
   end
 
+  it "counts the advice locations which are excluded as rejected" do
+    profiler = ImportProfiler.new(summary_path: nil, push_gateway: nil)
+    load_from_fixtures(locations_csv_filename: "excluded", profiler:)
+
+    expect(profiler.stages.find { |stage| stage.name == "lss.build_offices" })
+      .to have_attributes(rows_read: 1, rows_rejected: 1, rows_written: 0)
+  end
+
   it "makes a dangling parent ID null" do
     load_from_fixtures locations_csv_filename: "dangling_hierarchy"
 
@@ -208,7 +260,9 @@ RSpec.describe LssLoader do
                          opening_hours_csv_filename: "empty",
                          accessibility_info_csv_filename: "empty",
                          volunteer_roles_csv_filename: "empty",
-                         local_authorities_csv_filename: "empty")
+                         local_authorities_csv_filename: "empty",
+                         profiler: ImportProfiler.new(summary_path: nil, push_gateway: nil),
+                         &action)
     members_csv = File.open(File.expand_path("fixtures/members/#{members_csv_filename}.csv", File.dirname(__FILE__)))
     advice_locations_csv = File.open(File.expand_path("fixtures/advice_locations/#{locations_csv_filename}.csv", File.dirname(__FILE__)))
     opening_hours_csv = File.open(File.expand_path("fixtures/opening_hours/#{opening_hours_csv_filename}.csv", File.dirname(__FILE__)))
@@ -226,8 +280,9 @@ RSpec.describe LssLoader do
                                           opening_hours_csv:,
                                           accessibility_info_csv:,
                                           volunteer_roles_csv:,
-                                          local_authorities_csv:)
-    lss_loader.load!
+                                          local_authorities_csv:,
+                                          profiler:)
+    action.nil? ? lss_loader.load! : action.call(lss_loader)
   ensure
     members_csv&.close
     advice_locations_csv&.close
@@ -21,6 +21,12 @@ RSpec.describe Postcode do
     expect(described_class.normalise_and_find("A12BC").id).to eq(postcode.id)
   end
 
+  it "has a helper which normalises and looks up many postcodes at once" do
+    postcode = create_postcode canonical: "A1 2BC"
+
+    expect(described_class.normalise_and_find_all(["a12bc", "B1 2CD"])).to eq({ "a12bc" => postcode, "B1 2CD" => nil })
+  end
+
   def create_postcode(vals)
     unless vals.key? :local_authority_id
       vals[:local_authority_id] =
@@ -0,0 +1,63 @@
+# frozen_string_literal: true
+
+require "rails_helper"
+
+RSpec.describe SyncState do
+  it "treats a source which has never been synced as changed" do
+    expect(described_class.source_changed?("postcodes", { "postcodes.csv" => "\"abc\"" })).to be true
+  end
+
+  it "treats a source with the same etags as last time as unchanged" do
+    described_class.record! "postcodes", { "postcodes.csv" => "\"abc\"" }
+
+    expect(described_class.source_changed?("postcodes", { "postcodes.csv" => "\"abc\"" })).to be false
+  end
+
+  it "treats a source with different etags to last time as changed" do
+    described_class.record! "postcodes", { "postcodes.csv" => "\"abc\"" }
+
+    expect(described_class.source_changed?("postcodes", { "postcodes.csv" => "\"def\"" })).to be true
+  end
+
+  it "creates a new data generation every time a sync is recorded" do
+    first = described_class.record!("postcodes", { "postcodes.csv" => "\"abc\"" }).data_generation
+    second = described_class.record!("lss", { "members.csv" => "\"def\"" }).data_generation
+
+    expect(second.id).to be > first.id
+  end
+
+  it "makes the data generation of the latest sync the current one" do
+    described_class.record! "postcodes", { "postcodes.csv" => "\"abc\"" }
+    latest = described_class.record!("lss", { "members.csv" => "\"def\"" }).data_generation
+
+    expect(DataGeneration.current).to eq(latest)
+  end
+
+  describe "the dependencies of a load" do
+    before do
+      described_class.record! "postcodes", { "postcodes.csv" => "\"abc\"" }
+      described_class.record! "lss", { "members.csv" => "\"def\"" }, dependencies: described_class.data_generations("postcodes")
+    end
+
+    it "are unchanged while the sources it depends on haven't been synced again" do
+      expect(described_class.dependencies_changed?("lss", described_class.data_generations("postcodes"))).to be false
+    end
+
+    it "have changed once a source it depends on has been synced again" do
+      described_class.record! "postcodes", { "postcodes.csv" => "\"ghi\"" }
+
+      expect(described_class.dependencies_changed?("lss", described_class.data_generations("postcodes"))).to be true
+    end
+  end
+
+  it "treats a load which has never been synced as having changed dependencies" do
+    expect(described_class.dependencies_changed?("lss", {})).to be true
+  end
+
+  it "returns the current data generation of each source" do
+    postcodes = described_class.record! "postcodes", {}
+    described_class.record! "lss", {}
+
+    expect(described_class.data_generations("postcodes")).to eq("postcodes" => postcodes.data_generation_id)
+  end
+end
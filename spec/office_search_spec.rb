@@ -14,6 +14,49 @@ RSpec.describe OfficeSearch do
     expect(results.pluck(:id)).to contain_exactly(in_area_office.id)
   end
 
+  it "returns the nearest offices first" do
+    LocalAuthority.create!(id: "X0001234", name: "Testshire")
+    far_office = create_office location: "POINT(-0.70 52.66)"
+    near_office = create_office location: "POINT(-0.77 52.66)"
+    create_postcode "XX4 6LA"
+
+    results, = described_class.by_location("XX4 6LA")
+
+    expect(results.pluck(:id)).to eq([near_office.id, far_office.id])
+  end
+
+  it "orders offices the same distance away by id, as the precomputed results do" do
+    LocalAuthority.create!(id: "X0001234", name: "Testshire")
+    offices = Array.new(3) { create_office location: "POINT(-0.70 52.66)" }
+    create_postcode "XX4 6LA"
+
+    results, = described_class.by_location("XX4 6LA")
+
+    expect(results.pluck(:id)).to eq(offices.map(&:id).sort)
+  end
+
+  it "only returns offices within the radius when specified" do
+    LocalAuthority.create!(id: "X0001234", name: "Testshire")
+    create_office location: "POINT(-0.70 52.66)"
+    near_office = create_office location: "POINT(-0.77 52.66)"
+    create_postcode "XX4 6LA"
+
+    results, = described_class.by_location("XX4 6LA", radius: 1_000)
+
+    expect(results.pluck(:id)).to eq([near_office.id])
+  end
+
+  it "limits the number of results when specified" do
+    LocalAuthority.create!(id: "X0001234", name: "Testshire")
+    create_office location: "POINT(-0.70 52.66)"
+    near_office = create_office location: "POINT(-0.77 52.66)"
+    create_postcode "XX4 6LA"
+
+    results, = described_class.by_location("XX4 6LA", limit: 1)
+
+    expect(results.pluck(:id)).to eq([near_office.id])
+  end
+
   it "returns all the offices in an area when it's a fuzzy match that matches on local authority names" do
     office = create_office_with_local_authority
     other_office = create_office_in_local_authority name: "Another Citizens Advice",
@@ -43,6 +86,23 @@ RSpec.describe OfficeSearch do
     expect(results.pluck(:id)).to contain_exactly(office.id, other_office.id)
   end
 
+  it "tolerates misspellings in fuzzy matches" do
+    office = create_office name: "Manchester Citizens Advice"
+
+    results, = described_class.by_location("Manchster")
+
+    expect(results.pluck(:id)).to contain_exactly(office.id)
+  end
+
+  it "ranks fuzzy matches by how closely they match" do
+    close_match = create_office name: "Bristow Citizens Advice"
+    exact_match = create_office name: "The Bristol Citizens Advice"
+
+    results, = described_class.by_location("Bristol")
+
+    expect(results.pluck(:id)).to eq([exact_match.id, close_match.id])
+  end
+
   it "ensures fuzzy matches respect the only with vacancies flag" do
     office = create_office_with_local_authority
     office_with_roles = create_office_in_local_authority(name: "Another Citizens Advice", volunteer_roles: ["trustee"],
@@ -73,6 +133,95 @@ RSpec.describe OfficeSearch do
     expect(results.length).to eq(1)
   end
 
+  describe "open_at" do
+    include ActiveSupport::Testing::TimeHelpers
+
+    it "only returns offices open at the time" do
+      LocalAuthority.create!(id: "X0001234", name: "Testshire")
+      open_office = create_office_open_on("monday", 9, 17, location: "POINT(-0.70 52.66)")
+      create_office_open_on("monday", 13, 17, location: "POINT(-0.77 52.66)")
+      create_postcode "XX4 6LA"
+
+      results, = described_class.by_location("XX4 6LA", open_at: open_at("monday", 10))
+
+      expect(results.pluck(:id)).to eq([open_office.id])
+    end
+
+    it "uses telephone advice hours when asked" do
+      LocalAuthority.create!(id: "X0001234", name: "Testshire")
+      create_office_open_on("monday", 9, 17)
+      telephone_office = create_office_open_on("monday", 9, 17, opening_time_for: "telephone")
+      create_postcode "XX4 6LA"
+
+      results, = described_class.by_location("XX4 6LA", open_at: open_at("monday", 10, "telephone"))
+
+      expect(results.pluck(:id)).to eq([telephone_office.id])
+    end
+
+    it "still matches places fuzzily when none of their offices are open" do
+      create_office_with_local_authority
+
+      results, location = described_class.by_location("Testshire", open_at: open_at("sunday", 10))
+
+      expect([results.to_a, location]).to eq([[], nil])
+    end
+
+    it "finds offices open now in UK time" do
+      LocalAuthority.create!(id: "X0001234", name: "Testshire")
+      office = create_office_open_on("monday", 9, 17)
+      create_postcode "XX4 6LA"
+
+      # 08:30 UTC is 09:30 in summer, but still 08:30 in winter
+      summer, winter = [Time.utc(2026, 7, 6, 8, 30), Time.utc(2026, 1, 5, 8, 30)].map do |time|
+        travel_to(time) { described_class.by_location("XX4 6LA", open_at: OfficeSearch::OpenAt.now("office")).first.pluck(:id) }
+      end
+
+      expect([summer, winter]).to eq([[office.id], []])
+    end
+
+    it "filters with the same query as the location search" do
+      LocalAuthority.create!(id: "X0001234", name: "Testshire")
+      create_office_open_on("monday", 9, 17)
+      create_postcode "XX4 6LA"
+
+      unfiltered = count_queries { described_class.by_location("XX4 6LA") }
+      filtered = count_queries { described_class.by_location("XX4 6LA", open_at: open_at("monday", 10)) }
+
+      expect(filtered).to eq(unfiltered)
+    end
+
+    def open_at(day_of_week, hour, opening_time_for = "office")
+      OfficeSearch::OpenAt.new(day_of_week:, time: Tod::TimeOfDay.new(hour), opening_time_for:)
+    end
+
+    def create_office_open_on(day_of_week, opens, closes, opening_time_for: "office", **office_vals)
+      create_office(office_vals).tap do |office|
+        OpeningTimes.create!(office:, opening_time_for:, day_of_week:, range: Tod::Shift.new(Tod::TimeOfDay.new(opens), Tod::TimeOfDay.new(closes)))
+      end
+    end
+  end
+
+  describe ".by_locations" do
+    before do
+      local_authority_id = LocalAuthority.create!(id: "X0001234", name: "Testshire").id
+      (0..7).each do |n|
+        create_office_in_local_authority(local_authority_id:, name: "Testshire Citizens Advice #{n}",
+                                         location: "POINT(-0.#{60 + (n * 5)} 52.66)")
+      end
+      %w[XX4 XX5 XX6].each_with_index do |outcode, n|
+        Postcode.create!(canonical: "#{outcode} 6LA", local_authority_id:, location: "POINT(-0.#{62 + (n * 15)} 52.66)")
+      end
+    end
+
+    it "returns the same offices, in the same order, as searching for each location" do
+      queries = ["XX4 6LA", "XX5 6LA", "XX6 6LA", "Testshire"]
+
+      batch_results = described_class.by_locations(queries, limit: 5).transform_values { |offices, _| offices.pluck(:id) }
+
+      expect(batch_results).to eq(queries.to_h { |query| [query, described_class.by_location(query, limit: 5).first.pluck(:id)] })
+    end
+  end
+
   def create_office_with_local_authority(la_id: "X0001234", la_name: "Testshire", **office_vals)
     local_authority_id = LocalAuthority.create!(id: la_id, name: la_name).id
     office = create_office(name: "#{la_name} Citizens Advice", **office_vals)
@@ -0,0 +1,49 @@
+# frozen_string_literal: true
+
+require "rails_helper"
+require "postcode_csv_parser"
+
+RSpec.describe PostcodeCsvParser do
+  let(:headers) { %w[postcode postcode_no_space lat lon local_authority_code local_authority_name] }
+
+  it "only returns the loaded columns, with the location as WKT" do
+    csv = "AB1 0AA,AB10AA,57.101474,-2.242851,S12000033,Aberdeen City\n"
+
+    expect(parse(csv)).to eq([["AB1 0AA", "POINT(-2.242851 57.101474)", "S12000033", "Aberdeen City"]])
+  end
+
+  it "skips postcodes without a local authority" do
+    csv = "AB1 0AA,AB10AA,57.101474,-2.242851,,\n"
+
+    expect(parse(csv)).to eq([])
+  end
+
+  it "counts the rows read and those which were skipped" do
+    csv = "AB1 0AA,AB10AA,57.101474,-2.242851,S12000033,Aberdeen City\nAB1 0AB,AB10AB,57.1,-2.2,,\n"
+    parser = described_class.new(StringIO.new(csv), headers, workers: 2)
+    parser.each_chunk { |_chunk, _rows| nil }
+
+    expect([parser.rows_read, parser.rows_rejected]).to eq([2, 1])
+  end
+
+  it "does not split rows across chunks when fields contain quotes or newlines" do
+    rows = Array.new(50) { |i| ["AB#{i} 0AA", "\"AB#{i}\"\n0AA", "57.1", "-2.2", "S12000033", "Aberdeen, \"City\""] }
+    csv = rows.map { |row| CSV.generate_line(row) }.join
+
+    expect(parse(csv, chunk_size: 16)).to match_array(rows.map { |row| [row[0], "POINT(-2.2 57.1)", row[4], row[5]] })
+  end
+
+  it "raises a parse error if the file is not valid CSV" do
+    csv = "AB1 0AA,\"AB10AA\"x,57.101474,-2.242851,S12000033,Aberdeen City\n"
+
+    expect { parse(csv) }.to raise_error(PostcodeCsvParser::ParseError)
+  end
+
+  def parse(csv, chunk_size: 1024)
+    rows = []
+    described_class.new(StringIO.new(csv), headers, workers: 2, chunk_size:).each_chunk do |chunk, _|
+      rows.concat CSV.parse(chunk.force_encoding(Encoding::UTF_8))
+    end
+    rows
+  end
+end
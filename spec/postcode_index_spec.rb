@@ -0,0 +1,128 @@
+# frozen_string_literal: true
+
+require "rails_helper"
+require "postcode_index"
+require "tmpdir"
+
+RSpec.describe PostcodeIndex do
+  let(:dir) { Dir.mktmpdir }
+
+  before do
+    LocalAuthority.create! id: "E06000023", name: "Bristol, City of"
+    LocalAuthority.create! id: "S12000033", name: "Aberdeen City"
+    %w[BS1 3BL AB1 0AA BS10 5NB B1 1AA].each_slice(2) do |outward, inward|
+      local_authority_id = outward.start_with?("AB") ? "S12000033" : "E06000023"
+      Postcode.create!(canonical: "#{outward} #{inward}", local_authority_id:, location: "POINT(-2.59 51.45)")
+    end
+    described_class.reset!
+  end
+
+  after do
+    described_class.reset!
+    FileUtils.remove_entry(dir)
+  end
+
+  it "finds every postcode in the index" do
+    index = described_class.new(described_class.write!(dir, 1))
+
+    expect(["BS13BL", "ab1 0aa", "BS105NB", "B1 1AA"].map { |postcode| index.find(postcode)&.local_authority_id })
+      .to eq(%w[E06000023 S12000033 E06000023 E06000023])
+  end
+
+  it "returns the location of a postcode" do
+    index = described_class.new(described_class.write!(dir, 1))
+
+    expect(index.find("BS1 3BL").location.as_text).to eq("POINT (-2.59 51.45)")
+  end
+
+  it "returns nil for postcodes which are not in the index" do
+    index = described_class.new(described_class.write!(dir, 1))
+
+    expect([index.find("BS1 3BM"), index.find("A1 1AA"), index.find("ZZ99 9ZZ")]).to all(be_nil)
+  end
+
+  it "completes a prefix with the postcodes which start with it, in order" do
+    index = described_class.new(described_class.write!(dir, 1))
+
+    expect([index.complete("bs1", 10), index.complete("b", 2), index.complete("bs2", 10)])
+      .to eq([%w[bs105nb bs13bl], %w[b11aa bs105nb], []])
+  end
+
+  it "returns nil for postcodes longer than any in the index, as the database does" do
+    index = described_class.new(described_class.write!(dir, 1))
+
+    expect(["BS10 5NBX", "BS105NBZZ", " "].map { |postcode| index.find(postcode) }).to all(be_nil)
+  end
+
+  it "removes the index for other generations when writing a new one" do
+    described_class.write!(dir, 1)
+    described_class.write!(dir, 2)
+
+    expect(Dir.children(dir)).to eq(["postcodes-2.idx"])
+  end
+
+  describe ".build_current!" do
+    before { allow(Rails.configuration).to receive(:postcode_index_dir).and_return(dir) }
+
+    it "writes the index for the current postcode generation" do
+      generation = SyncState.record!("postcodes", {}).data_generation_id
+
+      described_class.build_current!
+
+      expect(File).to exist(described_class.path_for(dir, generation))
+    end
+
+    it "does not write the index again if it exists already" do
+      described_class.write!(dir, SyncState.record!("postcodes", {}).data_generation_id)
+      allow(described_class).to receive(:write!)
+
+      described_class.build_current!
+
+      expect(described_class).not_to have_received(:write!)
+    end
+
+    it "does nothing before any postcodes have been synced" do
+      described_class.build_current!
+
+      expect(Dir.children(dir)).to eq(["build.lock"])
+    end
+  end
+
+  describe ".lookup" do
+    # rubocop:disable RSpec/MultipleExpectations
+    it "uses the index for the current postcode generation" do
+      sync_state = SyncState.record! "postcodes", {}
+      described_class.write!(dir, sync_state.data_generation_id)
+      allow(Rails.configuration).to receive(:postcode_index_dir).and_return(dir)
+      allow(Postcode).to receive(:normalise_and_find)
+
+      expect(described_class.lookup("BS1 3BL").local_authority_id).to eq("E06000023")
+      expect(Postcode).not_to have_received(:normalise_and_find)
+    end
+    # rubocop:enable RSpec/MultipleExpectations
+
+    it "falls back to the database if there is no index for the current postcode generation" do
+      described_class.write!(dir, SyncState.record!("postcodes", {}).data_generation_id)
+      SyncState.record! "postcodes", { "postcodes.csv" => "\"abc\"" }
+      allow(Rails.configuration).to receive(:postcode_index_dir).and_return(dir)
+
+      expect(described_class.lookup("BS1 3BL")).to eq(Postcode.find_by(canonical: "BS1 3BL"))
+    end
+
+    it "stops using the index as soon as the postcodes have been synced again" do
+      described_class.write!(dir, SyncState.record!("postcodes", {}).data_generation_id)
+      allow(Rails.configuration).to receive(:postcode_index_dir).and_return(dir)
+      described_class.lookup("BS1 3BL")
+      SyncState.record! "postcodes", { "postcodes.csv" => "\"abc\"" }
+      allow(Postcode).to receive(:normalise_and_find)
+
+      described_class.lookup("BS1 3BL")
+
+      expect(Postcode).to have_received(:normalise_and_find).with("BS1 3BL")
+    end
+
+    it "falls back to the database if the index is not configured" do
+      expect(described_class.lookup("BS1 3BL")).to eq(Postcode.find_by(canonical: "BS1 3BL"))
+    end
+  end
+end
@@ -30,6 +30,31 @@ RSpec.describe PostcodeLoader do
     expect(Postcode.all.map(&:id)).to eq([initial_id])
   end
 
+  it "removes postcodes which are no longer in the file" do
+    create_postcode canonical: "XX4 6LA"
+
+    load_from_fixture "single"
+
+    expect(Postcode.pluck(:canonical)).to eq(["AB1 0AA"])
+  end
+
+  it "does not change the live postcodes until they are swapped in" do
+    create_postcode canonical: "XX4 6LA"
+
+    PostcodeLoader.new(File.open(File.expand_path("fixtures/postcodes/single.csv", File.dirname(__FILE__)))).build!
+
+    expect(Postcode.pluck(:canonical)).to eq(["XX4 6LA"])
+  end
+
+  it "rolls back to the postcodes which were replaced" do
+    create_postcode canonical: "XX4 6LA"
+    load_from_fixture "single"
+
+    described_class.rollback!
+
+    expect(Postcode.pluck(:canonical)).to eq(["XX4 6LA"])
+  end
+
   describe "local authority handling" do
     it "loads a single local authority" do
       load_from_fixture "single"
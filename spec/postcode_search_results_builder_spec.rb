@@ -0,0 +1,83 @@
+# frozen_string_literal: true
+
+require "rails_helper"
+require "postcode_search_results_builder"
+
+RSpec.describe PostcodeSearchResultsBuilder do
+  let(:postcodes) do
+    {
+      "BS1 3AA" => "POINT(-2.59 51.45)",
+      "BS1 3AB" => "POINT(-2.591 51.451)",
+      "BS1 4AA" => "POINT(-2.50 51.45)",
+      "BS1 4AB" => "POINT(-2.67 51.45)",
+      "BS2 1AA" => "POINT(-2.60 51.40)"
+    }
+  end
+
+  before do
+    allow(Rails.configuration).to receive(:precompute_search_results).and_return(true)
+    LocalAuthority.create! id: "E06000023", name: "Bristol, City of"
+    LocalAuthority.create! id: "E06000024", name: "North Somerset"
+    %w[-2.53 -2.66 -2.70].each { |longitude| create_office_in("E06000023", "POINT(#{longitude} 51.45)") }
+    create_office_in("E06000024", "POINT(-2.60 51.40)")
+    postcodes.each { |canonical, location| Postcode.create!(canonical:, location:, local_authority_id: "E06000023") }
+  end
+
+  it "precomputes the same results as searching for each postcode" do
+    live_results = postcodes.keys.map { |postcode| search_for(postcode) }
+    described_class.new(max_rows: 100, timeout: 60).build!
+
+    expect(postcodes.keys.map { |postcode| search_for(postcode) }).to eq(live_results)
+  end
+
+  it "stores one row for sectors where every postcode has the same results" do
+    described_class.new(max_rows: 100, timeout: 60).build!
+
+    expect(PostcodeSearchResult.pluck(:key)).to contain_exactly("bs13", "bs14aa", "bs14ab", "bs21")
+  end
+
+  it "is used instead of searching for the offices" do
+    described_class.new(max_rows: 100, timeout: 60).build!
+    allow(OfficeSearch).to receive(:build_query_from_location)
+
+    OfficeSearch.by_location("BS1 3AA", only_in_same_local_authority: true)
+
+    expect(OfficeSearch).not_to have_received(:build_query_from_location)
+  end
+
+  it "is not looked up when the sync doesn't precompute search results" do
+    allow(Rails.configuration).to receive(:precompute_search_results).and_return(false)
+    allow(PostcodeSearchResult).to receive(:office_ids_for)
+
+    OfficeSearch.by_location("BS1 3AA", only_in_same_local_authority: true)
+
+    expect(PostcodeSearchResult).not_to have_received(:office_ids_for)
+  end
+
+  it "is not used for searches with other options" do
+    described_class.new(max_rows: 100, timeout: 60).build!
+    allow(PostcodeSearchResult).to receive(:office_ids_for)
+
+    OfficeSearch.by_location("BS1 3AA", only_in_same_local_authority: true, limit: 1)
+
+    expect(PostcodeSearchResult).not_to have_received(:office_ids_for)
+  end
+
+  it "stores nothing if there would be more rows than the size budget" do
+    PostcodeSearchResult.create!(key: "bs99", office_ids: [])
+
+    rows = described_class.new(max_rows: 2, timeout: 60).build!
+
+    expect([rows, PostcodeSearchResult.count]).to eq([0, 0])
+  end
+
+  def search_for(postcode)
+    results, = OfficeSearch.by_location(postcode, only_in_same_local_authority: true)
+    results.map(&:id)
+  end
+
+  def create_office_in(local_authority_id, location)
+    office = Office.create!(id: generate_salesforce_id, office_type: :office, name: "Testtown Citizens Advice", location:)
+    ServedArea.create!(office:, local_authority_id:)
+  end
+end
@@ -0,0 +1,62 @@
+# frozen_string_literal: true
+
+require "rails_helper"
+
+RSpec.describe "Caching API responses until the next sync" do
+  include_context "with episerver credentials"
+
+  let(:office) { Office.create!(id: generate_salesforce_id, legacy_id: 2, office_type: :office, name: "Testtown Citizens Advice") }
+
+  before { SyncState.record! "lss", {} }
+
+  it "sets validators and a public max-age on v2 responses" do
+    get "/api/v2/offices/#{office.id}"
+
+    expect(response.headers).to include("ETag" => a_string_starting_with('"'),
+                                        "Last-Modified" => DataGeneration.current.created_at.httpdate,
+                                        "Cache-Control" => a_string_including("max-age=300", "public"))
+  end
+
+  it "only allows v0 responses to be cached privately" do
+    get "/api/v0/json/location/id/#{office.legacy_id}", headers: { "Authorization" => self.Authorization }
+
+    expect(response.headers["Cache-Control"]).to include("max-age=300", "private")
+  end
+
+  it "responds with not modified to a conditional request without loading the office" do
+    get "/api/v2/offices/#{office.id}"
+    etag = response.headers["ETag"]
+
+    queries = count_queries { get "/api/v2/offices/#{office.id}", headers: { "If-None-Match" => etag } }
+
+    expect([response.status, queries]).to eq([304, 1])
+  end
+
+  it "does not respond with not modified after the data has been synced again" do
+    get "/api/v2/offices/#{office.id}"
+    etag = response.headers["ETag"]
+    SyncState.record! "lss", { "members.csv" => "\"abc\"" }
+
+    get "/api/v2/offices/#{office.id}", headers: { "If-None-Match" => etag }
+
+    expect(response).to have_http_status(:ok)
+  end
+
+  it "uses different validators for different request parameters" do
+    get "/api/v2/offices/", params: { q: "Testtown" }
+    etag = response.headers["ETag"]
+
+    get "/api/v2/offices/", params: { q: "Testtown", limit: "5" }
+
+    expect(response.headers["ETag"]).not_to eq(etag)
+  end
+
+  it "does not set validators before any data has been synced" do
+    SyncState.delete_all
+    DataGeneration.delete_all
+
+    get "/api/v2/offices/#{office.id}"
+
+    expect(response.headers["Last-Modified"]).to be_nil
+  end
+end
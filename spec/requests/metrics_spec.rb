@@ -0,0 +1,41 @@
+# frozen_string_literal: true
+
+require "rails_helper"
+
+RSpec.describe "Request and search metrics" do
+  let(:local_authority_id) { LocalAuthority.create!(id: "X0001234", name: "Testshire").id }
+
+  before do
+    Postcode.create! canonical: "XX4 6LA", local_authority_id:, location: "POINT(-0.78 52.66)"
+    allow(Yabeda.api.sql_queries).to receive(:measure).and_call_original
+    allow(Yabeda.api.serialisation_duration).to receive(:measure).and_call_original
+    allow(Yabeda.office_search.phase_duration).to receive(:measure).and_call_original
+  end
+
+  it "counts the SQL queries made by each request, labelled with the endpoint and match type" do
+    queries = count_queries { get "/api/v2/offices/", params: { q: "XX4 6LA" } }
+
+    expect(Yabeda.api.sql_queries).to have_received(:measure).with({ endpoint: "api/v2/office#search", match_type: "exact" }, queries)
+  end
+
+  it "measures the time taken to serialise the response" do
+    get "/api/v2/offices/", params: { q: "XX4 6LA" }
+
+    expect(Yabeda.api.serialisation_duration).to have_received(:measure).with({ endpoint: "api/v2/office#search", match_type: "exact" },
+                                                                              a_value >= 0)
+  end
+
+  it "measures each phase of an exact search" do
+    get "/api/v2/offices/", params: { q: "XX4 6LA" }
+
+    %i[postcode_lookup precomputed_lookup query_build query_execution].each do |phase|
+      expect(Yabeda.office_search.phase_duration).to have_received(:measure).with({ phase: }, a_value >= 0)
+    end
+  end
+
+  it "counts searches which don't match a location" do
+    expect { get "/api/v2/offices/", params: { q: "Nowhere" } }.to change {
+      Yabeda.office_search.outcomes_total.values[{ match_type: "unknown" }].to_i
+    }.by(1)
+  end
+end
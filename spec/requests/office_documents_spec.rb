@@ -0,0 +1,63 @@
+# frozen_string_literal: true
+
+require "rails_helper"
+require "lss_loader"
+
+RSpec.describe "Serving prerendered office documents" do
+  include_context "with episerver credentials"
+
+  let(:local_authority) { LocalAuthority.create! id: "E05XXTEST", name: "Borsetshire" }
+  let(:member) { create_office(office_type: :member, legacy_id: 1, name: "Citizens Advice Felpersham") }
+  let(:office) { create_office(office_type: :office, legacy_id: 2, parent: member, volunteer_roles: %w[trustee]) }
+
+  before do
+    create_office(office_type: :outreach, legacy_id: 3, parent: office)
+    [member, office].each { |served| ServedArea.create!(office: served, local_authority:) }
+    OpeningTimes.create!(office:, day_of_week: "monday", opening_time_for: "office",
+                         range: Tod::Shift.new(Tod::TimeOfDay.new(10), Tod::TimeOfDay.new(16)))
+  end
+
+  {
+    "v2 office" => ->(ids) { "/api/v2/offices/#{ids[:office]}" },
+    "v0 location" => ->(_) { "/api/v0/json/location/id/2" },
+    "v0 member" => ->(_) { "/api/v0/json/member/id/55/5555" },
+    "v0 vacancy" => ->(ids) { "/api/v0/json/vacancy/id/#{ids[:office]}" }
+  }.each do |endpoint, path|
+    it "serves the same #{endpoint} response as serialising from the database" do
+      url = path.call({ office: office.id })
+      serialised = get_body(url)
+      LssLoader::DocumentBuilder.new.build.each(&:save!)
+
+      expect(get_body(url)).to eq(serialised)
+    end
+  end
+
+  it "does not serve a vacancy for an office without volunteer roles" do
+    LssLoader::DocumentBuilder.new.build.each(&:save!)
+
+    get "/api/v0/json/vacancy/id/#{member.id}", headers: { "Authorization" => self.Authorization }
+
+    expect(response).to have_http_status(:not_found)
+  end
+
+  it "serves an office from its document with a single read" do
+    LssLoader::DocumentBuilder.new.build.each(&:save!)
+    allow(Office).to receive(:find)
+
+    get "/api/v2/offices/#{office.id}"
+
+    expect(Office).not_to have_received(:find)
+  end
+
+  def get_body(url)
+    get url, headers: { "Authorization" => self.Authorization }
+    JSON.parse(response.body)
+  end
+
+  def create_office(vals)
+    Office.create!({ id: generate_salesforce_id,
+                     membership_number: "55/5555",
+                     name: "Citizens Advice Felpersham North",
+                     location: "POINT(-0.7646468 52.0451619)" }.update(vals))
+  end
+end
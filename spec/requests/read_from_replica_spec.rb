@@ -0,0 +1,33 @@
+# frozen_string_literal: true
+
+require "rails_helper"
+
+RSpec.describe "Reading API data from the database replica" do
+  let(:office) { Office.create!(id: generate_salesforce_id, office_type: :office, name: "Testtown Citizens Advice") }
+  let(:roles) { [] }
+
+  before do
+    SyncState.record! "lss", {}
+    allow(Rails.configuration).to receive(:database_reader_host).and_return("replica.example.com")
+    allow(DataGeneration).to receive(:cached_current).and_wrap_original do |original|
+      roles << ActiveRecord::Base.current_role
+      original.call
+    end
+  end
+
+  it "serves requests from the replica when it is up to date" do
+    get "/api/v2/offices/#{office.id}"
+
+    expect(roles).to eq([:reading])
+  end
+
+  it "serves requests from the primary while the replica is behind the latest sync" do
+    allow(DataGeneration).to receive(:current).and_wrap_original do |original|
+      original.call unless ActiveRecord::Base.current_role == :reading
+    end
+
+    get "/api/v2/offices/#{office.id}"
+
+    expect(roles).to eq([:writing])
+  end
+end
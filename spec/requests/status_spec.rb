@@ -13,3 +13,22 @@ RSpec.describe "Service Status API" do
     end
   end
 end
+
+RSpec.describe "Service Status API while warming up" do
+  before { allow(Rails.configuration).to receive(:warm_up).and_return(true) }
+
+  after { WarmUp.reset! }
+
+  it "is unavailable until this process has warmed up" do
+    get "/status"
+
+    expect(response).to have_http_status(:service_unavailable)
+  end
+
+  it "is available once this process has warmed up" do
+    WarmUp.run!
+    get "/status"
+
+    expect(response).to have_http_status(:ok)
+  end
+end
@@ -0,0 +1,54 @@
+# frozen_string_literal: true
+
+require "rails_helper"
+
+RSpec.describe "Bureau Details legacy API - paging through lists" do
+  include_context "with episerver credentials"
+
+  let(:names) { %w[Ambridge Borchester Felpersham Hollerton Loxley] }
+
+  before do
+    names.reverse.each_with_index do |name, i|
+      Office.create!(id: generate_salesforce_id, legacy_id: i + 1, membership_number: "5#{i}/5555", office_type: :member,
+                     name: "Citizens Advice #{name}")
+    end
+  end
+
+  it "returns every member in name order without a limit" do
+    expect(list_members.fetch(:list).pluck(:name)).to eq(names.map { |name| "Citizens Advice #{name}" })
+  end
+
+  it "returns the same members when paging through them" do
+    pages = [list_members(limit: 2)]
+    pages << list_members(limit: 2, cursor: pages.last[:nextCursor]) until pages.last[:nextCursor].nil?
+
+    expect(pages.map { |page| page[:list].pluck(:name) }).to eq([
+                                                                  ["Citizens Advice Ambridge", "Citizens Advice Borchester"],
+                                                                  ["Citizens Advice Felpersham", "Citizens Advice Hollerton"],
+                                                                  ["Citizens Advice Loxley"]
+                                                                ])
+  end
+
+  it "has no next cursor when the last page is exactly full" do
+    page = list_members(limit: 5)
+
+    expect([page[:list].size, page[:nextCursor]]).to eq([5, nil])
+  end
+
+  it "streams lists in batches" do
+    stub_const("Api::V0::ListStreaming::BATCH_SIZE", 2)
+
+    expect(list_members.fetch(:list).size).to eq(5)
+  end
+
+  it "rejects a cursor which was not given by a previous page" do
+    get "/api/v0/json/member/list", params: { cursor: Base64.urlsafe_encode64("{}") }, headers: { "Authorization" => self.Authorization }
+
+    expect(response).to have_http_status(:bad_request)
+  end
+
+  def list_members(params = {})
+    get("/api/v0/json/member/list", params:, headers: { "Authorization" => self.Authorization })
+    JSON.parse(response.body, symbolize_names: true)
+  end
+end
@@ -243,8 +243,48 @@ RSpec.describe "Bureau Details legacy API - Locations", swagger_doc: "v0/swagger
                 description: "If bureau is set to false then locations of type bureau will not be returned."
       parameter name: :outlet, in: :query, type: :boolean, required: false, default: false,
                 description: "If outlet is set to true then outreaches will also be returned."
+      parameter name: :limit, in: :query, type: :integer, required: false,
+                description: "If limit is provided then only that many locations (up to 1000) are returned, along with a nextCursor."
+      parameter name: :cursor, in: :query, type: :string, required: false,
+                description: "The nextCursor from the previous page, to return the locations after it."
+
+      response "200", "returns the locations in alphabetical order" do
+        schema type: :object,
+               properties: {
+                 type: { type: :string, enum: %w[location] },
+                 list: { type: :array, items: BureauDetailsSchema::LOCATION_LIST_SCHEMA },
+                 nextCursor: BureauDetailsSchema::NEXT_CURSOR
+               },
+               required: %w[type list],
+               additionalProperties: false
+
+        let(:local_authority) { LocalAuthority.create! id: "E05XXTEST", name: "Borsetshire" }
+
+        before do
+          %w[office outreach].each_with_index do |office_type, i|
+            office = Office.create!(id: generate_salesforce_id, legacy_id: i + 1, membership_number: "55/5555", office_type:,
+                                    name: "Felpersham #{office_type}", street: "14 Shakespeare Road", city: "Felpersham",
+                                    postcode: "FX1 7QW", location: "POINT(-0.7646468 52.0451619)")
+            ServedArea.create!(office:, local_authority:)
+          end
+        end
+
+        run_test! do |response|
+          expect(JSON.parse(response.body, symbolize_names: true)[:list].pluck(:name)).to eq(["Felpersham office"])
+        end
+
+        context "with outreaches" do
+          let(:outlet) { true }
+
+          run_test! do |response|
+            expect(JSON.parse(response.body, symbolize_names: true)[:list].pluck(:name)).to eq(["Felpersham office", "Felpersham outreach"])
+          end
+        end
+      end
+
+      response "400", "if the limit or cursor is not valid" do
+        let(:cursor) { "not a cursor" }
 
-      response "501", "is a deprecated API which has not been reimplemented" do
         run_test!
       end
     end
@@ -356,12 +356,17 @@ RSpec.describe "Bureau Details legacy API - Members", swagger_doc: "v0/swagger.y
                   Without near all members will be show in alphabetical order. If near is provided then the nearest
                   members to the parameter will be returned.
                 DESCRIPTION
+      parameter name: :limit, in: :query, type: :integer, required: false,
+                description: "If limit is provided then only that many members (up to 1000) are returned, along with a nextCursor."
+      parameter name: :cursor, in: :query, type: :string, required: false,
+                description: "The nextCursor from the previous page, to return the members after it."
 
       response "200", "returns all the members it knows about" do
         schema type: :object,
                properties: {
                  type: { type: :string, enum: %w[member] },
-                 list: { type: :array, items: BureauDetailsSchema::MEMBER_LIST_SCHEMA }
+                 list: { type: :array, items: BureauDetailsSchema::MEMBER_LIST_SCHEMA },
+                 nextCursor: BureauDetailsSchema::NEXT_CURSOR
                },
                required: %w[type list],
                additionalProperties: false
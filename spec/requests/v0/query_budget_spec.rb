@@ -0,0 +1,77 @@
+# frozen_string_literal: true
+
+require "rails_helper"
+require "lss_loader"
+
+RSpec.describe "Bureau Details legacy API - query budgets" do
+  include_context "with episerver credentials"
+
+  # each budget includes one query to check the current data generation, which tests make on every
+  # request. These offices have no prerendered documents, so the get endpoints also check for a
+  # document before falling back to serialising from the database.
+
+  let(:local_authority) { LocalAuthority.create! id: "E05XXTEST", name: "Borsetshire" }
+  let(:member) { create_office(office_type: :member, legacy_id: 1, name: "Citizens Advice Felpersham") }
+
+  before do
+    Postcode.create! canonical: "FX1 7AA", local_authority:, location: "POINT(-0.7646468 52.0451619)"
+    ServedArea.create!(office: member, local_authority:)
+    20.times do |i|
+      office_type = i.even? ? :office : :outreach
+      office = create_office(office_type:, legacy_id: i + 2, parent: member, volunteer_roles: %w[trustee])
+      ServedArea.create!(office:, local_authority:)
+      %w[office telephone].each do |opening_time_for|
+        OpeningTimes.create!(office:, day_of_week: "monday", opening_time_for:,
+                             range: Tod::Shift.new(Tod::TimeOfDay.new(10), Tod::TimeOfDay.new(16)))
+      end
+    end
+  end
+
+  it "fetches a member and all of its locations in a fixed number of queries" do
+    expect(count_queries { get_v0 "/api/v0/json/member/id/55/5555" }).to be <= 9
+  end
+
+  it "lists members in a fixed number of queries" do
+    expect(count_queries { get_v0 "/api/v0/json/member/list" }).to be <= 4
+  end
+
+  it "lists locations in a fixed number of queries" do
+    expect(count_queries { get_v0 "/api/v0/json/location/list", params: { outlet: "true" } }).to be <= 4
+  end
+
+  it "pages through locations in a fixed number of queries per page" do
+    expect(count_queries { get_v0 "/api/v0/json/location/list", params: { limit: 5 } }).to be <= 5
+  end
+
+  it "fetches a location in a fixed number of queries" do
+    expect(count_queries { get_v0 "/api/v0/json/location/id/2" }).to be <= 6
+  end
+
+  it "fetches a vacancy in a fixed number of queries" do
+    vacancy = Office.find_by!(legacy_id: 2)
+
+    expect(count_queries { get_v0 "/api/v0/json/vacancy/id/#{vacancy.id}" }).to be <= 3
+  end
+
+  it "lists vacancies in a fixed number of queries" do
+    expect(count_queries { get_v0 "/api/v0/json/vacancy/list", params: { near: "FX1 7AA" } }).to be <= 3
+  end
+
+  it "serves a member from its prerendered document in a fixed number of queries" do
+    LssLoader::DocumentBuilder.new.build.each(&:save!)
+
+    expect(count_queries { get_v0 "/api/v0/json/member/id/55/5555" }).to be <= 2
+  end
+
+  def get_v0(path, params: {})
+    get(path, params:, headers: { "Authorization" => self.Authorization })
+    expect(response).to have_http_status(:ok)
+  end
+
+  def create_office(vals)
+    Office.create!({ id: generate_salesforce_id,
+                     membership_number: "55/5555",
+                     name: "Citizens Advice Felpersham North",
+                     location: "POINT(-0.7646468 52.0451619)" }.update(vals))
+  end
+end
@@ -148,5 +148,24 @@ module BureauDetailsSchema
     required: %w[address membershipNumber name serialNumber],
     additionalProperties: false
   }.freeze
+
+  LOCATION_LIST_SCHEMA = {
+    type: :object,
+    properties: {
+      serialNumber: { type: :string },
+      name: { type: :string },
+      membershipNumber: { type: :string },
+      address: ADDRESS_WITH_LOCAL_AUTHORITY_SCHEMA,
+      isBureau: { type: :boolean },
+      isOutlet: { type: :boolean }
+    },
+    required: %w[address membershipNumber name serialNumber isBureau isOutlet],
+    additionalProperties: false
+  }.freeze
+
+  NEXT_CURSOR = {
+    type: %i[string null],
+    description: "only given when a limit is, and is then the cursor for the next page, or null on the last page"
+  }.freeze
 end
 # rubocop:enable Metrics/ModuleLength
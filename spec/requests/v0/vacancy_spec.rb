@@ -94,6 +94,10 @@ RSpec.describe "Bureau Details legacy API - Vacancies", swagger_doc: "v0/swagger
                   If roles is provided then the role types are filtered to match the list of roles (comma separated) provided.
                   e.g roles=trustee,receptionist finds all trustee or receptionist vacancies.
                 DESCRIPTION
+      parameter name: :radius, in: :query, type: :number, required: false,
+                description: "If radius is provided then only vacancies within that many miles of the location are returned."
+      parameter name: :limit, in: :query, type: :integer, required: false,
+                description: "The maximum number of vacancies to return (up to 50)."
 
       response "200", "returns the nearest vacancies to the specified location" do
         schema type: :object,
@@ -168,6 +172,14 @@ RSpec.describe "Bureau Details legacy API - Vacancies", swagger_doc: "v0/swagger
           }])
         end
         # rubocop:enable RSpec/ExampleLength
+
+        context "with a radius which excludes the vacancy" do
+          let(:radius) { 0.5 }
+
+          run_test! do |response|
+            expect(JSON.parse(response.body, symbolize_names: true)[:list]).to eq([])
+          end
+        end
       end
     end
   end
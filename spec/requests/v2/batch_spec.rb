@@ -0,0 +1,82 @@
+# frozen_string_literal: true
+
+require "rails_helper"
+
+RSpec.describe "Searching for and fetching many offices at once" do
+  let(:local_authority_id) { LocalAuthority.create!(id: "X0001234", name: "Testshire").id }
+  let(:offices) do
+    %w[-0.70 -0.75 -0.80].each_with_index.map do |longitude, n|
+      Office.create!(id: generate_salesforce_id, office_type: :office, name: "Testshire Citizens Advice #{n}", location: "POINT(#{longitude} 52.66)")
+    end
+  end
+
+  before do
+    offices.each { |office| ServedArea.create!(local_authority_id:, office:) }
+    %w[XX4 XX5 XX6].each_with_index do |outcode, n|
+      Postcode.create!(canonical: "#{outcode} 6LA", local_authority_id:, location: "POINT(-0.#{77 + n} 52.66)")
+    end
+  end
+
+  describe "POST /api/v2/offices/search" do
+    it "returns the same results as searching for each query" do
+      queries = ["XX4 6LA", "XX6 6LA", "Testshire", "AB1 2CD"]
+      single_results = queries.to_h do |q|
+        get "/api/v2/offices/", params: { q:, limit: 2 }
+        [q, JSON.parse(response.body)]
+      end
+
+      post "/api/v2/offices/search", params: { queries:, limit: 2 }, as: :json
+
+      expect(JSON.parse(response.body)["searches"]).to eq(single_results)
+    end
+
+    it "looks up every postcode with one query, and every office with another" do
+      queries = count_queries do
+        post "/api/v2/offices/search", params: { queries: ["XX4 6LA", "XX5 6LA", "XX6 6LA", "Testshire"] }, as: :json
+      end
+
+      expect(queries).to eq(2)
+    end
+
+    it "accepts numbers for the optional parameters" do
+      post "/api/v2/offices/search", params: { queries: ["XX4 6LA"], radius: 2_000, limit: 1 }, as: :json
+
+      expect(JSON.parse(response.body).dig("searches", "XX4 6LA", "results").pluck("id")).to eq([offices[1].id])
+    end
+
+    it "rejects queries which are not strings" do
+      post "/api/v2/offices/search", params: { queries: [{ q: "XX4 6LA" }] }, as: :json
+
+      expect(response).to have_http_status(:bad_request)
+    end
+  end
+
+  describe "GET /api/v2/offices?ids=" do
+    it "returns the offices in the order they were asked for, leaving out unknown IDs" do
+      get "/api/v2/offices", params: { ids: [offices[2].id, generate_salesforce_id, offices[0].id].join(",") }
+
+      expect(JSON.parse(response.body)["results"].pluck("id")).to eq([offices[2].id, offices[0].id])
+    end
+
+    it "uses rendered documents where there are any" do
+      OfficeDocument.create!(office: offices[0], office_type: "office", v2_json: '{"id":"rendered"}', v0_json: "{}")
+
+      get "/api/v2/offices", params: { ids: offices.map(&:id).join(",") }
+
+      expect(JSON.parse(response.body)["results"].pluck("id")).to eq(["rendered", offices[1].id, offices[2].id])
+    end
+
+    it "uses the same number of queries however many offices are asked for" do
+      one_office = count_queries { get "/api/v2/offices", params: { ids: offices[0].id } }
+      all_offices = count_queries { get "/api/v2/offices", params: { ids: offices.map(&:id).join(",") } }
+
+      expect(all_offices).to eq(one_office)
+    end
+
+    it "rejects more than 100 IDs" do
+      get "/api/v2/offices", params: { ids: Array.new(101) { generate_salesforce_id }.join(",") }
+
+      expect(response).to have_http_status(:bad_request)
+    end
+  end
+end
@@ -132,5 +132,40 @@ module ApiV2Schema
     required: %i[match_type results],
     additionalProperties: false
   }.freeze
+
+  BATCH_SEARCH_RESULTS = {
+    "$schema": "https://json-schema.org/draft/2019-09/schema",
+    "$id": "https://local-office-search.citizensadvice.org.uk/schemas/v2/batch-results",
+    type: :object,
+    properties: {
+      searches: { type: :object, additionalProperties: SEARCH_RESULTS.except(:"$schema", :"$id"),
+                  description: "the results for each query, keyed by the query as it was given" }
+    },
+    required: %i[searches],
+    additionalProperties: false
+  }.freeze
+
+  SUGGESTIONS = {
+    "$schema": "https://json-schema.org/draft/2019-09/schema",
+    "$id": "https://local-office-search.citizensadvice.org.uk/schemas/v2/suggestions",
+    type: :object,
+    properties: {
+      suggestions: {
+        type: :array,
+        items: {
+          type: :object,
+          properties: {
+            type: { type: :string, enum: %w[postcode local_authority office] },
+            text: { type: :string, description: "the text to complete the search box with" },
+            id: { type: :string, description: "the ID of the local authority or office (not given for postcodes)" }
+          },
+          required: %i[type text],
+          additionalProperties: false
+        }
+      }
+    },
+    required: %i[suggestions],
+    additionalProperties: false
+  }.freeze
 end
 # rubocop:enable Metrics/ModuleLength
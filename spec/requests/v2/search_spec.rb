@@ -7,7 +7,19 @@ RSpec.describe "Search Local Office API" do
   path "/api/v2/offices/" do
     get "Searches for offices" do
       produces "application/json"
-      parameter name: :q, in: :query, type: :string, required: true, description: "the search terms to use"
+      parameter name: :q, in: :query, type: :string, required: false, description: "the search terms to use (required unless ids is given)"
+      parameter name: :ids, in: :query, type: :string, required: false,
+                description: "a comma separated list of up to 100 office IDs, which returns those offices instead of searching"
+      parameter name: :radius, in: :query, type: :number, required: false,
+                description: "if specified, only offices within this many metres of an exactly matched location are returned"
+      parameter name: :limit, in: :query, type: :integer, required: false,
+                description: "the maximum number of results to return (up to 50)"
+      parameter name: :open_at, in: :query, type: :string, required: false,
+                description: "if specified, only offices open at this day of the week and time (UK time) are returned, such as monday,13:30"
+      parameter name: :open_now, in: :query, type: :boolean, required: false,
+                description: "if true, only offices open now are returned"
+      parameter name: :open_for, in: :query, type: :string, enum: %w[office telephone], required: false,
+                description: "whether open_at and open_now use office opening hours (the default) or telephone advice hours"
 
       response "200", "a list of search results" do
         schema ApiV2Schema::SEARCH_RESULTS
@@ -84,6 +96,42 @@ RSpec.describe "Search Local Office API" do
               expect_contact_methods_to_match response, ["email"]
             end
           end
+
+          context "with the LCA outside of the given radius" do
+            let(:office) do
+              Office.new id: generate_salesforce_id,
+                         office_type: :office,
+                         name: "Testshire Citizens Advice",
+                         location: "POINT(-0.70 52.66)"
+            end
+
+            let(:radius) { 1_000 }
+
+            run_test! do |response|
+              expect_result_ids_in_response response, "exact", []
+            end
+          end
+
+          context "with the LCA open at the time searched for" do
+            let(:open_at) { "monday,10:00" }
+
+            before do
+              OpeningTimes.create!(office:, opening_time_for: "office", day_of_week: "monday",
+                                   range: Tod::Shift.new(Tod::TimeOfDay.new(9), Tod::TimeOfDay.new(17)))
+            end
+
+            run_test! do |response|
+              expect_result_ids_in_response response, "exact", [office.id]
+            end
+          end
+
+          context "with the LCA closed at the time searched for" do
+            let(:open_at) { "saturday,10:00" }
+
+            run_test! do |response|
+              expect_result_ids_in_response response, "exact", []
+            end
+          end
         end
 
         context "when the location is Scottish" do
@@ -136,12 +184,92 @@ RSpec.describe "Search Local Office API" do
         end
       end
 
-      response "400", "If query is not specified" do
+      response "400", "If query is not specified, or an optional parameter is not valid" do
         schema ApiV2Schema::JSON_PROBLEM
 
         let(:q) { "" }
 
         run_test!
+
+        context "when the limit is not a positive integer" do
+          let(:q) { "XX4 6LA" }
+          let(:limit) { "0" }
+
+          run_test!
+        end
+
+        context "when open_at is not a day of the week and a time" do
+          let(:q) { "XX4 6LA" }
+          let(:open_at) { "someday,10:00" }
+
+          run_test!
+        end
+      end
+    end
+  end
+
+  path "/api/v2/offices/search" do
+    post "Searches for offices for each of a list of queries" do
+      consumes "application/json"
+      produces "application/json"
+      parameter name: :body, in: :body, schema: {
+        type: :object,
+        properties: {
+          queries: { type: :array, items: { type: :string }, minItems: 1, maxItems: 100, description: "the search terms for each search" },
+          radius: { type: :number, description: "if specified, only offices within this many metres of an exactly matched location are returned" },
+          limit: { type: :integer, description: "the maximum number of results to return for each query (up to 50)" },
+          open_at: { type: :string, description: "if specified, only offices open at this day of the week and time (UK time) are returned" },
+          open_now: { type: :boolean, description: "if true, only offices open now are returned" },
+          open_for: { type: :string, enum: %w[office telephone], description: "whether open_at and open_now use office or telephone hours" }
+        },
+        required: %w[queries]
+      }
+
+      response "200", "the search results for each query, with the same match types as a single search" do
+        schema ApiV2Schema::BATCH_SEARCH_RESULTS
+
+        let(:local_authority_id) { LocalAuthority.create!(id: "X0001234", name: "Testshire").id }
+
+        let(:office) do
+          Office.create! id: generate_salesforce_id, office_type: :office, name: "Testshire Citizens Advice", location: "POINT(-0.78 52.66)"
+        end
+
+        let(:body) { { queries: ["XX4 6LA", "EH1 1AA", "BT1 1AA", "Testshire", "AB1 2CD"] } }
+
+        before do
+          ServedArea.create!(local_authority_id:, office:)
+          Postcode.create! canonical: "XX4 6LA", local_authority_id:, location: "POINT(-0.78 52.66)"
+          Postcode.create! canonical: "EH1 1AA", local_authority_id: LocalAuthority.create!(id: "S12000036", name: "Edinburgh").id,
+                           location: "POINT(-3.188106 55.95365)"
+          Postcode.create! canonical: "BT1 1AA", local_authority_id: LocalAuthority.create!(id: "N09000003", name: "Belfast").id,
+                           location: "POINT(-5.922291 54.602444)"
+        end
+
+        run_test! do |response|
+          searches = JSON.parse(response.body)["searches"]
+
+          expect(searches.transform_values { |search| [search["match_type"], search["results"].pluck("id")] }).to eq(
+            "XX4 6LA" => ["exact", [office.id]],
+            "EH1 1AA" => ["out_of_area_scotland", []],
+            "BT1 1AA" => ["out_of_area_ni", []],
+            "Testshire" => ["fuzzy", [office.id]],
+            "AB1 2CD" => ["unknown", []]
+          )
+        end
+      end
+
+      response "400", "If queries are not given, there are too many, or an optional parameter is not valid" do
+        schema ApiV2Schema::JSON_PROBLEM
+
+        let(:body) { { queries: [] } }
+
+        run_test!
+
+        context "when there are too many queries" do
+          let(:body) { { queries: Array.new(101) { |n| "query #{n}" } } }
+
+          run_test!
+        end
       end
     end
   end
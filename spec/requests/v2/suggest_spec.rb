@@ -0,0 +1,87 @@
+# frozen_string_literal: true
+
+require "swagger_helper"
+require "suggestions"
+require_relative "schema"
+
+RSpec.describe "Suggest Local Office API" do
+  before { Suggestions.reset! }
+
+  path "/api/v2/suggest" do
+    get "Suggests postcodes and places to search for which start with a prefix" do
+      produces "application/json"
+      parameter name: :prefix, in: :query, type: :string, required: true,
+                description: "the start of a postcode, or of a word in a place name"
+      parameter name: :limit, in: :query, type: :integer, required: false,
+                description: "the maximum number of suggestions to return (defaults to 10, up to 20)"
+
+      response "200", "the suggestions, postcodes first, then names which start with the prefix, then names with a later word which does" do
+        schema ApiV2Schema::SUGGESTIONS
+
+        let(:local_authority) { LocalAuthority.create!(id: "X0001234", name: "Testshire") }
+        let(:office) { Office.create!(id: generate_salesforce_id, office_type: :office, name: "Testshire Citizens Advice") }
+
+        before do
+          ServedArea.create!(local_authority:, office:)
+          Postcode.create!(canonical: "XX4 6LA", local_authority:, location: "POINT(-0.78 52.66)")
+        end
+
+        context "when the prefix is the start of a name" do
+          let(:prefix) { "tests" }
+
+          run_test! do |response|
+            expect(JSON.parse(response.body)["suggestions"]).to eq(
+              [{ "type" => "local_authority", "text" => "Testshire", "id" => local_authority.id },
+               { "type" => "office", "text" => "Testshire Citizens Advice", "id" => office.id }]
+            )
+          end
+        end
+
+        context "when the prefix is the start of a postcode" do
+          let(:prefix) { "xx4 6" }
+
+          run_test! do |response|
+            expect(JSON.parse(response.body)["suggestions"]).to eq([{ "type" => "postcode", "text" => "XX4 6LA" }])
+          end
+        end
+
+        context "when nothing starts with the prefix" do
+          let(:prefix) { "Nowhere" }
+
+          run_test! do |response|
+            expect(JSON.parse(response.body)["suggestions"]).to eq([])
+          end
+        end
+      end
+
+      response "400", "If prefix is not specified, or an optional parameter is not valid" do
+        schema ApiV2Schema::JSON_PROBLEM
+
+        let(:prefix) { "" }
+
+        run_test!
+
+        context "when the prefix is too long" do
+          let(:prefix) { "x" * 101 }
+
+          run_test!
+        end
+
+        context "when the limit is not a positive integer" do
+          let(:prefix) { "Test" }
+          let(:limit) { "0" }
+
+          run_test!
+        end
+      end
+    end
+  end
+
+  it "is cached until the next sync" do
+    SyncState.record! "lss", {}
+
+    get "/api/v2/suggest", params: { prefix: "Test" }
+
+    expect(response.headers["Cache-Control"]).to include("public")
+  end
+end
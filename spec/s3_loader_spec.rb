@@ -0,0 +1,92 @@
+# frozen_string_literal: true
+
+require "rails_helper"
+require "s3_loader"
+
+RSpec.describe S3Loader do
+  subject(:s3_loader) { described_class.new(s3_client, threads: 2) }
+
+  let(:objects) { {} }
+  let(:s3_client) do
+    Aws::S3::Client.new(stub_responses: true).tap do |client|
+      client.stub_responses(:head_object, lambda { |context|
+        body = objects[context.params[:key]]
+        body.nil? ? "NotFound" : { content_length: body.bytesize, etag: "\"#{Digest::MD5.hexdigest(body)}\"" }
+      })
+      client.stub_responses(:get_object, ->(context) { { body: requested_bytes(context.params) } })
+    end
+  end
+
+  it "downloads each object" do
+    objects.update("members.csv" => "id,name\n1,Felpersham\n", "advice_locations.csv" => "id\n2\n")
+
+    ios = s3_loader.fetch_all("lss-bucket", objects.keys)
+
+    expect(ios.transform_values(&:read)).to eq(objects)
+  end
+
+  it "downloads large objects in parts" do
+    stub_const("S3Loader::PART_SIZE", 4)
+    objects["postcodes.csv"] = "postcode\nAB1 0AA\n"
+
+    expect(s3_loader.object_as_io("geo-bucket", "postcodes.csv").read).to eq("postcode\nAB1 0AA\n")
+  end
+
+  it "only makes a ranged request for each part" do
+    stub_const("S3Loader::PART_SIZE", 4)
+    objects["postcodes.csv"] = "postcode\nAB1 0AA\n"
+
+    s3_loader.object_as_io("geo-bucket", "postcodes.csv")
+
+    expect(s3_client.api_requests.filter_map { |request| request[:params][:range] if request[:operation_name] == :get_object })
+      .to contain_exactly("bytes=0-3", "bytes=4-7", "bytes=8-11", "bytes=12-15", "bytes=16-16")
+  end
+
+  it "reads the contents as UTF-8" do
+    objects["local_authorities.csv"] = "name\nYnys Môn\n".b
+
+    expect(s3_loader.object_as_io("lss-bucket", "local_authorities.csv").read).to eq("name\nYnys Môn\n")
+  end
+
+  {
+    "gzip" => ["postcodes.csv.gz", ->(data) { ActiveSupport::Gzip.compress(data) }],
+    "zstd" => ["postcodes.csv.zst", ->(data) { Zstd.compress(data) }]
+  }.each do |format, (key, compress)|
+    it "decompresses #{format} objects" do
+      objects[key] = compress.call("postcode\nAB1 0AA\n" * 100)
+
+      expect(s3_loader.object_as_io("geo-bucket", key).read).to eq("postcode\nAB1 0AA\n" * 100)
+    end
+
+    it "decompresses #{format} objects downloaded in parts" do
+      stub_const("S3Loader::PART_SIZE", 8)
+      objects[key] = compress.call("postcode\nAB1 0AA\n" * 100)
+
+      expect(s3_loader.object_as_io("geo-bucket", key).read).to eq("postcode\nAB1 0AA\n" * 100)
+    end
+  end
+
+  it "fails if any object can not be downloaded" do
+    objects.update("members.csv" => "id\n1\n", "advice_locations.csv" => "id\n2\n")
+    s3_client.stub_responses(:get_object, lambda { |context|
+      context.params[:key] == "members.csv" ? "InternalError" : { body: requested_bytes(context.params) }
+    })
+
+    expect { s3_loader.fetch_all("lss-bucket", objects.keys) }.to raise_error(S3Loader::FetchError)
+  end
+
+  it "fails rather than returning a truncated object" do
+    objects["members.csv"] = "id,name\n1,Felpersham\n"
+    s3_client.stub_responses(:get_object, ->(context) { { body: requested_bytes(context.params)[0, 10] } })
+
+    expect { s3_loader.object_as_io("lss-bucket", "members.csv") }.to raise_error(S3Loader::FetchError, /truncated/)
+  end
+
+  def requested_bytes(params)
+    body = objects.fetch(params[:key])
+    return body if params[:range].nil?
+
+    first, last = params[:range].delete_prefix("bytes=").split("-").map(&:to_i)
+    body.byteslice(first..last)
+  end
+end
@@ -0,0 +1,64 @@
+# frozen_string_literal: true
+
+require "rails_helper"
+require "shadow_tables"
+
+RSpec.describe ShadowTables do
+  let(:shadow_tables) { described_class.new(Office, ServedArea) }
+  let(:local_authority) { LocalAuthority.create! id: "E06000023", name: "Bristol, City of" }
+
+  it "gives the new tables the same indexes and constraints as the tables they replace" do
+    definitions = index_and_constraint_definitions
+    shadow_tables.build! { nil }
+    shadow_tables.swap!
+
+    expect(index_and_constraint_definitions).to eq(definitions)
+  end
+
+  it "writes to the new tables while building them" do
+    office = Office.create!(id: generate_salesforce_id, office_type: :office, name: "Old Citizens Advice")
+    shadow_tables.build! { Office.create!(id: generate_salesforce_id, office_type: :office, name: "New Citizens Advice") }
+
+    expect(Office.pluck(:id)).to eq([office.id])
+  end
+
+  it "keeps using the same sequence for IDs after swapping" do
+    served_area = create_served_area
+    shadow_tables.build! { create_served_area }
+    shadow_tables.swap!
+    shadow_tables.build! { nil }
+    shadow_tables.swap!
+
+    expect(create_served_area.id).to be > served_area.id
+  end
+
+  it "keeps foreign keys from other tables pointing at the live tables" do
+    described_class.new(LocalAuthority).then do |local_authorities|
+      local_authorities.build! { LocalAuthority.create!(id: "E06000024", name: "North Somerset") }
+      local_authorities.swap!
+    end
+
+    expect { ServedArea.create!(office: create_office, local_authority_id: "E06000024") }.not_to raise_error
+  end
+
+  it "will not swap in tables which have not been built" do
+    expect { shadow_tables.swap! }.to raise_error ShadowTables::SwapError
+  end
+
+  def index_and_constraint_definitions
+    ActiveRecord::Base.connection.select_rows(<<~SQL.squish)
+      SELECT indexname, indexdef FROM pg_indexes WHERE schemaname = 'public' AND tablename IN ('offices', 'served_areas')
+      UNION ALL
+      SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid IN ('public.offices'::regclass, 'public.served_areas'::regclass)
+      ORDER BY 1
+    SQL
+  end
+
+  def create_office
+    Office.create!(id: generate_salesforce_id, office_type: :office, name: "Testtown Citizens Advice")
+  end
+
+  def create_served_area
+    ServedArea.create!(office: create_office, local_authority:)
+  end
+end
@@ -2,6 +2,7 @@
 
 require "simplecov"
 require_relative "support/id_generator"
+require_relative "support/query_counter"
 require_relative "support/v0_auth_helper"
 
 # Use default Rails profile
@@ -11,6 +12,7 @@ end
 
 RSpec.configure do |config|
   config.include IdGenerator
+  config.include QueryCounter
 
   config.expect_with :rspec do |expectations|
     expectations.include_chain_clauses_in_custom_matcher_descriptions = true
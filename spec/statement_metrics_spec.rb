@@ -0,0 +1,76 @@
+# frozen_string_literal: true
+
+require "rails_helper"
+require "statement_metrics"
+
+RSpec.describe StatementMetrics do
+  let(:statement) do
+    { "queryid" => "123", "query" => "SELECT * FROM offices WHERE id = $1", "calls" => 4, "total_exec_time" => 10.0,
+      "mean_exec_time" => 2.5, "rows" => 4 }
+  end
+
+  before { allow(described_class).to receive(:top_statements).and_return([statement]) }
+
+  after { described_class.reset! }
+
+  it "exports the statistics of the top statements, in seconds, labelled with the role and queryid" do
+    expect(described_class.metrics_text).to include(
+      'database_statement_calls{role="writing",queryid="123"} 4.0',
+      'database_statement_total_time_seconds{role="writing",queryid="123"} 0.01',
+      'database_statement_mean_time_seconds{role="writing",queryid="123"} 0.0025',
+      'database_statement_rows{role="writing",queryid="123"} 4.0'
+    )
+  end
+
+  it "no longer exports statements which have dropped out of the top ones" do
+    described_class.metrics_text
+    allow(described_class).to receive(:top_statements).and_return([])
+
+    expect(described_class.metrics_text).not_to include('queryid="123"')
+  end
+
+  it "logs the text of each statement the first time it is among the top ones" do
+    allow(Rails.logger).to receive(:info)
+
+    2.times { described_class.metrics_text }
+
+    expect(Rails.logger).to have_received(:info).with("Top statement", role: :writing, queryid: "123", query: statement["query"]).once
+  end
+
+  it "reads the statistics from the reader as well, when there is a separate one" do
+    allow(Rails.configuration).to receive(:database_reader_host).and_return("replica.example.com")
+
+    described_class.metrics_text
+
+    expect(described_class).to have_received(:top_statements).with(:reading, 20)
+  end
+
+  it "only reads the statistics once an interval" do
+    allow(Rails.configuration).to receive(:statement_metrics_interval).and_return(60)
+
+    2.times { described_class.metrics_text }
+
+    expect(described_class).to have_received(:top_statements).once
+  end
+
+  it "can be turned off" do
+    allow(Rails.configuration).to receive(:statement_metrics_limit).and_return(0)
+
+    described_class.metrics_text
+
+    expect(described_class).not_to have_received(:top_statements)
+  end
+
+  it "serves the metrics over HTTP" do
+    status, headers, body = described_class.app.call("PATH_INFO" => "/metrics")
+
+    expect([status, headers["content-type"], body.join]).to eq([200, Prometheus::Client::Formats::Text::CONTENT_TYPE,
+                                                                described_class.metrics_text])
+  end
+
+  it "reads the statements which have taken the most time, or none where pg_stat_statements isn't loaded" do
+    allow(described_class).to receive(:top_statements).and_call_original
+
+    expect(described_class.top_statements(:writing, 5)).to be_an(Array).and(have_attributes(size: be <= 5))
+  end
+end
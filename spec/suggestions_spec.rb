@@ -0,0 +1,84 @@
+# frozen_string_literal: true
+
+require "rails_helper"
+require "suggestions"
+require "tmpdir"
+
+RSpec.describe Suggestions do
+  let(:local_authority) { LocalAuthority.create!(id: "E06000023", name: "Bristol, City of") }
+  let(:offices) do
+    ["Bristol Citizens Advice", "Citizens Advice Bath"].map do |name|
+      Office.create!(id: generate_salesforce_id, office_type: :office, name:)
+    end
+  end
+
+  before do
+    ServedArea.create!(local_authority:, office: offices.first)
+    LocalAuthority.create!(id: "E06000022", name: "Bath and North East Somerset")
+    Office.create!(id: generate_salesforce_id, office_type: :outreach, name: "Bristol Library", parent: offices.first)
+    %w[BS1 3BL BS10 5NB BA1 1AA].each_slice(2) do |outward, inward|
+      Postcode.create!(canonical: "#{outward} #{inward}", local_authority:, location: "POINT(-2.59 51.45)")
+    end
+    described_class.reset!
+  end
+
+  after { described_class.reset! }
+
+  def suggest(prefix, limit = nil)
+    described_class.suggest(prefix, limit).map { |suggestion| [suggestion.type, suggestion.text] }
+  end
+
+  it "suggests names which start with the prefix before names with a later word which does" do
+    expect(suggest("b")).to eq([["local_authority", "Bristol, City of"], ["office", "Bristol Citizens Advice"],
+                                ["office", "Citizens Advice Bath"]])
+  end
+
+  it "ignores case and punctuation in names" do
+    expect(suggest("BRISTOL c")).to eq([["local_authority", "Bristol, City of"], ["office", "Bristol Citizens Advice"]])
+  end
+
+  it "only suggests names which a search finds offices for" do
+    expect(suggest("ba")).to eq([["office", "Citizens Advice Bath"]])
+  end
+
+  it "gives the ID of each local authority and office" do
+    expect(described_class.suggest("bristol").map(&:id)).to eq([local_authority.id, offices.first.id])
+  end
+
+  it "suggests postcodes before names" do
+    expect(suggest("bs1", 3)).to eq([["postcode", "BS10 5NB"], ["postcode", "BS1 3BL"]])
+  end
+
+  it "limits the number of suggestions" do
+    expect(suggest("b", 1)).to eq([["local_authority", "Bristol, City of"]])
+  end
+
+  it "returns nothing for prefixes which don't start anything" do
+    expect([suggest("zz"), suggest("!!")]).to all(be_empty)
+  end
+
+  it "completes postcodes from the postcode index when there is one" do
+    dir = Dir.mktmpdir
+    PostcodeIndex.write!(dir, SyncState.record!("postcodes", {}).data_generation_id)
+    allow(Rails.configuration).to receive(:postcode_index_dir).and_return(dir)
+    PostcodeIndex.reset!
+
+    expect(suggest("ba1 1")).to eq([["postcode", "BA1 1AA"]])
+  ensure
+    PostcodeIndex.reset!
+    FileUtils.remove_entry(dir)
+  end
+
+  it "only reads the names again when the data generation changes" do
+    SyncState.record! "lss", {}
+    described_class.suggest("b")
+
+    expect(count_queries { described_class.suggest("b") }).to eq(1)
+  end
+
+  it "only reads the names once before there is a data generation" do
+    described_class.suggest("b")
+
+    expect(count_queries { described_class.suggest("b") }).to eq(1)
+  end
+end
@@ -0,0 +1,14 @@
+# frozen_string_literal: true
+
+module QueryCounter
+  # counts the SQL queries sent to the database by the block, ignoring schema lookups and
+  # transaction management
+  def count_queries(&)
+    count = 0
+    counter = lambda do |_name, _start, _finish, _id, payload|
+      count += 1 unless payload[:cached] || %w[SCHEMA TRANSACTION].include?(payload[:name])
+    end
+    ActiveSupport::Notifications.subscribed(counter, "sql.active_record", &)
+    count
+  end
+end
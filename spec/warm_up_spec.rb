@@ -0,0 +1,65 @@
+# frozen_string_literal: true
+
+require "rails_helper"
+require "warm_up"
+
+RSpec.describe WarmUp do
+  before { allow(Rails.configuration).to receive(:warm_up).and_return(true) }
+
+  after { described_class.reset! }
+
+  it "is only ready once it has warmed up" do
+    expect { described_class.run! }.to change(described_class, :ready?).from(false).to(true)
+  end
+
+  it "is always ready when warming up is turned off" do
+    allow(Rails.configuration).to receive(:warm_up).and_return(false)
+
+    expect(described_class).to be_ready
+  end
+
+  it "fills the connection pool" do
+    described_class.run!
+
+    pool = ActiveRecord::Base.connection_pool
+    expect(pool.connections.size).to eq(pool.size)
+  end
+
+  context "with data to search" do
+    before do
+      LocalAuthority.create!(id: "X0001234", name: "Testshire")
+      office = Office.create!(id: generate_salesforce_id, office_type: :office, name: "Testtown Citizens Advice", postcode: "XX4 6LA",
+                              city: "Testtown", location: "POINT(-0.77 52.66)")
+      ServedArea.create!(local_authority_id: "X0001234", office:)
+      Postcode.create!(canonical: "XX4 6LA", local_authority_id: "X0001234", location: "POINT(-0.78 52.66)")
+      allow(Rails.logger).to receive(:info).and_call_original
+      allow(Rails.logger).to receive(:warn).and_call_original
+    end
+
+    it "searches for offices" do
+      allow(OfficeSearch).to receive(:by_location).and_call_original
+
+      described_class.run!
+
+      expect(OfficeSearch).to have_received(:by_location).with("XX4 6LA")
+    end
+
+    it "logs how long it took to become ready" do
+      described_class.run!
+
+      expect(Rails.logger).to have_received(:info).with("Ready", hash_including(time_to_ready: be_positive))
+    end
+
+    it "runs every step without any failing" do
+      described_class.run!
+
+      expect(Rails.logger).not_to have_received(:warn)
+    end
+  end
+
+  it "is ready even if there is no data to search yet" do
+    described_class.run!
+
+    expect(described_class).to be_ready
+  end
+end